@@ -0,0 +1,28 @@
+"""Added user rating version
+
+Revision ID: c4e1a9d2f7b3
+Revises: 10c9b5f90efe
+Create Date: 2026-01-12 18:04:27.311942
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e1a9d2f7b3'
+down_revision: Union[str, Sequence[str], None] = '10c9b5f90efe'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('user', sa.Column('rating_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('user', 'rating_version')
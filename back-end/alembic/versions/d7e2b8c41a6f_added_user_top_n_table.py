@@ -0,0 +1,39 @@
+"""Added user top-N table
+
+Revision ID: d7e2b8c41a6f
+Revises: c4e1a9d2f7b3
+Create Date: 2026-01-19 10:42:15.208734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7e2b8c41a6f'
+down_revision: Union[str, Sequence[str], None] = 'c4e1a9d2f7b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_top_n',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('model_version', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('rating_version', sa.Integer(), nullable=False),
+    sa.Column('movie_ids', sa.LargeBinary(), nullable=False),
+    sa.Column('scores', sa.LargeBinary(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_index(op.f('ix_user_top_n_model_version'), 'user_top_n', ['model_version'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_user_top_n_model_version'), table_name='user_top_n')
+    op.drop_table('user_top_n')
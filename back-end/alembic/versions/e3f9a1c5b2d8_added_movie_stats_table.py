@@ -0,0 +1,58 @@
+"""Added movie stats table
+
+Revision ID: e3f9a1c5b2d8
+Revises: d7e2b8c41a6f
+Create Date: 2026-01-21 16:08:53.470219
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3f9a1c5b2d8'
+down_revision: Union[str, Sequence[str], None] = 'd7e2b8c41a6f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('movie_stats',
+    sa.Column('movie_id', sa.Integer(), nullable=False),
+    sa.Column('rating_count', sa.Integer(), nullable=False),
+    sa.Column('rating_sum', sa.Integer(), nullable=False),
+    sa.Column('average_rating', sa.Float(), nullable=True),
+    sa.Column('count_1', sa.Integer(), nullable=False),
+    sa.Column('count_2', sa.Integer(), nullable=False),
+    sa.Column('count_3', sa.Integer(), nullable=False),
+    sa.Column('count_4', sa.Integer(), nullable=False),
+    sa.Column('count_5', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['movie_id'], ['movie.id'], ),
+    sa.PrimaryKeyConstraint('movie_id')
+    )
+    op.create_index(op.f('ix_movie_stats_rating_count'), 'movie_stats', ['rating_count'], unique=False)
+
+    # Backfill from the existing ratings (scripts/backfill_movie_stats.py does the same later on)
+    op.execute(
+        """
+        INSERT INTO movie_stats (movie_id, rating_count, rating_sum, average_rating,
+                                 count_1, count_2, count_3, count_4, count_5)
+        SELECT movie_id, COUNT(id), SUM(rating), AVG(rating),
+               SUM(CASE WHEN rating = 1 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN rating = 2 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN rating = 3 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN rating = 4 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN rating = 5 THEN 1 ELSE 0 END)
+        FROM rating
+        GROUP BY movie_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_movie_stats_rating_count'), table_name='movie_stats')
+    op.drop_table('movie_stats')
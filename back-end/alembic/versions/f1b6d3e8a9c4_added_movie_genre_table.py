@@ -0,0 +1,44 @@
+"""Added movie genre table
+
+Revision ID: f1b6d3e8a9c4
+Revises: e3f9a1c5b2d8
+Create Date: 2026-01-23 11:37:02.918345
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1b6d3e8a9c4'
+down_revision: Union[str, Sequence[str], None] = 'e3f9a1c5b2d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    movie_genre = op.create_table('movie_genre',
+    sa.Column('movie_id', sa.Integer(), nullable=False),
+    sa.Column('genre', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.ForeignKeyConstraint(['movie_id'], ['movie.id'], ),
+    sa.PrimaryKeyConstraint('movie_id', 'genre')
+    )
+    op.create_index(op.f('ix_movie_genre_genre'), 'movie_genre', ['genre'], unique=False)
+
+    # Backfill from the pipe-separated movie.genres
+    rows = op.get_bind().execute(sa.text("SELECT id, genres FROM movie")).fetchall()
+    op.bulk_insert(movie_genre, [
+        {"movie_id": movie_id, "genre": genre}
+        for movie_id, genres in rows
+        for genre in sorted({g for g in (genres or "").split("|") if g})
+    ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_movie_genre_genre'), table_name='movie_genre')
+    op.drop_table('movie_genre')
@@ -1,5 +1,7 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 from app.api.deps import SessionDep
+from app.services.ml_model import ml_service
 
 router = APIRouter()
 
@@ -7,6 +9,15 @@ router = APIRouter()
 def health_check():
     return {"status": "ok"}
 
+@router.get("/ready")
+def readiness_check():
+    """
+    Readiness of the recommendation models: per-model load state and timings.
+    Returns 503 until the models are loaded
+    """
+    report = ml_service.readiness()
+    return JSONResponse(status_code=200 if report["ready"] else 503, content=report)
+
 @router.post("/predict")
 def predict():
     # placeholder logic
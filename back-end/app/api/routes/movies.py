@@ -1,12 +1,22 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from typing import Optional, List
 
-from app.api.deps import SessionDep
+from app.api.deps import SessionDep, get_current_active_superuser
 from app import crud
-from app.models import MovieRead
+from app.models import MovieRead, MovieRatingDistribution
+from app.services.movie_catalog import movie_catalog
 
 router = APIRouter()
 
+# Catalog routes are answered from the in-memory snapshot with pre-serialized
+# MovieRead payloads and rating statistics (see services/movie_catalog.py):
+# they never read the DB per request
+
+
+def _json(payload: bytes) -> Response:
+    return Response(content=payload, media_type="application/json")
+
+
 @router.get("/", response_model=List[MovieRead])
 def list_movies(
     *,
@@ -16,24 +26,40 @@ def list_movies(
     limit: int = 50,
     offset: int = 0,
 ):
-    return crud.movie.movie_crud.list(
-        session=session, genre=genre, q=q, limit=limit, offset=offset
-    )
+    return _json(movie_catalog.get(session).list(genre=genre, q=q, limit=limit, offset=offset))
 
 
 @router.get("/search", response_model=List[MovieRead])
 def search_movies(session: SessionDep, q: str, limit: int = 50):
-    return crud.movie.movie_crud.search(session, query=q, limit=limit)
+    return _json(movie_catalog.get(session).search(q, limit=limit))
+
+
+@router.post("/catalog/refresh", dependencies=[Depends(get_current_active_superuser)])
+def refresh_catalog(session: SessionDep):
+    """Bumps the catalog version: every worker rebuilds its snapshot in the background"""
+    crud.movie.movie_crud.bump_catalog_version(session)
+    session.commit()
+    movie_catalog.invalidate()
+    return {"message": "Catalog refresh scheduled"}
 
 
 @router.get("/{movie_id}", response_model=MovieRead)
 def get_movie(session: SessionDep, movie_id: int):
-    movie = crud.movie.movie_crud.get(session, movie_id)
+    movie = movie_catalog.get(session).get(movie_id)
     if not movie:
         raise HTTPException(status_code=404, detail="Movie not found")
-    return movie
+    return _json(movie)
+
+
+@router.get("/{movie_id}/rating-distribution", response_model=MovieRatingDistribution)
+def get_movie_rating_distribution(session: SessionDep, movie_id: int):
+    """Number of 1-5 star ratings of a movie (rating distribution widget)"""
+    distribution = crud.movie.movie_crud.rating_distribution(session, movie_id)
+    if distribution is None:
+        raise HTTPException(status_code=404, detail="Movie not found")
+    return distribution
 
 
 @router.get("/genres/", response_model=list[str])
 def list_genres(session: SessionDep):
-    return crud.movie.movie_crud.list_genres(session)
\ No newline at end of file
+    return _json(movie_catalog.get(session).genres_payload)
@@ -3,6 +3,7 @@ from typing import List
 
 from app.models import RatingCreate, RatingRead
 from app.crud.rating import rating_crud
+from app.services.ml_model import ml_service
 from app.api.deps import (
     CurrentUser,
     SessionDep,
@@ -29,6 +30,7 @@ def create_rating(
             new_rating_value=rating_in.rating,
             new_timestamp=rating_in.timestamp
         )
+        ml_service.invalidate_user(current_user.id)
         return updated_rating
     new_rating = rating_crud.create(
         session=session,
@@ -37,6 +39,7 @@ def create_rating(
         rating_value=rating_in.rating,
         timestamp=rating_in.timestamp
     )
+    ml_service.invalidate_user(current_user.id)
 
     return new_rating
 
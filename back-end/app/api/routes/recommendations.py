@@ -1,10 +1,10 @@
 """
 Recommendations API endpoints using MLflow models
 """
-from typing import List
-from fastapi import APIRouter, HTTPException, Depends
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Body, Query, Response
 from app.services.ml_model import ml_service
-from app.api.deps import get_current_user, SessionDep
+from app.api.deps import get_current_user, get_current_active_superuser, SessionDep
 from app.models.user import User
 from app.models import MovieRead
 from app import crud
@@ -12,6 +12,29 @@ from app import crud
 router = APIRouter()
 
 
+def _get_user_context(session, user_id: int):
+    """Load the (movie_id, rating) tuples and preferred genres of a user"""
+    preference = crud.user_preference.user_preference_crud.get_by_user(session, user_id)
+    preferred_genres = preference.preferred_genres.split("|") if preference and preference.preferred_genres else []
+    user_ratings = crud.rating.rating_crud.get_user_rated_movie_ids(session, user_id)
+    return user_ratings, preferred_genres
+
+
+def _get_user_profile(session, user: User):
+    """
+    Cached profile of the user at their current rating version.
+    The ratings, preferences and offline top-N are only read from the DB on a cache miss.
+    """
+    return ml_service.get_user_profile(
+        user_id=user.id,
+        version=user.rating_version,
+        loader=lambda: _get_user_context(session, user.id),
+        top_n_loader=lambda model_version: crud.user_top_n.user_top_n_crud.get_for_model(
+            session, user.id, model_version
+        )
+    )
+
+
 # ============================================================================
 # Public Endpoints - Used by Frontend
 # ============================================================================
@@ -19,38 +42,69 @@ router = APIRouter()
 @router.get("/user", response_model=List[MovieRead])
 def get_user_recommendations(
     session: SessionDep,
-    n: int = 10,
+    response: Response,
+    n: int = Query(10, ge=1, le=100),
+    genre: Optional[str] = None,
+    decade: Optional[int] = None,
     current_user: User = Depends(get_current_user)
 ):
     """
-    Get personalized movie recommendations for the current user
+    Get personalized movie recommendations for the current user,
+    optionally constrained to a genre and/or release decade (e.g. 1990)
+    
+    The request runs under a latency budget. The X-Recommendation-Tier header
+    tells which tier served it: personalized, cached, popular, static, or
+    db_popular while the models are still loading. X-Recommendation-Variant
+    is the A/B variant the user is bucketed in ("control" without experiment).
+    
+    Personalized pages are cached per user until the user rates a movie or
+    changes preferences, or the model changes (X-Recommendation-Cache: hit/miss)
     """
+    if genre:
+        crud.user_preference.user_preference_crud.validate_genres([genre])
+    
+    if not ml_service.is_ready():
+        response.headers["X-Recommendation-Tier"] = "db_popular"
+        return crud.movie.movie_crud.most_rated(session, limit=n)
+    
+    page_key = (n, genre, decade)
+    cached = ml_service.get_cached_page(current_user.id, current_user.rating_version, page_key)
+    if cached is not None:
+        # Only the ids are cached: the movie details and statistics are read fresh
+        movie_ids, tier, variant = cached
+        response.headers["X-Recommendation-Tier"] = tier
+        response.headers["X-Recommendation-Variant"] = variant
+        response.headers["X-Recommendation-Cache"] = "hit"
+        return crud.movie.movie_crud.get_many(session, movie_ids)
+    
     try:
-        preferred_genres = crud.user_preference.user_preference_crud.get_by_user(session, current_user.id).preferred_genres
-        user_ratings = crud.rating.rating_crud.get_user_rated_movie_ids(session, current_user.id)
-        print(f"User {current_user.id} - Preferred genres: {preferred_genres}, Rated movies: {len(user_ratings)}")
-        # Get recommended movie IDs from ML model
-        recommendations = ml_service.recommend_top_n(
+        deadline = ml_service.new_deadline("user")
+        # Taken before computing: a page computed across a model swap is stored
+        # under the old generation, and never served from the new model's cache
+        generation = ml_service.bundle_for(current_user.id)[1].generation
+        
+        # Get recommended movie IDs from ML model (or a cheaper fallback tier)
+        movie_ids, tier = ml_service.recommend_within_budget(
             user_id=current_user.id,
             n=n,
-            preferred_genres=preferred_genres,
-            user_ratings=user_ratings)
-        
-        # Handle both return types: list of integers or list of dicts
-        if recommendations and isinstance(recommendations[0], dict):
-            # New user - recommendations are dicts with movie_id key
-            movie_ids = [rec['movie_id'] for rec in recommendations]
-        else:
-            # Existing user - recommendations are just movie IDs
-            movie_ids = recommendations
+            deadline=deadline,
+            profile_loader=lambda: _get_user_profile(session, current_user),
+            genres=[genre] if genre else None,
+            decade=decade,
+            rating_version=current_user.rating_version
+        )
+        variant = ml_service.bundle_for(current_user.id)[0]
+        response.headers["X-Recommendation-Tier"] = tier
+        response.headers["X-Recommendation-Variant"] = variant
+        response.headers["X-Recommendation-Cache"] = "miss"
         
         # Get movie details from database
-        movies = []
-        for mid in movie_ids:
-            movie = crud.movie.movie_crud.get(session, mid)
-            if movie:
-                movies.append(movie)
+        movies = crud.movie.movie_crud.get_many(session, movie_ids)
         
+        # Degraded pages are not cached: the next visit tries the full ranking again
+        if tier == "personalized":
+            ml_service.cache_page(current_user.id, current_user.rating_version, page_key,
+                                  (movie_ids, tier, variant), generation=generation)
         return movies
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -71,28 +125,12 @@ def get_global_recommendations(
         movie_ids = ml_service.get_popular_movies(n=n)
         
         # Get movie details from database
-        movies = []
-        for mid in movie_ids:
-            movie = crud.movie.movie_crud.get(session, mid)
-            if movie:
-                movies.append(movie)
+        movies = crud.movie.movie_crud.get_many(session, movie_ids)
         
         return movies
     except ValueError as e:
         # If model not loaded, return most rated movies from database
-        from sqlmodel import select, func
-        from app.models.rating import Rating
-        from app.models.movie import Movie
-        
-        statement = (
-            select(Movie)
-            .join(Rating, Movie.id == Rating.movie_id)
-            .group_by(Movie.id)
-            .order_by(func.count(Rating.id).desc())
-            .limit(n)
-        )
-        movies = session.exec(statement).all()
-        return movies
+        return crud.movie.movie_crud.most_rated(session, limit=n)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get global recommendations: {str(e)}")
 
@@ -105,18 +143,18 @@ def get_similar_movies(
 ):
     """
     Get similar movies based on a movie ID
+    (most rated movies while the models are still loading)
     """
+    if not ml_service.is_ready():
+        return [m for m in crud.movie.movie_crud.most_rated(session, limit=n + 1) if m["id"] != movie_id][:n]
+    
     try:
         # Get similar movie IDs from ML model
         similar_items = ml_service.recommend_similar_items(item_id=movie_id, n=n)
         
         # Get movie details from database
         movie_ids = [item_id for item_id, score in similar_items]
-        movies = []
-        for mid in movie_ids:
-            movie = crud.movie.movie_crud.get(session, mid)
-            if movie:
-                movies.append(movie)
+        movies = crud.movie.movie_crud.get_many(session, movie_ids)
         
         return movies
     except ValueError as e:
@@ -134,10 +172,14 @@ def predict_movie_rating(
     """
     Predict the rating a user would give to a movie
     """
+    if not ml_service.is_ready():
+        raise HTTPException(status_code=503, detail="Models are still loading, see /ready")
+    
     try:
         result = ml_service.predict_score(
             user_id=current_user.id,
-            item_id=movie_id
+            item_id=movie_id,
+            cached_profile=_get_user_profile(session, current_user)
         )
         
         if result is None:
@@ -154,6 +196,31 @@ def predict_movie_rating(
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
 
+@router.post("/predict")
+def predict_movie_ratings(
+    session: SessionDep,
+    movie_ids: List[int] = Body(...),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Predict the ratings the current user would give to a list of movies
+    in a single call (e.g. to annotate a movie grid)
+    """
+    if not ml_service.is_ready():
+        raise HTTPException(status_code=503, detail="Models are still loading, see /ready")
+    
+    try:
+        return ml_service.batch_predict_ratings(
+            user_id=current_user.id,
+            movie_ids=movie_ids,
+            cached_profile=_get_user_profile(session, current_user)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
+
+
 # ============================================================================
 # Admin/Testing Endpoints - For managing models
 # ============================================================================
@@ -178,7 +245,8 @@ def load_model(
         ml_service.load_model(model_type=model_type, model_name=model_name, version=version)
         return {
             "status": "success",
-            "message": f"Model loaded: {model_type} (version: {version})"
+            "message": f"Model loaded: {model_type} (version: {version})",
+            "bundle": ml_service.bundle.describe()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to load model: {str(e)}")
@@ -195,7 +263,59 @@ def load_all_models(
         results = ml_service.load_all_models()
         return {
             "status": "completed",
-            "results": results
+            "results": results,
+            "bundle": ml_service.bundle.describe()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to load models: {str(e)}")
+
+
+@router.get("/model-report", dependencies=[Depends(get_current_active_superuser)])
+def get_model_report():
+    """
+    Memory and cost of the loaded models: bytes, dtype and shape of every
+    array / DataFrame per model and HybridRecommender component, load
+    durations, versions, process RSS and per-request scoring cost
+    """
+    try:
+        return ml_service.get_model_report()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to build model report: {str(e)}")
+
+
+@router.get("/experiments", dependencies=[Depends(get_current_active_superuser)])
+def get_experiment():
+    """
+    Running A/B experiment, the model version of each variant and
+    per-variant request volume / latency counters
+    """
+    return ml_service.describe_experiment()
+
+
+@router.post("/experiments", dependencies=[Depends(get_current_active_superuser)])
+def start_experiment(
+    name: str = Body(...),
+    variants: Dict[str, Dict[str, Any]] = Body(...)
+):
+    """
+    Start an A/B experiment between SVD model versions (replaces the running one)
+    
+    Example variants: {"control": {"weight": 0.9}, "v7": {"version": "7", "weight": 0.1}}
+    (the weights are shares of the traffic and must sum to 1)
+    The control variant is served by the currently loaded models
+    """
+    try:
+        return ml_service.start_experiment(name=name, variants=variants)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to start experiment: {str(e)}")
+
+
+@router.delete("/experiments", dependencies=[Depends(get_current_active_superuser)])
+def stop_experiment():
+    """
+    Stop the running experiment (all users go back to the loaded models)
+    """
+    ml_service.stop_experiment()
+    return ml_service.describe_experiment()
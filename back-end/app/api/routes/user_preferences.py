@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 
 from app.models import UserPreferenceCreate, UserPreferenceRead
 from app.crud.user_preference import user_preference_crud
+from app.services.ml_model import ml_service
 from app.api.deps import CurrentUser, SessionDep
 
 router = APIRouter()
@@ -34,6 +35,7 @@ def create_or_update_preferences(
         user_id=current_user.id,
         genres=pref_in.preferred_genres
     )
+    ml_service.invalidate_user(current_user.id)
     return UserPreferenceRead(
         id=pref.id,
         preferred_genres=pref.preferred_genres.split("|") if pref.preferred_genres else [],
@@ -54,6 +56,7 @@ def update_preferences(
     )
     if not pref:
         raise HTTPException(status_code=404, detail="Preferences do not exist for this user")
+    ml_service.invalidate_user(current_user.id)
     return UserPreferenceRead(
         id=pref.id,
         preferred_genres=pref.preferred_genres.split("|") if pref.preferred_genres else [],
@@ -103,6 +103,51 @@ class Settings(BaseSettings):
     MLFLOW_TRACKING_URI: str
     MLFLOW_TRACKING_USERNAME: str  
     MLFLOW_TRACKING_PASSWORD: str 
+    
+    # Registry version lookups (startup and the model watcher) give up quickly,
+    # so an unreachable registry falls back to the local artifact cache instead
+    # of waiting through MLflow's default timeout and retries
+    MLFLOW_REGISTRY_TIMEOUT_SECONDS: int = 5
+    MLFLOW_REGISTRY_MAX_RETRIES: int = 1
+    
+    # Latency budget (ms) per recommendation endpoint. Past the budget the
+    # request is served by a cheaper tier (cached, popular, static)
+    RECOMMENDATION_DEADLINES_MS: dict[str, int] = {"user": 300}
+    RECOMMENDATION_DEFAULT_DEADLINE_MS: int = 500
+    
+    # Final /recommendations/user pages cached per user (invalidated on
+    # ratings, preference changes and model swaps)
+    RECOMMENDATION_RESULT_CACHE_SIZE: int = 10000
+    RECOMMENDATION_RESULT_CACHE_TTL_SECONDS: int = 300
+    
+    # The /movies endpoints are served from an in-memory catalog snapshot. Every
+    # worker checks the catalog version in the DB this often and rebuilds its
+    # snapshot when it changed, else reloads the rating statistics (served
+    # statistics lag the ratings by up to this)
+    MOVIE_CATALOG_REFRESH_SECONDS: int = 30
+    
+    # Optional MovieLens tags (tags.dat or a CSV with movie_id, tag) added to the
+    # content features of the HybridRecommender. No tags file ships with the
+    # back-end, so tag features are off unless this points to one
+    MOVIE_TAGS_PATH: str | None = None
+    
+    # Hot-swap: seconds between checks for new model versions (0 disables the watcher).
+    # If MODEL_WATCH_DIR is set, it is polled instead of the MLflow registry
+    MODEL_POLL_INTERVAL_SECONDS: int = 300
+    MODEL_WATCH_DIR: str | None = None
+    
+    # Local model artifact cache (defaults to <BASE_DIR>/model_cache) and how
+    # many versions of each model it keeps for rollback / offline starts
+    MODEL_CACHE_DIR: str | None = None
+    MODEL_CACHE_KEEP_VERSIONS: int = 3
+    
+    # Share the SVD model and the HybridRecommender built on it (catalog,
+    # rating statistics, neighbour tables) between the worker processes of a
+    # host through memory-mapped files (defaults to /dev/shm/recsys-models):
+    # the first worker loads and builds them, the others attach. Off by
+    # default: the image runs a single uvicorn worker, enable it when running several
+    MODEL_SHARED_MEMORY: bool = False
+    MODEL_SHARED_DIR: str | None = None
 
     def _check_default_secret(self, var_name: str, value: str | None) -> None:
         if value == "changethis":
@@ -3,4 +3,7 @@ MOVIE_GENRES = [
     "Comedy", "Crime", "Documentary", "Drama", "Fantasy",
     "Film-Noir", "Horror", "Musical", "Mystery", "Romance",
     "Sci-Fi", "Thriller", "War", "Western"
-]
\ No newline at end of file
+]
+
+# Last-resort recommendations when neither the model nor any cache can serve
+FALLBACK_MOVIE_IDS = [64, 50, 127, 318, 12, 98, 174, 56, 100, 172]
\ No newline at end of file
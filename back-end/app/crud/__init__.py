@@ -3,4 +3,6 @@
 from . import user
 from . import movie
 from . import rating
-from . import user_preference
\ No newline at end of file
+from . import user_preference
+from . import user_top_n
+from . import movie_stats
\ No newline at end of file
@@ -1,29 +1,51 @@
 from typing import List, Optional
-from sqlmodel import Session, select, func
-from app.models.movie import Movie
-from app.models.rating import Rating
+from sqlmodel import Session, select, delete, update
+from app.models.movie import CatalogVersion, Movie, MovieGenre, MovieStats
 
 class MovieCRUD:
-    def _add_rating_stats(self, session: Session, movie: Movie) -> dict:
-        """Add rating statistics to a movie"""
-        stats = session.exec(
-            select(
-                func.avg(Rating.rating).label('average_rating'),
-                func.count(Rating.id).label('rating_count')
-            ).where(Rating.movie_id == movie.id)
-        ).first()
-        
-        return {
-            **movie.model_dump(),
-            'average_rating': float(stats[0]) if stats[0] is not None else None,
-            'rating_count': stats[1] if stats[1] is not None else 0
+    def get_many(self, session: Session, movie_ids: List[int]) -> List[dict]:
+        """
+        Movies with their rating statistics in one query (IN over the ids,
+        joined to movie_stats), in the order of `movie_ids`.
+        Unknown ids are skipped.
+        """
+        movie_ids = [int(mid) for mid in movie_ids]
+        if not movie_ids:
+            return []
+        statement = (
+            select(Movie, MovieStats.average_rating, MovieStats.rating_count)
+            .outerjoin(MovieStats, MovieStats.movie_id == Movie.id)
+            .where(Movie.id.in_(movie_ids))
+        )
+        by_id = {
+            movie.id: {
+                **movie.model_dump(),
+                'average_rating': average,
+                'rating_count': count if count is not None else 0
+            }
+            for movie, average, count in session.exec(statement).all()
         }
+        return [by_id[mid] for mid in movie_ids if mid in by_id]
+
+    def list_all(self, session: Session) -> List[dict]:
+        """Every movie with its rating statistics, in one query (catalog snapshot)"""
+        statement = (
+            select(Movie, MovieStats.average_rating, MovieStats.rating_count)
+            .outerjoin(MovieStats, MovieStats.movie_id == Movie.id)
+            .order_by(Movie.id)
+        )
+        return [
+            {
+                **movie.model_dump(),
+                'average_rating': average,
+                'rating_count': count if count is not None else 0
+            }
+            for movie, average, count in session.exec(statement).all()
+        ]
 
     def get(self, session: Session, movie_id: int) -> Optional[dict]:
-        movie = session.get(Movie, movie_id)
-        if not movie:
-            return None
-        return self._add_rating_stats(session, movie)
+        movies = self.get_many(session, [movie_id])
+        return movies[0] if movies else None
 
     def list(
         self,
@@ -33,38 +55,83 @@ class MovieCRUD:
         genre: Optional[str] = None,
         q: Optional[str] = None
     ) -> List[dict]:
-        statement = select(Movie)
+        statement = select(Movie.id)
 
         if genre:
-            statement = statement.where(Movie.genres.contains(genre))
+            # Indexed join on movie_genre instead of a LIKE scan of the pipe strings
+            statement = statement.join(MovieGenre, MovieGenre.movie_id == Movie.id).where(MovieGenre.genre == genre)
 
         if q:
             statement = statement.where(Movie.title.ilike(f"%{q}%"))
 
-        statement = statement.limit(limit).offset(offset)
-        movies = session.exec(statement).all()
-        
-        return [self._add_rating_stats(session, movie) for movie in movies]
+        statement = statement.order_by(Movie.id).limit(limit).offset(offset)
+        return self.get_many(session, session.exec(statement).all())
 
     def search(
         self, session: Session, query: str, limit: int = 50
     ) -> List[dict]:
         statement = (
-            select(Movie)
+            select(Movie.id)
             .where(Movie.title.ilike(f"%{query}%"))
             .limit(limit)
         )
-        movies = session.exec(statement).all()
-        
-        return [self._add_rating_stats(session, movie) for movie in movies]
+        return self.get_many(session, session.exec(statement).all())
+
+    def most_rated(self, session: Session, limit: int = 10) -> List[dict]:
+        """Most rated movies with their rating statistics (indexed movie_stats.rating_count)"""
+        statement = (
+            select(Movie, MovieStats.average_rating, MovieStats.rating_count)
+            .join(MovieStats, Movie.id == MovieStats.movie_id)
+            .where(MovieStats.rating_count > 0)
+            .order_by(MovieStats.rating_count.desc())
+            .limit(limit)
+        )
+        return [
+            {
+                **movie.model_dump(),
+                'average_rating': average,
+                'rating_count': count
+            }
+            for movie, average, count in session.exec(statement).all()
+        ]
+
+    def rating_distribution(self, session: Session, movie_id: int) -> Optional[dict]:
+        """Rating histogram of a movie (None if the movie does not exist)"""
+        if session.get(Movie, movie_id) is None:
+            return None
+        stats = session.get(MovieStats, movie_id) or MovieStats(movie_id=movie_id)
+        return {
+            'movie_id': movie_id,
+            'average_rating': stats.average_rating,
+            'rating_count': stats.rating_count,
+            'histogram': stats.histogram
+        }
 
     def list_genres(self, session: Session) -> List[str]:
-        rows = session.exec(select(Movie.genres)).all()
-        unique = set()
-        for g in rows:
-            for tag in g.split("|"):
-                unique.add(tag)
-        return sorted(list(unique))
+        """Distinct genres (read from the movie_genre.genre index)"""
+        statement = select(MovieGenre.genre).distinct().order_by(MovieGenre.genre)
+        return list(session.exec(statement).all())
+
+    def set_genres(self, session: Session, movie: Movie) -> None:
+        """Rewrites the movie_genre rows of a movie from its pipe-separated genres"""
+        session.exec(delete(MovieGenre).where(MovieGenre.movie_id == movie.id))
+        for genre in sorted({g for g in movie.genres.split("|") if g}):
+            session.add(MovieGenre(movie_id=movie.id, genre=genre))
+
+    def catalog_version(self, session: Session) -> int:
+        """Current catalog version (0 until the catalog is first bumped)"""
+        row = session.get(CatalogVersion, 1)
+        return row.version if row is not None else 0
+
+    def bump_catalog_version(self, session: Session) -> None:
+        """
+        Marks the catalog as changed in the current transaction, so every
+        worker rebuilds its catalog snapshot once it is committed
+        """
+        table = CatalogVersion.__table__
+        result = session.execute(update(table).where(table.c.id == 1).values(version=table.c.version + 1))
+        if result.rowcount == 0:
+            session.add(CatalogVersion(id=1, version=1))
 
 
 movie_crud = MovieCRUD()
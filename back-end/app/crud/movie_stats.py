@@ -0,0 +1,99 @@
+""" Movie rating statistics maintained on every rating write """
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import Float, case, cast, delete
+from sqlmodel import Session, select, func
+
+from app.models.movie import MovieStats, RATING_VALUES
+from app.models.rating import Rating
+
+
+def _insert(session: Session):
+    """INSERT construct of the session's dialect (both support ON CONFLICT DO UPDATE)"""
+    if session.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert
+
+
+def apply_rating_change(
+    *,
+    session: Session,
+    movie_id: int,
+    old_rating: Optional[int] = None,
+    new_rating: Optional[int] = None
+) -> None:
+    """
+    Updates the movie's statistics in the current transaction for a new
+    rating (old_rating=None) or a changed one (old_rating -> new_rating).
+    Done as a single upsert so concurrent writes never lose an update.
+    """
+    count_delta = (new_rating is not None) - (old_rating is not None)
+    sum_delta = (new_rating or 0) - (old_rating or 0)
+    histogram_delta = {value: 0 for value in RATING_VALUES}
+    if old_rating is not None:
+        histogram_delta[old_rating] -= 1
+    if new_rating is not None:
+        histogram_delta[new_rating] += 1
+
+    table = MovieStats.__table__
+    statement = _insert(session)(table).values(
+        movie_id=movie_id,
+        rating_count=count_delta,
+        rating_sum=sum_delta,
+        average_rating=float(sum_delta) / count_delta if count_delta > 0 else None,
+        **{f"count_{value}": delta for value, delta in histogram_delta.items()}
+    )
+    # SET expressions all read the row as it was before this update
+    new_count = table.c.rating_count + count_delta
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.movie_id],
+        set_={
+            "rating_count": new_count,
+            "rating_sum": table.c.rating_sum + sum_delta,
+            "average_rating": case(
+                (new_count > 0, cast(table.c.rating_sum + sum_delta, Float) / new_count),
+                else_=None
+            ),
+            **{
+                f"count_{value}": table.c[f"count_{value}"] + delta
+                for value, delta in histogram_delta.items() if delta != 0
+            }
+        }
+    )
+    session.execute(statement)
+
+
+def get_movie_stats(*, session: Session, movie_id: int) -> Optional[MovieStats]:
+    return session.get(MovieStats, movie_id)
+
+
+def get_rating_summaries(*, session: Session) -> Dict[int, Tuple[Optional[float], int]]:
+    """(average_rating, rating_count) of every movie with ratings, in one query"""
+    statement = select(MovieStats.movie_id, MovieStats.average_rating, MovieStats.rating_count)
+    return {movie_id: (average, count) for movie_id, average, count in session.exec(statement).all()}
+
+
+def rebuild_movie_stats(*, session: Session) -> int:
+    """
+    Recomputes every row from the rating table (backfill, or after ratings
+    were bulk-loaded bypassing RatingCRUD). Returns the number of movies.
+    """
+    statement = (
+        select(Rating.movie_id, Rating.rating, func.count(Rating.id))
+        .group_by(Rating.movie_id, Rating.rating)
+    )
+    stats = {}
+    for movie_id, value, count in session.exec(statement).all():
+        row = stats.setdefault(movie_id, MovieStats(movie_id=movie_id))
+        row.rating_count += count
+        row.rating_sum += value * count
+        setattr(row, f"count_{value}", count)
+    for row in stats.values():
+        row.average_rating = row.rating_sum / row.rating_count
+
+    session.exec(delete(MovieStats))
+    session.add_all(stats.values())
+    session.commit()
+    return len(stats)
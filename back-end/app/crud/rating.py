@@ -1,6 +1,8 @@
 from typing import Optional, List
 from sqlmodel import Session, select
 from app.models.rating import Rating
+from app.crud.user import bump_rating_version
+from app.crud.movie_stats import apply_rating_change
 
 
 class RatingCRUD:
@@ -19,6 +21,8 @@ class RatingCRUD:
             timestamp=timestamp
         )
         session.add(rating)
+        bump_rating_version(session=session, user_id=user_id)
+        apply_rating_change(session=session, movie_id=movie_id, new_rating=rating_value)
         session.commit()
         session.refresh(rating)
         return rating
@@ -30,10 +34,19 @@ class RatingCRUD:
         new_rating_value: int,
         new_timestamp: Optional[int] = None
     ) -> Rating:
+        old_rating_value = rating.rating
         rating.rating = new_rating_value
         if new_timestamp is not None:
             rating.timestamp = new_timestamp
         session.add(rating)
+        bump_rating_version(session=session, user_id=rating.user_id)
+        if new_rating_value != old_rating_value:
+            apply_rating_change(
+                session=session,
+                movie_id=rating.movie_id,
+                old_rating=old_rating_value,
+                new_rating=new_rating_value
+            )
         session.commit()
         session.refresh(rating)
         return rating
@@ -1,7 +1,7 @@
 """ User related CRUD methods """
 from typing import Any
 
-from sqlmodel import Session, select, func
+from sqlmodel import Session, select, func, update
 
 from app.core.security import get_password_hash, verify_password
 from app.models import (
@@ -76,6 +76,19 @@ def update_user(*, session: Session, db_user: User, user_in: UserUpdate) -> Any:
     return db_user
 
 
+def bump_rating_version(*, session: Session, user_id: int) -> None:
+    """
+    Increments the user's rating version in the current transaction.
+    Done as a single UPDATE so concurrent writes never lose an increment.
+    """
+    statement = (
+        update(User)
+        .where(User.id == user_id)
+        .values(rating_version=User.rating_version + 1)
+    )
+    session.exec(statement)
+
+
 def get_user_by_email(*, session: Session, email: str) -> User | None:
     statement = select(User).where(User.email == email)
     session_user = session.exec(statement).first()
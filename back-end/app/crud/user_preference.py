@@ -4,6 +4,7 @@ from fastapi import HTTPException
 
 from app.models import UserPreference
 from app.core.constants import MOVIE_GENRES
+from app.crud.user import bump_rating_version
 
 
 class UserPreferenceCRUD:
@@ -31,6 +32,7 @@ class UserPreferenceCRUD:
         if existing:
             existing.preferred_genres = genres_str
             session.add(existing)
+            bump_rating_version(session=session, user_id=user_id)
             session.commit()
             session.refresh(existing)
             return existing
@@ -40,6 +42,7 @@ class UserPreferenceCRUD:
             preferred_genres=genres_str
         )
         session.add(pref)
+        bump_rating_version(session=session, user_id=user_id)
         session.commit()
         session.refresh(pref)
         return pref
@@ -55,6 +58,7 @@ class UserPreferenceCRUD:
 
         existing.preferred_genres = "|".join(genres)
         session.add(existing)
+        bump_rating_version(session=session, user_id=user_id)
         session.commit()
         session.refresh(existing)
         return existing
@@ -0,0 +1,33 @@
+from typing import Optional, Tuple
+
+import numpy as np
+from sqlmodel import Session
+
+from app.models.recommendation import UserTopN
+
+
+class UserTopNCRUD:
+    def get(self, session: Session, user_id: int) -> Optional[UserTopN]:
+        return session.get(UserTopN, user_id)
+
+    def get_for_model(
+        self,
+        session: Session,
+        user_id: int,
+        model_version: Optional[str]
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Precomputed (movie_ids, scores) of a user, best first, or None if
+        there is no list scored by this model version
+        """
+        if model_version is None:
+            return None
+        row = self.get(session, user_id)
+        if row is None or row.model_version != model_version:
+            return None
+        movie_ids = np.frombuffer(row.movie_ids, dtype="<i4").astype(np.int64)
+        scores = np.frombuffer(row.scores, dtype="<f4").astype(np.float32)
+        return movie_ids, scores
+
+
+user_top_n_crud = UserTopNCRUD()
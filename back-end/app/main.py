@@ -7,6 +7,7 @@ import logging
 from app.api.main import api_router
 from app.core.config import settings
 from app.services.ml_model import ml_service
+from app.services.model_watcher import ModelWatcher
 from app.core.logging_config import setup_logging
 
 setup_logging()
@@ -41,28 +42,29 @@ if settings.all_cors_origins:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Recommendation-Tier", "X-Recommendation-Variant", "X-Recommendation-Cache"],
     )
 
 app.include_router(api_router)
 
+model_watcher = ModelWatcher(
+    ml_service,
+    interval_seconds=settings.MODEL_POLL_INTERVAL_SECONDS,
+    watch_dir=settings.MODEL_WATCH_DIR
+)
+
 
 @app.on_event("startup")
 async def startup_event():
-    """Load ML models on startup"""
-    try:
-        logger.info("Loading ML models from MLflow...")
-        results = ml_service.load_all_models()
-        
-        # Log results
-        success_count = sum(1 for r in results.values() if r == "success")
-        logger.info(f"ML models loaded: {success_count}/{len(results)} successful")
-        
-        for model_type, result in results.items():
-            if result == "success":
-                logger.info(f"  v {model_type}: loaded")
-            else:
-                logger.warning(f"  x {model_type}: {result}")
-                
-    except Exception as e:
-        logger.warning(f"Error during model loading: {e}")
-        logger.warning("Models can be loaded later via /recommendations/load-model or /recommendations/load-all-models endpoints")
+    """Start loading ML models in the background (the app serves immediately, see /ready)"""
+    ml_service.start_background_loading()
+    
+    # New model versions are picked up in the background from now on
+    if settings.MODEL_POLL_INTERVAL_SECONDS > 0:
+        model_watcher.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    model_watcher.stop()
+    ml_service.release_shared_arrays()
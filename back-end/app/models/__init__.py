@@ -4,4 +4,5 @@ from .base import SQLModel
 from .user import *
 from .movie import *
 from .rating import *
-from .preferences import *
\ No newline at end of file
+from .preferences import *
+from .recommendation import *
\ No newline at end of file
@@ -1,6 +1,9 @@
 from sqlmodel import Field
 from .base import SQLModel
-from typing import Optional
+from typing import Dict, Optional
+
+# Star values of the rating histogram (count_1 ... count_5 columns of MovieStats)
+RATING_VALUES = (1, 2, 3, 4, 5)
 
 class Movie(SQLModel, table=True):
     id: int = Field(primary_key=True)
@@ -9,10 +12,66 @@ class Movie(SQLModel, table=True):
     release_year: Optional[int] = None
 
 
+class MovieGenre(SQLModel, table=True):
+    """
+    One row per (movie, genre): normalized form of Movie.genres used for
+    indexed genre filtering. Written by MovieCRUD.set_genres.
+    """
+    __tablename__ = "movie_genre"
+
+    movie_id: int = Field(primary_key=True, foreign_key="movie.id")
+    genre: str = Field(primary_key=True, index=True)
+
+
+class MovieStats(SQLModel, table=True):
+    """
+    Rating aggregates of a movie, updated by RatingCRUD in the same
+    transaction as every rating write (see crud/movie_stats.py), so reads
+    never scan the rating table.
+    """
+    __tablename__ = "movie_stats"
+
+    movie_id: int = Field(primary_key=True, foreign_key="movie.id")
+    rating_count: int = Field(default=0, index=True)
+    rating_sum: int = 0
+    average_rating: Optional[float] = None
+    # Histogram: number of 1..5 star ratings
+    count_1: int = 0
+    count_2: int = 0
+    count_3: int = 0
+    count_4: int = 0
+    count_5: int = 0
+
+    @property
+    def histogram(self) -> Dict[int, int]:
+        return {value: getattr(self, f"count_{value}") for value in RATING_VALUES}
+
+
+class CatalogVersion(SQLModel, table=True):
+    """
+    Single row counting changes to the movie table. Bumped in the same
+    transaction as the catalog writes (scripts/load_movies.py) or by the
+    catalog refresh route; every worker rebuilds its in-memory catalog
+    snapshot when it sees a new value.
+    """
+    __tablename__ = "catalog_version"
+
+    id: int = Field(default=1, primary_key=True)
+    version: int = 0
+
+
 class MovieRead(SQLModel):
     id: int
     title: str
     genres: str
     release_year: Optional[int]
     average_rating: Optional[float] = None
-    rating_count: Optional[int] = None
\ No newline at end of file
+    rating_count: Optional[int] = None
+
+
+class MovieRatingDistribution(SQLModel):
+    movie_id: int
+    average_rating: Optional[float] = None
+    rating_count: int = 0
+    # Star value -> number of ratings
+    histogram: Dict[int, int]
@@ -0,0 +1,26 @@
+from datetime import datetime
+from sqlalchemy import Column, LargeBinary
+from sqlmodel import Field
+from .base import SQLModel
+
+
+class UserTopN(SQLModel, table=True):
+    """
+    Offline top-N of a trained user, written by the retraining service after
+    each retrain (see retraining-service/precompute_top_n.py).
+
+    The list only excludes the movies the user had rated when it was computed:
+    the back end still removes newer ratings and re-ranks it online.
+    """
+    __tablename__ = "user_top_n"
+
+    # No foreign key: MovieLens users of the training set have no account
+    user_id: int = Field(primary_key=True)
+    # Registry version of the SVD model that scored the list
+    model_version: str = Field(index=True)
+    # User rating version the list was computed at (newer activity -> recomputed)
+    rating_version: int = Field(default=0)
+    # Little-endian int32 movie ids / float32 predicted ratings, best first
+    movie_ids: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    scores: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    computed_at: datetime = Field(default_factory=datetime.utcnow)
@@ -20,6 +20,8 @@ class UserBase(SQLModel):
 class User(UserBase, table=True):
     id: int | None = Field(default=None, primary_key=True)
     hashed_password: str
+    # Incremented on every rating / preference write (invalidates cached profiles)
+    rating_version: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
 
 
 # Properties to receive via API on creation
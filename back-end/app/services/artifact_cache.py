@@ -0,0 +1,175 @@
+"""
+Local on-disk cache of MLflow model artifacts
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock applies
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class ModelArtifactCache:
+    """
+    Content-addressed cache of downloaded model artifacts.
+
+    Layout:
+        <cache_dir>/objects/<sha256>/          artifact directory (a saved MLflow model)
+        <cache_dir>/refs/<model_name>/<version>.json   {"sha256": ..., "cached_at": ...}
+
+    A registry (name, version) pair points to an object by the hash of its
+    content, so identical artifacts published under several versions are
+    stored once. The last `keep_versions` versions of every model are kept
+    for instant rollback and offline starts; older refs and objects no
+    longer referenced are pruned.
+
+    Publishing an object, writing its ref and pruning run under one lock
+    (a thread lock plus an flock on <cache_dir>/.lock shared by the worker
+    processes), so a prune never sees a published object before its ref.
+    """
+
+    def __init__(self, cache_dir: str, keep_versions: int = 3):
+        self.cache_dir = cache_dir
+        self.keep_versions = keep_versions
+        self.objects_dir = os.path.join(cache_dir, "objects")
+        self.refs_dir = os.path.join(cache_dir, "refs")
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        """Serializes publish/prune across threads and processes sharing the cache"""
+        with self._lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self.cache_dir, ".lock"), "w") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _ref_path(self, model_name: str, version: str) -> str:
+        return os.path.join(self.refs_dir, model_name, f"{version}.json")
+
+    def _read_ref(self, ref_path: str) -> Optional[dict]:
+        try:
+            with open(ref_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def get(self, model_name: str, version: str) -> Optional[str]:
+        """Path of the cached artifact of (model_name, version), or None on a miss"""
+        ref = self._read_ref(self._ref_path(model_name, version))
+        if ref is None:
+            return None
+        path = os.path.join(self.objects_dir, ref["sha256"])
+        return path if os.path.isdir(path) else None
+
+    def versions(self, model_name: str) -> List[Tuple[str, float]]:
+        """Cached versions of a model as (version, cached_at), newest first"""
+        model_refs = os.path.join(self.refs_dir, model_name)
+        if not os.path.isdir(model_refs):
+            return []
+        versions = []
+        for file_name in os.listdir(model_refs):
+            if not file_name.endswith(".json"):
+                continue
+            ref = self._read_ref(os.path.join(model_refs, file_name))
+            if ref is not None:
+                versions.append((file_name[:-len(".json")], ref.get("cached_at", 0.0)))
+        return sorted(versions, key=lambda v: v[1], reverse=True)
+
+    def latest(self, model_name: str) -> Optional[Tuple[str, str]]:
+        """(version, path) of the most recently cached version, e.g. for offline starts"""
+        for version, _ in self.versions(model_name):
+            path = self.get(model_name, version)
+            if path is not None:
+                return version, path
+        return None
+
+    def fetch(self, model_name: str, version: str, model_uri: str) -> str:
+        """
+        Returns the local path of (model_name, version), downloading it from
+        model_uri on a cache miss.
+        """
+        path = self.get(model_name, version)
+        if path is not None:
+            logger.info(f"Model artifact cache hit: {model_name} v{version}")
+            return path
+
+        import mlflow.artifacts  # Deferred: mlflow is slow to import
+
+        logger.info(f"Model artifact cache miss: downloading {model_uri}")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix="download-", dir=self.cache_dir)
+        try:
+            downloaded = mlflow.artifacts.download_artifacts(artifact_uri=model_uri, dst_path=staging)
+            digest = self._hash_directory(downloaded)
+            path = os.path.join(self.objects_dir, digest)
+            with self._locked():
+                if not os.path.isdir(path):
+                    # Rename inside the same filesystem: readers never see a partial object
+                    os.replace(downloaded, path)
+                self._write_ref(model_name, version, digest)
+                self._prune(model_name)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        return path
+
+    def _write_ref(self, model_name: str, version: str, digest: str):
+        ref_path = self._ref_path(model_name, version)
+        os.makedirs(os.path.dirname(ref_path), exist_ok=True)
+        tmp_path = f"{ref_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"sha256": digest, "cached_at": time.time()}, f)
+        os.replace(tmp_path, ref_path)
+
+    @staticmethod
+    def _hash_directory(path: str) -> str:
+        """sha256 over the relative paths and contents of every file"""
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for file_name in sorted(files):
+                file_path = os.path.join(root, file_name)
+                digest.update(os.path.relpath(file_path, path).encode())
+                with open(file_path, "rb") as f:
+                    for chunk in iter(lambda: f.read(1 << 20), b""):
+                        digest.update(chunk)
+        return digest.hexdigest()
+
+    def prune(self, model_name: str):
+        """Keeps the newest keep_versions refs of a model and drops unreferenced objects"""
+        with self._locked():
+            self._prune(model_name)
+
+    def _prune(self, model_name: str):
+        for version, _ in self.versions(model_name)[self.keep_versions:]:
+            os.remove(self._ref_path(model_name, version))
+            logger.info(f"Model artifact cache: pruned {model_name} v{version}")
+
+        referenced = set()
+        if os.path.isdir(self.refs_dir):
+            for name in os.listdir(self.refs_dir):
+                for version, _ in self.versions(name):
+                    ref = self._read_ref(self._ref_path(name, version))
+                    if ref is not None:
+                        referenced.add(ref["sha256"])
+
+        for digest in os.listdir(self.objects_dir):
+            if digest not in referenced:
+                shutil.rmtree(os.path.join(self.objects_dir, digest), ignore_errors=True)
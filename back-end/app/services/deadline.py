@@ -0,0 +1,38 @@
+"""
+Per-request latency budget for the recommendation endpoints
+"""
+import time
+
+
+class DeadlineExceeded(Exception):
+    """Raised by Deadline.check when the request ran out of time."""
+    pass
+
+
+class Deadline:
+    """
+    Time budget of a single request. Stages call check() before doing
+    expensive work, so an exhausted budget switches the request to a cheaper
+    fallback instead of making it slower.
+    """
+
+    def __init__(self, budget_ms: float):
+        self.budget_ms = budget_ms
+        self._start = time.perf_counter()
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000
+
+    def remaining_ms(self) -> float:
+        return self.budget_ms - self.elapsed_ms()
+
+    def expired(self) -> bool:
+        return self.remaining_ms() <= 0
+
+    def check(self, stage: str):
+        """Raises DeadlineExceeded if the budget is exhausted before `stage`."""
+        if self.expired():
+            raise DeadlineExceeded(
+                f"Latency budget of {self.budget_ms:.0f}ms exhausted before '{stage}' "
+                f"({self.elapsed_ms():.1f}ms elapsed)"
+            )
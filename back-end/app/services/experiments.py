@@ -0,0 +1,101 @@
+"""
+A/B experiments: deterministic user bucketing and per-variant counters
+"""
+import hashlib
+import math
+import threading
+from collections import deque
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+# Variant served by the main model bundle
+CONTROL_VARIANT = "control"
+
+
+class Experiment:
+    """
+    Splits users between model variants by weight.
+
+    A user's bucket is a hash of (experiment name, user id), so assignments
+    are stable across requests, workers and restarts, and independent
+    between experiments with different names.
+    """
+
+    def __init__(self, name: str, weights: Dict[str, float]):
+        """
+        Args:
+            name: Experiment name (salts the hash)
+            weights: Dict variant -> share of the traffic (the shares sum to 1)
+        """
+        if not weights:
+            raise ValueError("An experiment needs at least one variant")
+        invalid = [variant for variant, weight in weights.items() if weight <= 0]
+        if invalid:
+            raise ValueError(f"Variant weights must be positive: {invalid}")
+        if not math.isclose(sum(weights.values()), 1.0, abs_tol=1e-6):
+            raise ValueError(f"Variant weights must sum to 1, got {sum(weights.values())}")
+
+        self.name = name
+        self.weights = dict(weights)
+        self.variants = list(self.weights)
+        total = float(sum(self.weights.values()))
+        self._thresholds = np.cumsum([self.weights[v] / total for v in self.variants])
+
+    def assign(self, user_id: int) -> str:
+        """Variant of a user (deterministic)"""
+        digest = hashlib.sha256(f"{self.name}:{user_id}".encode()).digest()
+        point = int.from_bytes(digest[:8], "big") / 2 ** 64
+        index = int(np.searchsorted(self._thresholds, point, side="right"))
+        return self.variants[min(index, len(self.variants) - 1)]
+
+    def describe(self) -> Dict[str, Any]:
+        return {"name": self.name, "weights": dict(self.weights)}
+
+
+class VariantStats:
+    """
+    Request volume and latency per (variant, endpoint). Latency percentiles
+    are computed over the last `window` requests of each pair.
+    """
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._counters: Dict[tuple, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, variant: str, endpoint: str, latency_ms: float,
+               tier: Optional[str] = None, error: bool = False):
+        with self._lock:
+            counter = self._counters.get((variant, endpoint))
+            if counter is None:
+                counter = self._counters[(variant, endpoint)] = {
+                    "requests": 0, "errors": 0, "latency_ms_total": 0.0,
+                    "tiers": {}, "recent": deque(maxlen=self.window),
+                }
+            counter["requests"] += 1
+            counter["errors"] += int(error)
+            counter["latency_ms_total"] += latency_ms
+            counter["recent"].append(latency_ms)
+            if tier is not None:
+                counter["tiers"][tier] = counter["tiers"].get(tier, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """{variant: {endpoint: counters}} with mean / p50 / p95 latency"""
+        with self._lock:
+            snapshot = {}
+            for (variant, endpoint), counter in self._counters.items():
+                recent = np.fromiter(counter["recent"], dtype=np.float64)
+                snapshot.setdefault(variant, {})[endpoint] = {
+                    "requests": counter["requests"],
+                    "errors": counter["errors"],
+                    "tiers": dict(counter["tiers"]),
+                    "latency_ms_mean": round(counter["latency_ms_total"] / counter["requests"], 3),
+                    "latency_ms_p50": round(float(np.percentile(recent, 50)), 3),
+                    "latency_ms_p95": round(float(np.percentile(recent, 95)), 3),
+                }
+            return snapshot
@@ -1,23 +1,89 @@
 """
 Service for loading and using ML models from MLflow with Hybrid Recommendations
 """
+import hashlib
 import os
-import mlflow
-import mlflow.sklearn
-from typing import Optional, Any, Dict, List, Tuple
+import time
+import itertools
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Optional, Any, Callable, Dict, List, Tuple
+from cachetools import LRUCache
 from app.core.config import settings
-from app.services.recommenders.HybridRecommender import HybridRecommender
+from app.core.constants import FALLBACK_MOVIE_IDS
+from app.services.artifact_cache import ModelArtifactCache
+from app.services.deadline import Deadline, DeadlineExceeded
+from app.services.experiments import CONTROL_VARIANT, Experiment, VariantStats
+from app.services.model_bundle import ModelBundle
+from app.services import model_report
+from app.services.shared_arrays import SharedArrayStore, share_object
+from app.services.recommenders.profile_cache import CachedUserProfile, UserProfileCache
+from app.services.result_cache import UserResultCache
+
+# mlflow, pandas, scipy and scikit-learn take seconds to import: they are
+# imported on first use (model loading runs in the background, see
+# start_background_loading) so workers start serving auth/catalog routes at once
+if TYPE_CHECKING:
+    from app.services.recommenders.HybridRecommender import HybridRecommender
+    from app.services.recommenders.item_neighbours import ItemSimilarityIndex
 import logging
 
 logger = logging.getLogger(__name__)
 
+# MLflow reads its HTTP timeout and retries from the environment on every
+# request: registry lookups override them one at a time under this lock
+_registry_request_lock = threading.Lock()
+
+
+@contextmanager
+def _registry_request_limits():
+    """Short MLflow HTTP timeout and retries for the requests made in the block"""
+    limits = {
+        "MLFLOW_HTTP_REQUEST_TIMEOUT": str(settings.MLFLOW_REGISTRY_TIMEOUT_SECONDS),
+        "MLFLOW_HTTP_REQUEST_MAX_RETRIES": str(settings.MLFLOW_REGISTRY_MAX_RETRIES),
+    }
+    with _registry_request_lock:
+        previous = {name: os.environ.get(name) for name in limits}
+        os.environ.update(limits)
+        try:
+            yield
+        finally:
+            for name, value in previous.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+
 
 class MLModelService:
     """Service to manage MLflow models with Hybrid Recommendation System"""
     
     def __init__(self):
-        self.models: Dict[str, Any] = {}  # Dictionary to store multiple models
-        self.hybrid_recommender: HybridRecommender
+        # Models currently served. Swapped atomically, never mutated (see ModelBundle)
+        self._bundle = ModelBundle()
+        self._swap_lock = threading.Lock()  # One loader at a time (startup, admin endpoint, watcher)
+        self._generations = itertools.count(1)  # Unique per bundle, variants included
+        # Active A/B experiment: (Experiment, {variant: ModelBundle}) or None.
+        # The control variant is always served by the main bundle
+        self._experiment = None
+        self.variant_stats = VariantStats()
+        # Per-model load state and timings, reported by /ready
+        self.load_state: Dict[str, Dict[str, Any]] = {}
+        self._load_state_lock = threading.Lock()
+        self._loading_thread: Optional[threading.Thread] = None
+        # Memory / cost report of the published bundle (see get_model_report)
+        self.model_report: Dict[str, Any] = {}
+        # Per-user profile vectors, keyed by the user's rating version
+        self.profile_cache = UserProfileCache(maxsize=10000)
+        # Last personalized page served per (user, rating version, filters), used as a degraded tier
+        self.recent_results = LRUCache(maxsize=10000)
+        # Final ranked pages per user, served without recomputing on repeat visits
+        self.result_cache = UserResultCache(
+            maxsize=settings.RECOMMENDATION_RESULT_CACHE_SIZE,
+            ttl_seconds=settings.RECOMMENDATION_RESULT_CACHE_TTL_SECONDS
+        )
+        self._recent_results_lock = threading.Lock()
         
         # Set MLflow tracking URI and credentials
         
@@ -32,6 +98,38 @@ class MLModelService:
         
         # Path to movies catalog (required for HybridRecommender)
         self.movies_catalog_path = os.path.join(settings.BASE_DIR, "app", "data", "movies.csv")
+        # Optional MovieLens tags used for richer content features (off unless configured)
+        self.tags_path = settings.MOVIE_TAGS_PATH
+        
+        # Downloaded artifacts, keyed by registry name + version
+        self.artifact_cache = ModelArtifactCache(
+            cache_dir=settings.MODEL_CACHE_DIR or os.path.join(settings.BASE_DIR, "model_cache"),
+            keep_versions=settings.MODEL_CACHE_KEEP_VERSIONS
+        )
+        
+        # Model matrices mapped once per host and shared by all workers
+        self.shared_arrays = None
+        if settings.MODEL_SHARED_MEMORY and SharedArrayStore.available():
+            default_dir = "/dev/shm/recsys-models" if os.path.isdir("/dev/shm") else os.path.join(settings.BASE_DIR, "model_shared")
+            self.shared_arrays = SharedArrayStore(settings.MODEL_SHARED_DIR or default_dir)
+    
+    @property
+    def bundle(self) -> ModelBundle:
+        """Current model bundle. Grab it once per request to use a consistent set of models"""
+        return self._bundle
+    
+    @property
+    def models(self):
+        return self._bundle.models
+    
+    @property
+    def hybrid_recommender(self) -> Optional["HybridRecommender"]:
+        return self._bundle.hybrid_recommender
+    
+    @property
+    def pipeline(self):
+        return self._bundle.pipeline
+    
     def init_credentials(self):
         """Initialize MLflow tracking credentials from settings"""
         self.username = settings.MLFLOW_TRACKING_USERNAME
@@ -41,23 +139,58 @@ class MLModelService:
         if self.username and self.password:
             os.environ["MLFLOW_TRACKING_USERNAME"] = self.username
             os.environ["MLFLOW_TRACKING_PASSWORD"] = self.password
-            mlflow.set_tracking_uri(settings.MLFLOW_TRACKING_URI)
+            # Read by mlflow when it is first imported (no need to import it here)
+            os.environ["MLFLOW_TRACKING_URI"] = settings.MLFLOW_TRACKING_URI
             logger.info(f"MLflow tracking credentials loaded. Username: {self.username}")
             
         else:
             logger.warning("MLflow tracking credentials are not set.")
             logger.warning("If MLflow requires authentication, model loading will fail.")
-            
-    def load_model(self, model_type: str, model_name: str = None, version: str = "production"):
+    
+    def latest_registry_version(self, model_name: str) -> Optional[str]:
+        """
+        Highest version of a registered model, or None if the registry
+        cannot be queried (within MLFLOW_REGISTRY_TIMEOUT_SECONDS per attempt)
+        """
+        from mlflow.tracking import MlflowClient
+        
+        try:
+            with _registry_request_limits():
+                versions = MlflowClient().search_model_versions(f"name='{model_name}'")
+        except Exception as e:
+            logger.warning(f"Could not query registry versions of {model_name}: {str(e)}")
+            return None
+        if not versions:
+            return None
+        return str(max(int(v.version) for v in versions))
+    
+    def resolve_model_uri(self, model_name: str, version: str = "production") -> Tuple[str, str]:
         """
-        Load a specific model from MLflow Model Registry
+        Resolves a version spec to a concrete registry URI
         
         Args:
-            model_type: Type of model - "svd_model" or "similar_items"
-            model_name: Name of the registered model (uses default if None)
-            version: Model version - "latest", version number, or stage name like "Production"
+            model_name: Name of the registered model
+            version: "production"/"latest", a version number, or a stage name
+            
+        Returns:
+            Tuple (model_uri, resolved_version)
+        """
+        if version in ("production", "latest"):
+            latest = self.latest_registry_version(model_name)
+            if latest is not None:
+                return f"models:/{model_name}/{latest}", latest
+            return f"models:/{model_name}/latest", "latest"
+        # Version number or stage (Production, Staging, etc.)
+        return f"models:/{model_name}/{version}", version
+    
+    def _fetch_model(self, model_type: str, model_name: str = None, version: str = "production"):
         """
-        print("user", self.username,"psw", self.password)
+        Downloads a model from the MLflow Model Registry (does not publish it)
+        
+        Returns:
+            Tuple (model, resolved_version)
+        """
+        logger.debug(f"Fetching {model_type} from MLflow as user {self.username}")
         if(self.username is None or self.password is None):
             logger.info("MLflow tracking credentials not initialized. Initializing now...")
             self.init_credentials()
@@ -73,67 +206,690 @@ class MLModelService:
                 raise ValueError(f"Invalid model_type: {model_type}")
         
         try:
-            # Construct model URI
-            if version == "production":
-                model_uri = f"models:/{model_name}/latest"
-            elif version.isdigit():
-                model_uri = f"models:/{model_name}/{version}"
-            else:
-                # Assume it's a stage (Production, Staging, etc.)
-                model_uri = f"models:/{model_name}/{version}"
+            model_uri, resolved_version = self.resolve_model_uri(model_name, version)
+            model_path, resolved_version = self._artifact_path(model_name, version, model_uri, resolved_version)
             
-            logger.info(f"Loading {model_type} model from: {model_uri}")
-            self.models[model_type] = mlflow.sklearn.load_model(model_uri)
-            logger.info(f"Model loaded successfully: {model_name} ({version}) as {model_type}")
-            
-            # If loading SVD model, initialize HybridRecommender
-            if model_type == "svd_model":
-                self._initialize_hybrid_recommender()
-            
-            return True
+            logger.info(f"Loading {model_type} model from: {model_path}")
+            model = self._load_model_path(model_type, model_path)
+            logger.info(f"Model loaded successfully: {model_name} ({resolved_version}) as {model_type}")
+            return model, resolved_version
             
         except Exception as e:
             logger.error(f"Error loading {model_type} model: {str(e)}")
             raise Exception(f"Failed to load {model_type} model: {str(e)}")
+            
+    def _artifact_path(self, model_name: str, requested_version: str,
+                       model_uri: str, resolved_version: str) -> Tuple[str, str]:
+        """
+        Where to load a model from:
+        
+        - concrete registry version -> local artifact cache (downloaded on a miss)
+        - registry unreachable ("latest" could not be resolved) -> newest cached
+          version, so the service can start offline
+        - anything else (stages, nothing cached) -> the registry URI itself
+        
+        Returns:
+            Tuple (path_or_uri, version)
+        """
+        if resolved_version.isdigit():
+            try:
+                return self.artifact_cache.fetch(model_name, resolved_version, model_uri), resolved_version
+            except Exception as e:
+                logger.warning(f"Could not cache {model_name} v{resolved_version}: {str(e)}")
+                return model_uri, resolved_version
+        
+        if requested_version in ("production", "latest"):
+            cached = self.artifact_cache.latest(model_name)
+            if cached is not None:
+                cached_version, path = cached
+                logger.warning(f"Registry unavailable - loading {model_name} from cached version {cached_version}")
+                return path, cached_version
+        
+        return model_uri, resolved_version
     
-    def _initialize_hybrid_recommender(self):
-        """Initialize HybridRecommender with loaded SVD model"""
-        svd_model = self.models.get("svd_model")
-        if svd_model is None:
-            logger.warning("Cannot initialize HybridRecommender: SVD model not loaded")
-            return
+    def load_artifact(self, model_name: str, version: str, model_uri: str):
+        """Loads a concrete registry version through the local artifact cache"""
+        model_type = next((t for t, name in self.model_names.items() if name == model_name), None)
+        model_path, _ = self._artifact_path(model_name, version, model_uri, version)
+        return self._load_model_path(model_type, model_path)
+    
+    def _load_model_path(self, model_type: Optional[str], model_path: str):
+        """
+        Loads a saved model. With shared memory enabled, an SVD model from the
+        artifact cache is looked up in the host's shared store by its artifact
+        digest before anything is loaded: only the first worker of the host
+        unpickles it, the others map its segment.
+        """
+        import mlflow.sklearn
+        
+        key = self._segment_key(model_type, model_path)
+        if key is not None:
+            try:
+                model, _ = share_object(self.shared_arrays, lambda: mlflow.sklearn.load_model(model_path), key=key)
+                # Handed over to the bundle by _share_model
+                model._shared_lease = key
+                logger.info(f"{model_type}: mapped from shared segment {key[:12]}")
+                return model
+            except Exception as e:
+                logger.warning(f"Could not share {model_type}, loading a private copy: {str(e)}")
+        return mlflow.sklearn.load_model(model_path)
+    
+    def _segment_key(self, model_type: Optional[str], model_path: str) -> Optional[str]:
+        """Shared segment key of an SVD model in the artifact cache (its content digest)"""
+        if self.shared_arrays is None or model_type != "svd_model":
+            return None
+        objects_dir = os.path.abspath(self.artifact_cache.objects_dir)
+        if os.path.dirname(os.path.abspath(model_path)) != objects_dir:
+            return None
+        return f"svd-{os.path.basename(model_path)}"
+    
+    def load_model(self, model_type: str, model_name: str = None, version: str = "production"):
+        """
+        Load a specific model from MLflow Model Registry and publish it
+        
+        Args:
+            model_type: Type of model - "svd_model" or "similar_items"
+            model_name: Name of the registered model (uses default if None)
+            version: Model version - "latest", version number, or stage name like "Production"
+        """
+        rss_before = model_report.process_rss_bytes()
+        model, resolved_version = self._fetch_model(model_type, model_name, version)
+        self.install_models({model_type: model}, {model_type: resolved_version}, rss_before=rss_before)
+        return True
+    
+    def load_model_from_uri(self, model_type: str, model_uri: str, version: str):
+        """
+        Load a model from any MLflow URI or local model directory and publish it
+        
+        Args:
+            model_type: Type of model - "svd_model" or "similar_items"
+            model_uri: MLflow model URI or path to a saved MLflow model
+            version: Version label recorded in the bundle
+        """
+        import mlflow.sklearn
+        
+        logger.info(f"Loading {model_type} model from: {model_uri}")
+        model = mlflow.sklearn.load_model(model_uri)
+        self.install_models({model_type: model}, {model_type: version})
+        return True
+    
+    def install_models(self, models: Dict[str, Any], versions: Optional[Dict[str, str]] = None,
+                       rss_before: Optional[int] = None) -> ModelBundle:
+        """
+        Publishes new models. A new bundle is built from the current one with
+        these models replaced (rebuilding the HybridRecommender if the SVD model
+        changed), warmed up, and only then swapped in with a single assignment.
+        Requests in flight finish on the previous bundle.
+        
+        Args:
+            models: Dict model_type -> loaded model
+            versions: Dict model_type -> version label
+            rss_before: Process RSS before the models were fetched (for the memory report)
+            
+        Returns:
+            The published ModelBundle
+        """
+        from app.services.recommenders.item_neighbours import ItemSimilarityIndex
+        
+        if rss_before is None:
+            rss_before = model_report.process_rss_bytes()
+        if "similar_items" in models and not isinstance(models["similar_items"], ItemSimilarityIndex):
+            # The similarity model is only needed for its item factors
+            models = dict(models)
+            models["similar_items"] = ItemSimilarityIndex.from_svd(models["similar_items"])
+        
+        with self._swap_lock:
+            current = self._bundle
+            
+            merged_models = dict(current.models)
+            merged_models.update(models)
+            merged_versions = dict(current.versions)
+            merged_versions.update(versions or {model_type: "unknown" for model_type in models})
+            
+            # The new bundle holds its own lease on every shared segment it uses
+            # (the recommender gets its own segment when it is rebuilt)
+            replaced = set(models) | ({"hybrid_recommender"} if "svd_model" in models else set())
+            shared_keys = {
+                model_type: key for model_type, key in current.shared_keys.items()
+                if model_type not in replaced
+            }
+            for key in shared_keys.values():
+                self.shared_arrays.acquire(key)
+            if "svd_model" in models:
+                merged_models["svd_model"], key = self._share_model("svd_model", models["svd_model"])
+                if key is not None:
+                    shared_keys["svd_model"] = key
+            
+            try:
+                hybrid_recommender, pipeline = current.hybrid_recommender, current.pipeline
+                if "svd_model" in models:
+                    self._set_load_state("hybrid_recommender", state="loading")
+                    start = time.perf_counter()
+                    hybrid_recommender, pipeline, key = self._build_hybrid_recommender(
+                        merged_models["svd_model"], shared_keys.get("svd_model")
+                    )
+                    if key is not None:
+                        shared_keys["hybrid_recommender"] = key
+                    self._set_load_state(
+                        "hybrid_recommender",
+                        state="loaded" if hybrid_recommender is not None else "failed",
+                        duration_ms=round((time.perf_counter() - start) * 1000, 1)
+                    )
+                
+                similar_items = self._link_similar_items(merged_models, hybrid_recommender)
+                
+                bundle = ModelBundle(
+                    models=merged_models,
+                    versions=merged_versions,
+                    hybrid_recommender=hybrid_recommender,
+                    pipeline=pipeline,
+                    similar_items=similar_items,
+                    generation=next(self._generations),
+                    shared_keys=shared_keys
+                )
+                self._warm_up(bundle)
+            except Exception:
+                self._release_shared_keys(shared_keys)
+                raise
+            self._bundle = bundle
+            # Requests in flight keep their mappings even if the files go away
+            self._release_shared_keys(current.shared_keys)
+        
+        # Cached vectors and pages were built against the previous model
+        self.profile_cache.clear()
+        self.result_cache.clear()
+        logger.info(f"Model bundle {bundle.generation} published: {dict(bundle.versions)}")
+        self._report_bundle(bundle, rss_before)
+        return bundle
+    
+    def _report_bundle(self, bundle: ModelBundle, rss_before: Optional[int]):
+        """Builds the memory / cost report of a newly published bundle and logs its summary"""
+        try:
+            with self._load_state_lock:
+                load_state = {name: dict(state) for name, state in self.load_state.items()}
+            
+            models = {}
+            for model_type, model in bundle.models.items():
+                if bundle.hybrid_recommender is not None and model is bundle.hybrid_recommender.item_similarity:
+                    # Deduplicated into the SVD model's index (counted under hybrid_recommender)
+                    models[model_type] = {
+                        "version": bundle.versions.get(model_type),
+                        "load_duration_ms": load_state.get(model_type, {}).get("duration_ms"),
+                        "total_bytes": 0,
+                        "shared_with": "hybrid_recommender.item_similarity",
+                    }
+                    continue
+                arrays = model_report.describe_components(model)
+                models[model_type] = {
+                    "version": bundle.versions.get(model_type),
+                    "load_duration_ms": load_state.get(model_type, {}).get("duration_ms"),
+                    "total_bytes": model_report.total_bytes(arrays),
+                    "arrays": arrays,
+                }
+            
+            hybrid = None
+            if bundle.hybrid_recommender is not None:
+                # The SVD model is reported under models
+                components = model_report.describe_components(bundle.hybrid_recommender, skip=("svd_model",))
+                hybrid = {
+                    "build_duration_ms": load_state.get("hybrid_recommender", {}).get("duration_ms"),
+                    "total_bytes": model_report.total_bytes(components),
+                    "components": components,
+                }
+            
+            report = {
+                "generation": bundle.generation,
+                "models": models,
+                "hybrid_recommender": hybrid,
+                "process": {
+                    "rss_before_load_bytes": rss_before,
+                    "rss_after_load_bytes": model_report.process_rss_bytes(),
+                },
+                "scoring_cost_ms": model_report.measure_scoring_cost(bundle),
+            }
+            self.model_report = report
+            
+            sizes = ", ".join(
+                f"{model_type} {model_report.format_bytes(entry['total_bytes'])}"
+                for model_type, entry in models.items()
+            )
+            if hybrid is not None:
+                sizes += f", hybrid_recommender {model_report.format_bytes(hybrid['total_bytes'])}"
+            logger.info(
+                f"Model memory (bundle {bundle.generation}): {sizes}; "
+                f"RSS {model_report.format_bytes(rss_before)} -> "
+                f"{model_report.format_bytes(report['process']['rss_after_load_bytes'])}; "
+                f"scoring cost (ms): {report['scoring_cost_ms']}"
+            )
+        except Exception as e:
+            logger.warning(f"Could not build the model memory report: {str(e)}")
+    
+    def get_model_report(self) -> Dict[str, Any]:
+        """Memory / cost report of the published bundle, with the current process RSS"""
+        report = dict(self.model_report)
+        report["process"] = dict(report.get("process", {}), rss_bytes=model_report.process_rss_bytes())
+        return report
+    
+    def _link_similar_items(self, models: Dict[str, Any], hybrid_recommender) -> Optional["ItemSimilarityIndex"]:
+        """
+        Picks the ItemSimilarityIndex serving similar-items requests.
+        
+        The SVD model's index is a view over the HybridRecommender's neighbour
+        table. A separately loaded similar_items model is used instead when
+        present, but if its factors have the same content hash as the SVD
+        model's, the entry is replaced by the SVD index so only one copy of
+        the factors and neighbour table is kept. (models is updated in place)
+        """
+        from app.services.recommenders.item_neighbours import ItemSimilarityIndex
+        
+        svd_index = None
+        if hybrid_recommender is not None:
+            svd_index = hybrid_recommender.item_similarity
+        elif models.get("svd_model") is not None:
+            svd_index = ItemSimilarityIndex.from_svd(models["svd_model"])
+        
+        index = models.get("similar_items")
+        if index is None:
+            return svd_index.build_neighbours() if svd_index is not None else None
+        if svd_index is not None and index.content_key == svd_index.content_key:
+            logger.info(f"similar_items shares the svd_model item factors ({index.content_key[:12]})")
+            models["similar_items"] = svd_index
+            return svd_index.build_neighbours()
+        return index.build_neighbours()
+    
+    def _share_model(self, model_type: str, model) -> Tuple[Any, Optional[str]]:
+        """
+        Moves the arrays of a model to the host-wide shared store (a model
+        loaded from the store hands over the lease it holds)
+        
+        Returns:
+            Tuple (model backed by the shared segment, segment key), or
+            (model, None) if the model keeps private copies
+        """
+        lease = model.__dict__.pop("_shared_lease", None)
+        if lease is not None or self.shared_arrays is None:
+            return model, lease
+        try:
+            shared_model, key = share_object(self.shared_arrays, lambda: model)
+            logger.info(f"{model_type}: mapped from shared segment {key[:12]}")
+            return shared_model, key
+        except Exception as e:
+            logger.warning(f"Could not share {model_type}, keeping a private copy: {str(e)}")
+            return model, None
+    
+    def _recommender_segment_key(self, svd_key: str) -> str:
+        """Shared segment key of the HybridRecommender built from an SVD segment and the catalog files"""
+        digest = hashlib.sha256(svd_key.encode())
+        for path in (self.movies_catalog_path, self.tags_path):
+            if path and os.path.exists(path):
+                with open(path, "rb") as f:
+                    digest.update(hashlib.sha256(f.read()).digest())
+            else:
+                digest.update(b"-")
+        return f"hybrid-{digest.hexdigest()}"
+    
+    def _release_shared_keys(self, shared_keys):
+        for key in shared_keys.values():
+            try:
+                self.shared_arrays.release(key)
+            except Exception as e:
+                logger.warning(f"Could not release shared segment {key[:12]}: {str(e)}")
+    
+    def release_shared_arrays(self):
+        """Drops this worker's leases on the shared model matrices (at shutdown)"""
+        with self._swap_lock:
+            self._release_shared_keys(self._bundle.shared_keys)
+            self._bundle = ModelBundle(generation=next(self._generations))
+            if self._experiment is not None:
+                for variant_bundle in self._experiment[1].values():
+                    self._release_shared_keys(variant_bundle.shared_keys)
+                self._experiment = None
+    
+    def _build_hybrid_recommender(self, svd_model, svd_key: Optional[str] = None, shared_catalog=None):
+        """
+        Builds the HybridRecommender and its pipeline for an SVD model
+        
+        With shared memory enabled and the SVD model in the shared store, the
+        recommender (catalog, rating statistics, index arrays and neighbour
+        tables) is looked up in the store first, by the SVD segment and the
+        catalog files, so only the first worker of the host builds it.
+        
+        Args:
+            svd_key: Shared segment of the SVD model, if any
+            shared_catalog: HybridRecommender whose catalog is reused when built in-process
+        
+        Returns:
+            Tuple (hybrid_recommender, pipeline, shared segment key or None),
+            (None, None, None) if it cannot be built
+        """
+        from app.services.recommenders.HybridRecommender import HybridRecommender
+        from app.services.recommenders.pipeline import build_default_pipeline
         
         try:
             if not os.path.exists(self.movies_catalog_path):
                 logger.warning(f"Movies catalog not found at {self.movies_catalog_path}")
                 logger.warning("HybridRecommender will not be available")
-                return
+                return None, None, None
+            if self.tags_path and not os.path.exists(self.tags_path):
+                logger.warning(f"Tags file not found at {self.tags_path}, content features use genres and decades only")
             
-            self.hybrid_recommender = HybridRecommender(
+            build = lambda: HybridRecommender(
                 svd_model=svd_model,
-                movies_catalog_path=self.movies_catalog_path
+                movies_catalog_path=self.movies_catalog_path,
+                tags_path=self.tags_path,
+                shared_catalog=shared_catalog
             )
+            hybrid_recommender, key = None, None
+            if self.shared_arrays is not None and svd_key is not None:
+                try:
+                    hybrid_recommender, key = share_object(
+                        self.shared_arrays, build, key=self._recommender_segment_key(svd_key),
+                        externals={"svd_model": svd_model}
+                    )
+                    logger.info(f"HybridRecommender mapped from shared segment {key[:12]}")
+                except Exception as e:
+                    logger.warning(f"Could not share the HybridRecommender, building a private one: {str(e)}")
+            if hybrid_recommender is None:
+                hybrid_recommender = build()
+            pipeline = build_default_pipeline(hybrid_recommender)
             logger.info("HybridRecommender initialized successfully")
+            return hybrid_recommender, pipeline, key
             
         except Exception as e:
             logger.error(f"Error initializing HybridRecommender: {str(e)}")
-            self.hybrid_recommender = None
+            return None, None, None
+    
+    def _warm_up(self, bundle: ModelBundle):
+        """
+        Runs a new-user and a trained-user request through a bundle before it
+        is published, so the first real requests do not pay for lazy
+        initialization. Raises if the bundle cannot serve (it is then not published)
+        """
+        from app.services.recommenders.pipeline import RecommendationContext
+        
+        recommender = bundle.hybrid_recommender
+        if recommender is None:
+            return
+        
+        bundle.pipeline.run(RecommendationContext(user_id=-1, preferred_genres=["Action"]), n=10)
+        trained_user = next(iter(recommender.svd_model.users_id2index), None)
+        if trained_user is not None:
+            bundle.pipeline.run(RecommendationContext(user_id=trained_user), n=10)
+            recommender.predict_rating(trained_user, int(recommender.svd_movie_ids[0]))
+    
+    def _set_load_state(self, name: str, **fields):
+        with self._load_state_lock:
+            self.load_state.setdefault(name, {}).update(fields)
+    
+    def _fetch_model_tracked(self, model_type: str):
+        """_fetch_model recording its state and duration in load_state"""
+        self._set_load_state(model_type, state="loading", error=None)
+        start = time.perf_counter()
+        try:
+            model, version = self._fetch_model(model_type)
+        except Exception as e:
+            self._set_load_state(model_type, state="failed", error=str(e),
+                                 duration_ms=round((time.perf_counter() - start) * 1000, 1))
+            raise
+        self._set_load_state(model_type, state="loaded", version=version,
+                             duration_ms=round((time.perf_counter() - start) * 1000, 1))
+        return model, version
     
     def load_all_models(self):
-        """Load all recommendation models"""
+        """
+        Load all recommendation models and publish them together.
+        Independent models are downloaded concurrently.
+        """
         results = {}
+        models, versions = {}, {}
+        rss_before = model_report.process_rss_bytes()
+        with ThreadPoolExecutor(max_workers=len(self.model_names)) as executor:
+            futures = {
+                model_type: executor.submit(self._fetch_model_tracked, model_type)
+                for model_type in self.model_names.keys()
+            }
+            for model_type, future in futures.items():
+                try:
+                    models[model_type], versions[model_type] = future.result()
+                    results[model_type] = "success"
+                except Exception as e:
+                    logger.warning(f"Failed to load {model_type}: {str(e)}")
+                    results[model_type] = f"failed: {str(e)}"
+        
+        if models:
+            self.install_models(models, versions, rss_before=rss_before)
+        return results
+    
+    def start_background_loading(self):
+        """
+        Loads all models on a background thread so the app starts serving
+        immediately (catalog/auth endpoints work, recommendation routes use
+        their DB fallback until is_ready())
+        """
+        if self._loading_thread is not None and self._loading_thread.is_alive():
+            return
+        
         for model_type in self.model_names.keys():
+            self._set_load_state(model_type, state="pending")
+        
+        def run():
             try:
-                self.load_model(model_type)
-                results[model_type] = "success"
+                logger.info("Loading ML models from MLflow...")
+                results = self.load_all_models()
+                
+                # Log results
+                success_count = sum(1 for r in results.values() if r == "success")
+                logger.info(f"ML models loaded: {success_count}/{len(results)} successful")
+                
+                for model_type, result in results.items():
+                    if result == "success":
+                        logger.info(f"  v {model_type}: loaded")
+                    else:
+                        logger.warning(f"  x {model_type}: {result}")
             except Exception as e:
-                logger.warning(f"Failed to load {model_type}: {str(e)}")
-                results[model_type] = f"failed: {str(e)}"
-        return results
+                logger.warning(f"Error during model loading: {e}")
+                logger.warning("Models can be loaded later via /recommendations/load-model or /recommendations/load-all-models endpoints")
+        
+        self._loading_thread = threading.Thread(target=run, name="model-loader", daemon=True)
+        self._loading_thread.start()
+    
+    def is_ready(self) -> bool:
+        """True once a HybridRecommender is being served"""
+        return self._bundle.hybrid_recommender is not None
+    
+    def readiness(self) -> Dict[str, Any]:
+        """Readiness report: overall flag, per-model load state/timings and the served bundle"""
+        with self._load_state_lock:
+            load_state = {name: dict(state) for name, state in self.load_state.items()}
+        return {
+            "ready": self.is_ready(),
+            "models": load_state,
+            "bundle": self._bundle.describe()
+        }
+    
+    def bundle_for(self, user_id: int) -> Tuple[str, ModelBundle]:
+        """
+        Variant a user is assigned to and the bundle serving it
+        (the main bundle when no experiment is running)
+        """
+        experiment = self._experiment
+        if experiment is None:
+            return CONTROL_VARIANT, self._bundle
+        variant = experiment[0].assign(user_id)
+        return variant, experiment[1].get(variant, self._bundle)
+    
+    def start_experiment(self, name: str, variants: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Starts an A/B test between SVD model versions, replacing the running one.
+        
+        Every non-control variant loads its own SVD model; its HybridRecommender
+        reuses the catalog structures (genre matrix, id maps, content features,
+        and the rating stats when trained on the same ratings) of the main
+        bundle instead of rebuilding them.
+        
+        Args:
+            name: Experiment name (users are bucketed by hash of name + user id)
+            variants: Dict variant -> {"weight": float, "version": str, "model_name": str}.
+                The weights are shares of the traffic and must sum to 1.
+                The "control" variant is served by the main bundle (no version needed)
+                
+        Returns:
+            Description of the experiment
+        """
+        current = self._bundle
+        if current.hybrid_recommender is None:
+            raise ValueError("HybridRecommender not initialized. Load SVD model first.")
+        missing = [variant for variant, spec in variants.items() if spec.get("weight") is None]
+        if missing:
+            raise ValueError(f"Variants need a weight: {missing}")
+        experiment = Experiment(name, {variant: float(spec["weight"]) for variant, spec in variants.items()})
+        
+        variant_bundles = {}
+        try:
+            for variant, spec in variants.items():
+                if variant == CONTROL_VARIANT:
+                    continue
+                if not spec.get("version"):
+                    raise ValueError(f"Variant '{variant}' needs a model version")
+                svd_model, version = self._fetch_model("svd_model", spec.get("model_name"), str(spec["version"]))
+                variant_bundles[variant] = self._build_variant_bundle(svd_model, version, current)
+        except Exception:
+            for variant_bundle in variant_bundles.values():
+                self._release_shared_keys(variant_bundle.shared_keys)
+            raise
+        
+        with self._swap_lock:
+            previous, self._experiment = self._experiment, (experiment, variant_bundles)
+        if previous is not None:
+            for variant_bundle in previous[1].values():
+                self._release_shared_keys(variant_bundle.shared_keys)
+        self.variant_stats.reset()
+        logger.info(f"Experiment '{name}' started: {experiment.weights}")
+        return self.describe_experiment()
+    
+    def _build_variant_bundle(self, svd_model, version: str, control: ModelBundle) -> ModelBundle:
+        shared_keys = {}
+        svd_model, key = self._share_model("svd_model", svd_model)
+        if key is not None:
+            shared_keys["svd_model"] = key
+        try:
+            hybrid_recommender, pipeline, key = self._build_hybrid_recommender(
+                svd_model, key, shared_catalog=control.hybrid_recommender
+            )
+            if hybrid_recommender is None:
+                raise ValueError(f"Could not build the HybridRecommender of svd_model {version}")
+            if key is not None:
+                shared_keys["hybrid_recommender"] = key
+            bundle = ModelBundle(
+                models={"svd_model": svd_model},
+                versions={"svd_model": version},
+                hybrid_recommender=hybrid_recommender,
+                pipeline=pipeline,
+                similar_items=control.similar_items,
+                generation=next(self._generations),
+                shared_keys=shared_keys
+            )
+            self._warm_up(bundle)
+            return bundle
+        except Exception:
+            self._release_shared_keys(shared_keys)
+            raise
+    
+    def stop_experiment(self):
+        """Stops the running experiment: every user is served by the main bundle again"""
+        with self._swap_lock:
+            previous, self._experiment = self._experiment, None
+        if previous is not None:
+            for variant_bundle in previous[1].values():
+                self._release_shared_keys(variant_bundle.shared_keys)
+            logger.info(f"Experiment '{previous[0].name}' stopped")
+    
+    def describe_experiment(self) -> Dict[str, Any]:
+        """Running experiment, the version served by each variant and per-variant counters"""
+        experiment = self._experiment
+        if experiment is None:
+            return {"experiment": None, "stats": self.variant_stats.snapshot()}
+        variants = {CONTROL_VARIANT: dict(self._bundle.versions)} if CONTROL_VARIANT in experiment[0].weights else {}
+        variants.update({variant: dict(bundle.versions) for variant, bundle in experiment[1].items()})
+        return {
+            "experiment": experiment[0].describe(),
+            "variants": variants,
+            "stats": self.variant_stats.snapshot()
+        }
+    
+    def get_cached_page(self, user_id: int, rating_version: int, page_key: Tuple):
+        """
+        Cached recommendation page of a user, or None. A hit is counted as a
+        personalized recommendations request of the user's variant.
+        
+        Args:
+            user_id: User ID
+            rating_version: Current rating version of the user
+            page_key: What the page was computed for (n, filters)
+        """
+        start = time.perf_counter()
+        variant, bundle = self.bundle_for(user_id)
+        page = self.result_cache.get(user_id, (rating_version, bundle.generation), page_key)
+        if page is not None:
+            self.variant_stats.record(variant, "recommendations", (time.perf_counter() - start) * 1000,
+                                      tier="personalized")
+        return page
+    
+    def cache_page(self, user_id: int, rating_version: int, page_key: Tuple, page,
+                   generation: Optional[int] = None):
+        """
+        Stores a personalized recommendation page of a user (see get_cached_page)
+        
+        Args:
+            generation: Generation of the bundle the page was computed with, read
+                before computing it (defaults to the current one)
+        """
+        if generation is None:
+            generation = self.bundle_for(user_id)[1].generation
+        return self.result_cache.put(user_id, (rating_version, generation), page_key, page)
+    
+    def invalidate_user(self, user_id: int):
+        """Drops the cached profile and pages of a user (after a rating or preference write)"""
+        self.profile_cache.invalidate(user_id)
+        self.result_cache.invalidate(user_id)
+    
+    def get_user_profile(self, user_id: int, version: int, loader,
+                         top_n_loader: Optional[Callable[[str], Optional[Tuple]]] = None):
+        """
+        Returns the cached profile of a user at a given rating version,
+        loading the ratings and preferences only on a cache miss
+        
+        Args:
+            user_id: User ID
+            version: Current rating version of the user
+            loader: Callable returning (user_ratings, preferred_genres), called on a miss
+            top_n_loader: Optional callable returning the user's offline top-N
+                (movie_ids, scores) for an SVD model version, or None. Only
+                called on a miss, for users the serving model was trained on
+            
+        Returns:
+            CachedUserProfile
+        """
+        # Profile vectors depend on the model too: stamp entries with the bundle generation
+        _, bundle = self.bundle_for(user_id)
+        version = (version, bundle.generation)
+        cached = self.profile_cache.get(user_id, version)
+        if cached is None:
+            user_ratings, preferred_genres = loader()
+            precomputed = None
+            svd_model = bundle.models.get("svd_model")
+            if top_n_loader is not None and svd_model is not None and user_id in svd_model.users_id2index:
+                precomputed = top_n_loader(bundle.versions.get("svd_model"))
+            cached = self.profile_cache.put(
+                CachedUserProfile(user_id, user_ratings, preferred_genres, version=version,
+                                  precomputed=precomputed)
+            )
+        return cached
     
     def predict_score(self, user_id: int, item_id: int, 
                      user_ratings: Optional[List[Tuple[int, float]]] = None,
-                     preferred_genres: Optional[List[str]] = None):
+                     preferred_genres: Optional[List[str]] = None,
+                     cached_profile: Optional[CachedUserProfile] = None):
         """
         Predict rating score for a user-item pair using HybridRecommender
         Works for both existing and new users
@@ -143,31 +899,51 @@ class MLModelService:
             item_id: Item/Movie ID
             user_ratings: Optional list of tuples [(movie_id, rating), ...] for new users
             preferred_genres: Optional list of preferred genres for new users
+            cached_profile: Optional cached profile (replaces user_ratings/preferred_genres)
             
         Returns:
             Dict with predicted_rating, confidence, and method
         """
-        if self.hybrid_recommender is None:
+        variant, bundle = self.bundle_for(user_id)
+        if bundle.hybrid_recommender is None:
             raise ValueError("HybridRecommender not initialized. Load SVD model first.")
         
+        start = time.perf_counter()
+        error = False
         try:
-            prediction = self.hybrid_recommender.predict_rating(
+            user_profile = None
+            if cached_profile is not None:
+                user_ratings = cached_profile.user_ratings
+                preferred_genres = cached_profile.preferred_genres
+                if user_id not in bundle.hybrid_recommender.svd_model.users_id2index:
+                    user_profile = cached_profile.genre_profile(bundle.hybrid_recommender, 0.3, 0.7)
+            prediction = bundle.hybrid_recommender.predict_rating(
                 user_id=user_id,
                 movie_id=item_id,
                 user_ratings=user_ratings,
-                preferred_genres=preferred_genres
+                preferred_genres=preferred_genres,
+                user_profile=user_profile
             )
             return prediction
         except Exception as e:
+            error = True
             logger.error(f"Prediction error: {str(e)}")
             raise
+        finally:
+            self.variant_stats.record(variant, "predict", (time.perf_counter() - start) * 1000, error=error)
     
     def recommend_top_n(self, user_id: int, n: int = 10,
                        user_ratings: Optional[List[Tuple[int, float]]] = None,
                        preferred_genres: Optional[List[str]] = None,
                        genre_weight: float = 0.3,
                        rating_weight: float = 0.7,
-                       diversity_boost: bool = True):
+                       diversity_boost: bool = True,
+                       use_pipeline: bool = True,
+                       mmr_lambda: Optional[float] = None,
+                       cached_profile: Optional[CachedUserProfile] = None,
+                       genres: Optional[List[str]] = None,
+                       decade: Optional[int] = None,
+                       deadline: Optional[Deadline] = None):
         """
         Get top N personalized recommendations for a user using HybridRecommender
         Automatically handles both existing and new users
@@ -180,39 +956,179 @@ class MLModelService:
             genre_weight: Weight for explicit genre preferences (0-1)
             rating_weight: Weight for rating behavior (0-1)
             diversity_boost: Whether to increase genre diversity
+            use_pipeline: Use the two-stage candidate generation + re-ranking pipeline
+            mmr_lambda: If set, diversify with Maximal Marginal Relevance for both
+                user types (1.0 = pure relevance, 0.0 = pure diversity)
+            cached_profile: Optional cached profile (replaces user_ratings/preferred_genres)
+            genres: Only recommend movies of any of these genres (filter)
+            decade: Only recommend movies released in this decade, e.g. 1990 (filter)
+            deadline: Optional latency budget, checked between stages
+                (raises DeadlineExceeded when exhausted)
             
         Returns:
-            List of recommended movie IDs or dicts with additional info
+            Columnar dict with a 'movie_id' column (new users and pipeline results
+            also carry scores and genres, pipeline results per-stage 'timings' in ms)
         """
-        if self.hybrid_recommender is None:
+        _, bundle = self.bundle_for(user_id)
+        if bundle.hybrid_recommender is None:
             raise ValueError("HybridRecommender not initialized. Load SVD model first.")
         
         try:
-            svd_model = self.models.get("svd_model")
+            if cached_profile is not None:
+                user_ratings = cached_profile.user_ratings
+                preferred_genres = cached_profile.preferred_genres
+            
+            # Filtered requests mask the full catalog before top-N, so a full
+            # page comes back in one pass (candidate sources are not filter-aware)
+            has_filters = bool(genres) or decade is not None
+            
+            if use_pipeline and bundle.pipeline is not None and not has_filters:
+                from app.services.recommenders.pipeline import RecommendationContext
+                context = RecommendationContext(
+                    user_id=user_id,
+                    user_ratings=user_ratings,
+                    preferred_genres=preferred_genres,
+                    diversity_boost=diversity_boost,
+                    mmr_lambda=mmr_lambda,
+                    cached_profile=cached_profile
+                )
+                recommendations = bundle.pipeline.run(context, n=n, deadline=deadline)
+                if recommendations['movie_id']:
+                    return recommendations
+                # Nothing survived the filters - fall back to the full-catalog path
+            
+            if deadline is not None:
+                deadline.check("full_catalog")
+            svd_model = bundle.models.get("svd_model")
             
             # Check if user exists in training data
             if user_id in svd_model.users_id2index:
                 # Existing user - use SVD
-                recommendations = self.hybrid_recommender.recommend_for_existing_user(
+                recommendations = {'movie_id': bundle.hybrid_recommender.recommend_for_existing_user(
                     user_id=user_id,
-                    n=n
-                )
+                    n=n,
+                    mmr_lambda=mmr_lambda,
+                    genres=genres,
+                    decade=decade
+                )}
             else:
                 # New user - use hybrid approach
-                recommendations = self.hybrid_recommender.recommend_for_new_user(
+                user_profile = None
+                if cached_profile is not None:
+                    weights = bundle.hybrid_recommender._profile_weights(
+                        len(user_ratings), genre_weight, rating_weight
+                    )
+                    user_profile = cached_profile.genre_profile(bundle.hybrid_recommender, *weights)
+                recommendations = bundle.hybrid_recommender.recommend_for_new_user(
                     user_ratings=user_ratings,
                     preferred_genres=preferred_genres,
                     n=n,
                     genre_weight=genre_weight,
                     rating_weight=rating_weight,
-                    diversity_boost=diversity_boost
+                    diversity_boost=diversity_boost,
+                    mmr_lambda=mmr_lambda,
+                    user_profile=user_profile,
+                    genres=genres,
+                    decade=decade
                 )
             
             return recommendations
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Recommendation error: {str(e)}")
             raise
     
+    def new_deadline(self, endpoint: str) -> Deadline:
+        """Starts the latency budget configured for an endpoint"""
+        budget_ms = settings.RECOMMENDATION_DEADLINES_MS.get(
+            endpoint, settings.RECOMMENDATION_DEFAULT_DEADLINE_MS
+        )
+        return Deadline(budget_ms)
+    
+    def recommend_within_budget(self, user_id: int, n: int, deadline: Deadline,
+                                profile_loader: Callable[[], CachedUserProfile],
+                                genres: Optional[List[str]] = None,
+                                decade: Optional[int] = None,
+                                rating_version: Optional[int] = None) -> Tuple[List[int], str]:
+        """
+        Personalized recommendations under a latency budget, with graceful degradation
+        
+        The profile load and every pipeline stage check the remaining budget.
+        When it runs out (or anything fails) progressively cheaper tiers serve
+        the request instead:
+        
+            personalized -> cached (last page served to this user at this rating version)
+                         -> popular (precomputed popularity ranking)
+                         -> static (FALLBACK_MOVIE_IDS)
+        
+        Args:
+            user_id: User ID
+            n: Number of recommendations
+            deadline: Latency budget of the request (see new_deadline)
+            profile_loader: Callable returning the user's CachedUserProfile (may hit the DB)
+            genres: Optional genre filter
+            decade: Optional decade filter
+            rating_version: The user's rating version, so the cached tier never
+                serves a page computed before the user's latest rating
+            
+        Returns:
+            Tuple (movie_ids, tier) where tier is "personalized", "cached", "popular" or "static"
+        """
+        variant, bundle = self.bundle_for(user_id)
+        start = time.perf_counter()
+        movie_ids, tier = self._recommend_with_fallbacks(bundle, user_id, n, deadline, profile_loader,
+                                                         genres, decade, rating_version)
+        self.variant_stats.record(variant, "recommendations", (time.perf_counter() - start) * 1000, tier=tier)
+        return movie_ids, tier
+    
+    def _recommend_with_fallbacks(self, bundle: ModelBundle, user_id: int, n: int, deadline: Deadline,
+                                  profile_loader: Callable[[], CachedUserProfile],
+                                  genres: Optional[List[str]], decade: Optional[int],
+                                  rating_version: Optional[int]) -> Tuple[List[int], str]:
+        """Tiers of recommend_within_budget, on the bundle of the user's variant"""
+        cache_key = (user_id, rating_version, n, tuple(genres or ()), decade)
+        try:
+            if bundle.hybrid_recommender is None:
+                raise ValueError("HybridRecommender not initialized. Load SVD model first.")
+            deadline.check("profile")
+            cached_profile = profile_loader()
+            
+            deadline.check("recommend")
+            recommendations = self.recommend_top_n(
+                user_id=user_id,
+                n=n,
+                cached_profile=cached_profile,
+                genres=genres,
+                decade=decade,
+                deadline=deadline
+            )
+            movie_ids = [int(mid) for mid in recommendations['movie_id']]
+            
+            with self._recent_results_lock:
+                self.recent_results[cache_key] = movie_ids
+            return movie_ids, "personalized"
+        except DeadlineExceeded as e:
+            logger.warning(f"Degrading recommendations for user {user_id}: {str(e)}")
+        except Exception:
+            # Not a budget overrun: keep the traceback
+            logger.exception(f"Degrading recommendations for user {user_id}")
+        
+        with self._recent_results_lock:
+            movie_ids = self.recent_results.get(cache_key)
+        if movie_ids:
+            return movie_ids, "cached"
+        
+        if bundle.hybrid_recommender is not None:
+            try:
+                movie_ids = bundle.hybrid_recommender._recommend_popular(n=n, genres=genres, decade=decade)
+                if movie_ids:
+                    return movie_ids, "popular"
+            except Exception:
+                logger.exception("Popularity fallback failed")
+        
+        return FALLBACK_MOVIE_IDS[:n], "static"
+    
     def will_user_like(self, user_id: int, movie_id: int,
                       user_ratings: Optional[List[Tuple[int, float]]] = None,
                       preferred_genres: Optional[List[str]] = None,
@@ -230,11 +1146,12 @@ class MLModelService:
         Returns:
             Dict with will_like (bool), predicted_rating, confidence, genres, explanation
         """
-        if self.hybrid_recommender is None:
+        _, bundle = self.bundle_for(user_id)
+        if bundle.hybrid_recommender is None:
             raise ValueError("HybridRecommender not initialized. Load SVD model first.")
         
         try:
-            result = self.hybrid_recommender.will_user_like(
+            result = bundle.hybrid_recommender.will_user_like(
                 user_id=user_id,
                 movie_id=movie_id,
                 user_ratings=user_ratings,
@@ -248,7 +1165,8 @@ class MLModelService:
     
     def batch_predict_ratings(self, user_id: int, movie_ids: List[int],
                              user_ratings: Optional[List[Tuple[int, float]]] = None,
-                             preferred_genres: Optional[List[str]] = None):
+                             preferred_genres: Optional[List[str]] = None,
+                             cached_profile: Optional[CachedUserProfile] = None):
         """
         Predict ratings for multiple movies at once
         
@@ -257,29 +1175,44 @@ class MLModelService:
             movie_ids: List of movie IDs
             user_ratings: Optional ratings for new users
             preferred_genres: Optional genres for new users
+            cached_profile: Optional cached profile (replaces user_ratings/preferred_genres)
             
         Returns:
-            DataFrame with movie_id, predicted_rating, confidence, method
+            List of dicts with movie_id, predicted_rating, confidence, method
         """
-        if self.hybrid_recommender is None:
+        variant, bundle = self.bundle_for(user_id)
+        if bundle.hybrid_recommender is None:
             raise ValueError("HybridRecommender not initialized. Load SVD model first.")
         
+        start = time.perf_counter()
+        error = False
         try:
-            predictions_df = self.hybrid_recommender.batch_predict_ratings(
+            user_profile = None
+            if cached_profile is not None:
+                user_ratings = cached_profile.user_ratings
+                preferred_genres = cached_profile.preferred_genres
+                if user_id not in bundle.hybrid_recommender.svd_model.users_id2index:
+                    user_profile = cached_profile.genre_profile(bundle.hybrid_recommender, 0.3, 0.7)
+            predictions = bundle.hybrid_recommender.batch_predict_ratings(
                 user_id=user_id,
                 movie_ids=movie_ids,
                 user_ratings=user_ratings,
-                preferred_genres=preferred_genres
+                preferred_genres=preferred_genres,
+                user_profile=user_profile
             )
-            return predictions_df.to_dict(orient='records')
+            columns = list(predictions.keys())
+            return [dict(zip(columns, row)) for row in zip(*predictions.values())]
         except Exception as e:
+            error = True
             logger.error(f"Batch prediction error: {str(e)}")
             raise
+        finally:
+            self.variant_stats.record(variant, "batch_predict", (time.perf_counter() - start) * 1000, error=error)
     
     def recommend_similar_items(self, item_id: int, n: int = 10):
         """
         Get similar items to a given item
-        Uses the SVD model's item similarity
+        Uses the similar_items model's item factors, or the SVD model's
         
         Args:
             item_id: Item/Movie ID
@@ -288,12 +1221,12 @@ class MLModelService:
         Returns:
             List of tuples (item_id, similarity_score)
         """
-        svd_model = self.models.get("svd_model")
-        if svd_model is None:
+        bundle = self.bundle
+        if bundle.similar_items is None:
             raise ValueError("SVD model not loaded. Call load_model('svd_model') first.")
         
         try:
-            similar_items = svd_model.recommend_similar_items(item_id, n=n)
+            similar_items = bundle.similar_items.recommend_similar_items(item_id, n=n)
             return similar_items
         except Exception as e:
             logger.error(f"Similar items error: {str(e)}")
@@ -309,12 +1242,13 @@ class MLModelService:
         Returns:
             List of popular movie IDs
         """
-        if self.hybrid_recommender is None:
+        bundle = self.bundle
+        if bundle.hybrid_recommender is None:
             raise ValueError("HybridRecommender not initialized. Load SVD model first.")
         
         try:
-            popular_movies = self.hybrid_recommender._recommend_popular(n=n)
-            print(popular_movies)
+            popular_movies = bundle.hybrid_recommender._recommend_popular(n=n)
+            logger.debug(f"Popular movies: {popular_movies}")
             return popular_movies
         except Exception as e:
             logger.error(f"Popular movies error: {str(e)}")
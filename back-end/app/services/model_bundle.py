@@ -0,0 +1,48 @@
+"""
+Immutable set of models served together
+"""
+import time
+from types import MappingProxyType
+from typing import Any, Dict, Optional
+
+
+class ModelBundle:
+    """
+    Everything a request needs from the models: the raw MLflow models, their
+    versions, and the HybridRecommender / pipeline built from the SVD model.
+
+    A bundle is fully built and warmed before it is published and is never
+    mutated afterwards. MLModelService swaps its bundle reference in a single
+    assignment, so a request that grabbed a bundle keeps using the same
+    consistent set of models until it finishes, even if a new version is
+    published meanwhile.
+    """
+
+    __slots__ = ("models", "versions", "hybrid_recommender", "pipeline", "similar_items",
+                 "generation", "shared_keys", "loaded_at")
+
+    def __init__(self, models: Optional[Dict[str, Any]] = None,
+                 versions: Optional[Dict[str, str]] = None,
+                 hybrid_recommender=None, pipeline=None, similar_items=None,
+                 generation: int = 0, shared_keys: Optional[Dict[str, str]] = None):
+        self.models = MappingProxyType(dict(models or {}))
+        self.versions = MappingProxyType(dict(versions or {}))
+        # model_type -> SharedArrayStore segment the model's arrays live in
+        self.shared_keys = MappingProxyType(dict(shared_keys or {}))
+        self.hybrid_recommender = hybrid_recommender
+        self.pipeline = pipeline
+        # ItemSimilarityIndex serving similar-items requests
+        self.similar_items = similar_items
+        self.generation = generation
+        self.loaded_at = time.time()
+
+    def describe(self) -> Dict[str, Any]:
+        """Summary of the bundle (for logs / admin endpoints)"""
+        return {
+            "generation": self.generation,
+            "versions": dict(self.versions),
+            "hybrid_recommender": self.hybrid_recommender is not None,
+            "similar_items": self.similar_items.content_key[:12] if self.similar_items is not None else None,
+            "shared_arrays": {model_type: key[:12] for model_type, key in self.shared_keys.items()},
+            "loaded_at": self.loaded_at,
+        }
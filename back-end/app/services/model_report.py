@@ -0,0 +1,138 @@
+"""
+Memory and cost introspection of the loaded models
+"""
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+
+def process_rss_bytes() -> Optional[int]:
+    """Resident set size of this process (None if it cannot be read)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        # Peak RSS: KiB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except (ImportError, OSError):
+        return None
+
+
+def _entry(value) -> Optional[Dict[str, Any]]:
+    """Size/dtype/shape of an array-like value, None for anything else"""
+    import pandas as pd
+    from scipy import sparse
+
+    if isinstance(value, np.ndarray):
+        return {
+            "type": type(value).__name__,
+            "dtype": str(value.dtype),
+            "shape": list(value.shape),
+            "bytes": int(value.nbytes),
+            # Pages of memory-mapped arrays are shared with the other workers
+            "mapped": isinstance(value, np.memmap) or _is_mapped(value),
+        }
+    if sparse.issparse(value):
+        nbytes = sum(getattr(value, name).nbytes for name in ("data", "indices", "indptr") if hasattr(value, name))
+        return {"type": type(value).__name__, "dtype": str(value.dtype), "shape": list(value.shape),
+                "bytes": int(nbytes), "mapped": False}
+    if isinstance(value, pd.DataFrame):
+        dtypes = sorted({str(dtype) for dtype in value.dtypes})
+        return {"type": "DataFrame", "dtype": ",".join(dtypes), "shape": list(value.shape),
+                "bytes": int(value.memory_usage(index=True, deep=True).sum()),
+                "mapped": any(_is_mapped(block.values) for block in value._mgr.blocks)}
+    if isinstance(value, pd.Series):
+        return {"type": "Series", "dtype": str(value.dtype), "shape": list(value.shape),
+                "bytes": int(value.memory_usage(index=True, deep=True)), "mapped": False}
+    if isinstance(value, dict) and value and all(isinstance(v, np.ndarray) for v in value.values()):
+        return {"type": "dict[ndarray]", "dtype": None, "shape": [len(value)],
+                "bytes": int(sum(v.nbytes for v in value.values())), "mapped": False}
+    if isinstance(value, dict) and len(value) > 0:
+        # Id maps: shallow size of the table plus its keys/values
+        nbytes = sys.getsizeof(value) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+        return {"type": "dict", "dtype": None, "shape": [len(value)], "bytes": int(nbytes), "mapped": False}
+    return None
+
+
+def _is_mapped(array) -> bool:
+    base = array
+    while getattr(base, "base", None) is not None:
+        base = base.base
+        if isinstance(base, np.memmap) or type(base).__name__ == "mmap":
+            return True
+    return False
+
+
+def describe_components(obj, skip=(), depth=1) -> Dict[str, Dict[str, Any]]:
+    """
+    Size of every array, sparse matrix, DataFrame and id map held by obj,
+    keyed by attribute path. Attributes that are themselves recommender
+    components (ContentFeatures, RatingStats, ...) are described up to `depth`
+    levels down as "component.attribute".
+    """
+    entries = {}
+    for name, value in vars(obj).items():
+        if name in skip:
+            continue
+        entry = _entry(value)
+        if entry is not None:
+            entries[name] = entry
+        elif depth > 0 and type(value).__module__.startswith("app.services"):
+            for sub_name, sub_entry in describe_components(value, depth=depth - 1).items():
+                entries[f"{name}.{sub_name}"] = sub_entry
+    return entries
+
+
+def total_bytes(entries: Dict[str, Dict[str, Any]]) -> int:
+    return sum(entry["bytes"] for entry in entries.values())
+
+
+def measure_scoring_cost(bundle, repeats: int = 5) -> Dict[str, float]:
+    """
+    Median wall time (ms) of one request of each kind on a warmed bundle,
+    the per-request cost used for replica capacity planning
+    """
+    from app.services.recommenders.pipeline import RecommendationContext
+
+    recommender = bundle.hybrid_recommender
+    if recommender is None:
+        return {}
+
+    def median_ms(call):
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            call()
+            timings.append((time.perf_counter() - start) * 1000)
+        return round(statistics.median(timings), 3)
+
+    costs = {
+        "new_user_recommendations": median_ms(
+            lambda: bundle.pipeline.run(RecommendationContext(user_id=-1, preferred_genres=["Action"]), n=10)
+        )
+    }
+    trained_user = next(iter(recommender.svd_model.users_id2index), None)
+    if trained_user is not None:
+        movie_id = int(recommender.svd_movie_ids[0])
+        costs["existing_user_recommendations"] = median_ms(
+            lambda: bundle.pipeline.run(RecommendationContext(user_id=trained_user), n=10)
+        )
+        costs["predict_rating"] = median_ms(lambda: recommender.predict_rating(trained_user, movie_id))
+    if bundle.similar_items is not None:
+        movie_id = int(bundle.similar_items.movie_ids[0])
+        costs["similar_items"] = median_ms(lambda: bundle.similar_items.recommend_similar_items(movie_id, n=10))
+    return costs
+
+
+def format_bytes(nbytes: Optional[int]) -> str:
+    if nbytes is None:
+        return "n/a"
+    return f"{nbytes / (1024 * 1024):.1f} MB"
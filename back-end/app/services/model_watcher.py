@@ -0,0 +1,118 @@
+"""
+Background watcher that publishes new model versions without downtime
+"""
+import os
+import threading
+import logging
+from typing import Dict, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+class ModelWatcher:
+    """
+    Polls for new model versions and hot-swaps them into an MLModelService.
+
+    The source is the MLflow Model Registry or, if `watch_dir` is set, a
+    local artifact directory laid out as <watch_dir>/<registered_name>/<version>/
+    (each version being a saved MLflow model, i.e. containing an MLmodel file).
+
+    New versions are downloaded, built and warmed up on the watcher thread;
+    requests keep being served by the current bundle until the final swap.
+    """
+
+    def __init__(self, service, interval_seconds: int = 300, watch_dir: Optional[str] = None):
+        """
+        Args:
+            service: MLModelService to publish to
+            interval_seconds: Seconds between polls
+            watch_dir: Optional local artifact directory (polled instead of the registry)
+        """
+        self.service = service
+        self.interval_seconds = interval_seconds
+        self.watch_dir = watch_dir
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="model-watcher", daemon=True)
+        self._thread.start()
+        source = self.watch_dir or "MLflow registry"
+        logger.info(f"Model watcher started: polling {source} every {self.interval_seconds}s")
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval_seconds):
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.warning(f"Model watcher poll failed: {str(e)}")
+
+    def poll_once(self) -> Dict[str, str]:
+        """
+        Checks every model type once and publishes the new versions found
+        (all in a single swap).
+
+        Returns:
+            Dict model_type -> version that was published
+        """
+        serving = self.service.bundle.versions
+        models, versions = {}, {}
+
+        for model_type, model_name in self.service.model_names.items():
+            candidate = self._latest_version(model_name)
+            if candidate is None:
+                continue
+            version, model_uri = candidate
+            if serving.get(model_type) == version:
+                continue
+
+            logger.info(f"New {model_type} version found: {version} (serving {serving.get(model_type)})")
+            try:
+                if self.watch_dir:
+                    import mlflow.sklearn
+                    models[model_type] = mlflow.sklearn.load_model(model_uri)
+                else:
+                    models[model_type] = self.service.load_artifact(model_name, version, model_uri)
+                versions[model_type] = version
+            except Exception as e:
+                logger.warning(f"Could not load {model_type} version {version}: {str(e)}")
+
+        if models:
+            self.service.install_models(models, versions)
+        return versions
+
+    def _latest_version(self, model_name: str) -> Optional[Tuple[str, str]]:
+        """Returns (version, model_uri) of the newest available version, or None"""
+        if self.watch_dir:
+            return self._latest_local_version(model_name)
+
+        version = self.service.latest_registry_version(model_name)
+        if version is None:
+            return None
+        return version, f"models:/{model_name}/{version}"
+
+    def _latest_local_version(self, model_name: str) -> Optional[Tuple[str, str]]:
+        model_dir = os.path.join(self.watch_dir, model_name)
+        if not os.path.isdir(model_dir):
+            return None
+
+        versions = [
+            name for name in os.listdir(model_dir)
+            if os.path.exists(os.path.join(model_dir, name, "MLmodel"))
+        ]
+        if not versions:
+            return None
+
+        # Numeric versions compare as numbers, anything else by name
+        latest = max(versions, key=lambda v: (v.isdigit(), int(v) if v.isdigit() else 0, v))
+        return latest, os.path.join(model_dir, latest)
@@ -0,0 +1,172 @@
+"""
+In-memory snapshot of the movie catalog served by the /movies endpoints
+"""
+import itertools
+import json
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.models import MovieRead
+
+logger = logging.getLogger(__name__)
+
+# Rating statistics close every payload (last fields of MovieRead)
+STATS_FIELDS = {"average_rating", "rating_count"}
+
+
+class CatalogSnapshot:
+    """
+    View of every movie, loaded in one query. Each movie is kept as its
+    MovieRead JSON payload without the rating statistics (serialized once),
+    and the statistics as the pre-serialized closing fields of that payload,
+    so list/search/get pages are answered by joining bytes, without the DB.
+
+    The movies are immutable; the statistics are replaced as a whole by
+    set_stats() when the cache refreshes them.
+    """
+
+    def __init__(self, movies: List[dict], version: int):
+        self.version = version
+        self.built_at = time.time()
+        movies = sorted(movies, key=lambda movie: movie["id"])
+        self.ids = np.array([movie["id"] for movie in movies], dtype=np.int64)
+        self.titles_lower = [movie["title"].lower() for movie in movies]
+        # Open JSON objects: the statistics suffix is appended per request
+        self.payloads = [
+            MovieRead.model_validate(movie).model_dump_json(exclude=STATS_FIELDS).encode()[:-1]
+            for movie in movies
+        ]
+        self.position_by_id: Dict[int, int] = {int(mid): i for i, mid in enumerate(self.ids)}
+        self.set_stats({movie["id"]: (movie["average_rating"], movie["rating_count"]) for movie in movies})
+
+        by_genre: Dict[str, List[int]] = {}
+        for position, movie in enumerate(movies):
+            for genre in movie["genres"].split("|"):
+                by_genre.setdefault(genre, []).append(position)
+        self.positions_by_genre = {genre: np.array(positions, dtype=np.int64) for genre, positions in by_genre.items()}
+        self.genres = sorted(by_genre)
+        self.genres_payload = json.dumps(self.genres).encode()
+
+    def set_stats(self, summaries: Dict[int, Tuple[Optional[float], int]]):
+        """Replaces the rating statistics: {movie_id: (average_rating, rating_count)}, missing = no ratings"""
+        self.stats_updated_at = time.time()
+        self.stats = [
+            b',"average_rating":' + json.dumps(average).encode() + b',"rating_count":' + str(count).encode() + b"}"
+            for average, count in (summaries.get(int(mid), (None, 0)) for mid in self.ids)
+        ]
+
+    def _render(self, positions) -> List[bytes]:
+        """Complete MovieRead payloads of these positions"""
+        stats = self.stats
+        return [self.payloads[i] + stats[i] for i in positions]
+
+    @staticmethod
+    def _json_list(payloads) -> bytes:
+        return b"[" + b",".join(payloads) + b"]"
+
+    def get(self, movie_id: int) -> Optional[bytes]:
+        position = self.position_by_id.get(movie_id)
+        return self._render([position])[0] if position is not None else None
+
+    def _matching(self, genre: Optional[str] = None, q: Optional[str] = None):
+        """Positions (id order) of the movies matching the filters, lazily"""
+        if genre:
+            # Exact genre, like the movie_genre filter of the DB path
+            positions = iter(self.positions_by_genre.get(genre, np.empty(0, dtype=np.int64)).tolist())
+        else:
+            positions = iter(range(len(self.payloads)))
+        if q:
+            q = q.lower()
+            positions = (i for i in positions if q in self.titles_lower[i])
+        return positions
+
+    def list(self, limit: int = 50, offset: int = 0,
+             genre: Optional[str] = None, q: Optional[str] = None) -> bytes:
+        """JSON list of MovieRead, same filters and paging as MovieCRUD.list"""
+        page = itertools.islice(self._matching(genre, q), max(offset, 0), max(offset, 0) + max(limit, 0))
+        return self._json_list(self._render(page))
+
+    def search(self, query: str, limit: int = 50) -> bytes:
+        return self.list(limit=limit, q=query)
+
+
+class MovieCatalogCache:
+    """
+    Holds the current CatalogSnapshot. Only the very first request builds it
+    inline; afterwards, every `refresh_seconds` (or right after invalidate())
+    a background thread reads the catalog version stored in the DB and
+    rebuilds the snapshot if it changed, or else reloads the rating
+    statistics of the snapshot, while requests keep reading the current ones.
+    Catalog writers bump that version (scripts/load_movies.py,
+    POST /movies/catalog/refresh), so every worker picks the change up.
+    """
+
+    def __init__(self, refresh_seconds: int = 60):
+        self.refresh_seconds = refresh_seconds
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._next_refresh = 0.0
+        self._build_lock = threading.Lock()
+        self._refreshing = False
+
+    def get(self, session: Session) -> CatalogSnapshot:
+        """Current snapshot; `session` is only used to build the first one"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._build_lock:
+                if self._snapshot is None:
+                    self._snapshot = self._build(session)
+                return self._snapshot
+        if time.time() >= self._next_refresh:
+            self._refresh_in_background(session.get_bind())
+        return snapshot
+
+    def invalidate(self):
+        """Refreshes on the next read instead of waiting for the interval"""
+        self._next_refresh = 0.0
+
+    def _build(self, session: Session, version: Optional[int] = None) -> CatalogSnapshot:
+        from app import crud
+
+        start = time.perf_counter()
+        # Also paces the retries while the DB is unavailable
+        self._next_refresh = time.time() + self.refresh_seconds
+        if version is None:
+            version = crud.movie.movie_crud.catalog_version(session)
+        snapshot = CatalogSnapshot(crud.movie.movie_crud.list_all(session), version)
+        logger.info(f"Movie catalog snapshot (catalog version {snapshot.version}): "
+                    f"{len(snapshot.payloads)} movies in {(time.perf_counter() - start) * 1000:.0f}ms")
+        return snapshot
+
+    def _refresh_in_background(self, bind):
+        with self._build_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self.refresh, args=(bind,), name="movie-catalog-refresh", daemon=True).start()
+
+    def refresh(self, bind):
+        """Rebuilds the snapshot if the catalog version changed, else reloads its rating statistics"""
+        from app import crud
+
+        try:
+            with Session(bind) as session:
+                self._next_refresh = time.time() + self.refresh_seconds
+                version = crud.movie.movie_crud.catalog_version(session)
+                if version != self._snapshot.version:
+                    self._snapshot = self._build(session, version)
+                else:
+                    self._snapshot.set_stats(crud.movie_stats.get_rating_summaries(session=session))
+        except Exception as e:
+            logger.warning(f"Movie catalog refresh failed, serving catalog version "
+                           f"{self._snapshot.version}: {str(e)}")
+        finally:
+            self._refreshing = False
+
+
+movie_catalog = MovieCatalogCache(refresh_seconds=settings.MOVIE_CATALOG_REFRESH_SECONDS)
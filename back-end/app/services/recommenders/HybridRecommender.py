@@ -1,7 +1,12 @@
 import numpy as np
 import pandas as pd
-from sklearn.metrics.pairwise import cosine_similarity
+from scipy import sparse
 from app.core.constants import MOVIE_GENRES
+from app.services.recommenders.rating_stats import RatingStats
+from app.services.recommenders.item_neighbours import ItemNeighbourTable, ItemSimilarityIndex
+from app.services.recommenders.content_features import ContentFeatures, load_tags
+from app.services.recommenders.diversity import mmr_rerank
+from app.services.recommenders.catalog_index import CatalogIndex
 
 class HybridRecommender:
     """
@@ -11,18 +16,204 @@ class HybridRecommender:
     - Explicit genre preferences
     """
     
-    def __init__(self, svd_model, movies_catalog_path):
+    # Structures built from the catalog only (not from the SVD model)
+    CATALOG_ATTRIBUTES = (
+        'movies_catalog', 'movie_ids', 'genre_matrix', 'genre_matrix_f', 'genre_unit',
+        'genre_bits', '_genre_names_by_bits', '_movie_row', 'content_features', 'catalog_index'
+    )
+    
+    def __init__(self, svd_model, movies_catalog_path, tags_path=None, shared_catalog=None):
+        """
+        :param shared_catalog: Optional HybridRecommender (e.g. the control of an A/B
+                               test) whose catalog structures are reused by reference,
+                               and its rating stats too if trained on the same ratings
+        """
         self.svd_model = svd_model
-        self.movies_catalog = pd.read_csv(movies_catalog_path)
         self.genre_cols = MOVIE_GENRES
         
-        # Convert pipe-separated genres to binary columns
-        for genre in self.genre_cols:
-            self.movies_catalog[genre] = self.movies_catalog['genres'].apply(
-                lambda x: 1 if genre in str(x).split('|') else 0
+        if shared_catalog is not None:
+            for name in self.CATALOG_ATTRIBUTES:
+                setattr(self, name, getattr(shared_catalog, name))
+        else:
+            self.movies_catalog = pd.read_csv(movies_catalog_path)
+            self._build_catalog_arrays()
+            release_years = self._release_years()
+            
+            # Sparse TF-IDF content features (genres + decades + optional tags)
+            self.content_features = ContentFeatures(
+                movie_ids=self.movie_ids,
+                genre_matrix=self.genre_matrix,
+                genre_cols=self.genre_cols,
+                release_years=release_years,
+                tags_df=load_tags(tags_path)
             )
+            
+            # Genre / decade inverted indexes for constrained recommendations
+            self.catalog_index = CatalogIndex(self.genre_matrix, self.genre_cols, release_years)
+        
+        # Rating aggregates are computed once here instead of on every request
+        if shared_catalog is not None and self._same_ratings(shared_catalog.svd_model.train, svd_model.train):
+            self.rating_stats = shared_catalog.rating_stats
+        else:
+            self.rating_stats = RatingStats(svd_model.train)
+        self._build_svd_index()
+        
+        # Top-K latent neighbours of every trained movie (indexed by SVD column)
+        self.item_neighbours = ItemNeighbourTable(self.svd_model.Vt.T, k=50)
+        # Similar-items view over the same factors and table
+        self.item_similarity = ItemSimilarityIndex(
+            self.svd_movie_ids, self._svd_vt.T, neighbours=self.item_neighbours
+        )
+        
+        # MMR re-ranks the best n * mmr_pool_factor items
+        self.mmr_pool_factor = 5
+    
+    @staticmethod
+    def _same_ratings(train_a, train_b):
+        return train_a is train_b or (train_a.shape == train_b.shape and train_a.equals(train_b))
+    
+    def _build_svd_index(self):
+        """
+        Index arrays between the SVD model and the catalog:
+        
+        - _svd_col: dense movie_id -> column of the SVD prediction matrix (-1 if not trained)
+        - svd_movie_ids: SVD column -> movie_id
+        - _svd_rows: SVD column -> catalog row (-1 if not in the catalog)
+        - _seen_indptr / _seen_movie_ids: CSR-style list of the movies each
+          trained user rated, indexed by the SVD user index
+        - _svd_vt: float32 copy of the SVD item factors Vt (k, n_svd_movies)
+        - _svd_item_means / _fold_in_offset: item means used to center the
+          training matrix, and their projection on the latent space (see fold_in_user)
+        """
+        svd_movie_ids = np.fromiter(self.svd_model.movies_id2index.keys(), dtype=np.int64)
+        svd_cols = np.fromiter(self.svd_model.movies_id2index.values(), dtype=np.int64)
+        max_id = int(svd_movie_ids.max()) if len(svd_movie_ids) else 0
+        self._svd_col = np.full(max_id + 1, -1, dtype=np.int64)
+        self._svd_col[svd_movie_ids] = svd_cols
+        
+        self.svd_movie_ids = np.zeros(len(svd_cols), dtype=np.int64)
+        self.svd_movie_ids[svd_cols] = svd_movie_ids
+        self._svd_rows = self._get_movie_rows(self.svd_movie_ids)
+        
+        train = self.svd_model.train
+        user_idx = train['user_id'].map(self.svd_model.users_id2index).to_numpy(dtype=np.int64)
+        order = np.argsort(user_idx, kind='stable')
+        counts = np.bincount(user_idx, minlength=len(self.svd_model.users_id2index))
+        self._seen_indptr = np.concatenate(([0], np.cumsum(counts)))
+        self._seen_movie_ids = train['movie_id'].to_numpy(dtype=np.int64)[order]
+        
+        self._svd_vt = np.ascontiguousarray(np.asarray(self.svd_model.Vt, dtype=np.float32))
+        self._svd_item_means = self.rating_stats.movie_averages(self.svd_movie_ids).astype(np.float32)
+        self._fold_in_offset = -(self._svd_vt @ self._svd_item_means)
+    
+    def fold_in_user(self, user_ratings):
+        """
+        Projects a (new) user's ratings on the SVD latent space, the same way
+        the training rows were projected: centered by item means, unrated
+        items centered to -mean. Only the rated columns are touched, the
+        contribution of the rest is the precomputed _fold_in_offset.
+        
+        :param user_ratings: List of tuples [(movie_id, rating), ...]
+        :return: Array (k,), or None if none of the movies is known to the SVD model
+        """
+        if not user_ratings:
+            return None
+        movie_ids, ratings = zip(*user_ratings)
+        cols = self._get_svd_cols(movie_ids)
+        trained = cols >= 0
+        if not np.any(trained):
+            return None
+        ratings = np.asarray(ratings, dtype=np.float32)[trained]
+        return self._fold_in_offset + self._svd_vt[:, cols[trained]] @ ratings
+    
+    def _fold_in_scores(self, latent):
+        """Predicted ratings over every SVD column for a fold-in latent vector."""
+        return self._svd_item_means + latent @ self._svd_vt
+    
+    def _get_seen_movie_ids(self, user_id):
+        """Movies the user rated in the training set (empty for new users)."""
+        user_idx = self.svd_model.users_id2index.get(user_id)
+        if user_idx is None:
+            return np.empty(0, dtype=np.int64)
+        return self._seen_movie_ids[self._seen_indptr[user_idx]:self._seen_indptr[user_idx + 1]]
+    
+    def _filter_masks(self, genres=None, decade=None):
+        """
+        Genre / decade filter as boolean masks over the catalog rows and over
+        the SVD columns. Both are None when no filter is requested.
+        """
+        row_mask = self.catalog_index.mask(genres, decade)
+        if row_mask is None:
+            return None, None
+        svd_mask = np.zeros(len(self._svd_rows), dtype=bool)
+        in_catalog = self._svd_rows >= 0
+        svd_mask[in_catalog] = row_mask[self._svd_rows[in_catalog]]
+        return row_mask, svd_mask
+    
+    def _get_svd_cols(self, movie_ids):
+        """SVD matrix columns for an array of movie ids (-1 if not trained)."""
+        movie_ids = np.asarray(movie_ids, dtype=np.int64)
+        cols = np.full(movie_ids.shape, -1, dtype=np.int64)
+        in_range = (movie_ids >= 0) & (movie_ids < len(self._svd_col))
+        cols[in_range] = self._svd_col[movie_ids[in_range]]
+        return cols
+    
+    def _build_catalog_arrays(self):
+        """
+        Parses the catalog once into contiguous arrays so request-time lookups
+        are plain array indexing instead of DataFrame .loc calls.
+        
+        - movie_ids: row -> movie_id
+        - genre_matrix: (n_movies, n_genres) uint8 one-hot genres
+        - genre_matrix_f: float32 copy used for weighted sums
+        - genre_unit: L2-normalized rows, so cosine similarity is a single dot product
+        - genre_bits: per-movie genre bitmask (bit i = genre_cols[i])
+        - _movie_row: dense movie_id -> row index (-1 if the movie is not in the catalog)
+        """
+        self.movie_ids = self.movies_catalog['movie_id'].to_numpy(dtype=np.int64)
+        
+        # Vectorized parse of the pipe-separated genres (one pass over the column)
+        dummies = self.movies_catalog['genres'].fillna('').astype(str).str.get_dummies(sep='|')
+        dummies = dummies.reindex(columns=self.genre_cols, fill_value=0)
+        self.genre_matrix = np.ascontiguousarray(dummies.to_numpy(dtype=np.uint8))
+        self.genre_matrix_f = self.genre_matrix.astype(np.float32)
+        
+        norms = np.linalg.norm(self.genre_matrix_f, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.genre_unit = np.ascontiguousarray(self.genre_matrix_f / norms)
+        
+        # Genre bitmask per movie plus a decode table for every combination in the catalog
+        bit_values = np.left_shift(1, np.arange(len(self.genre_cols), dtype=np.uint32))
+        self.genre_bits = (self.genre_matrix.astype(np.uint32) @ bit_values).astype(np.uint32)
+        self._genre_names_by_bits = {
+            int(bits): tuple(g for i, g in enumerate(self.genre_cols) if bits & (1 << i))
+            for bits in np.unique(self.genre_bits)
+        }
         
-        self.movie_features = self.movies_catalog[['movie_id'] + self.genre_cols].set_index('movie_id')
+        max_id = int(self.movie_ids.max()) if len(self.movie_ids) else 0
+        self._movie_row = np.full(max_id + 1, -1, dtype=np.int64)
+        self._movie_row[self.movie_ids] = np.arange(len(self.movie_ids))
+    
+    def _release_years(self):
+        """Release year per catalog row (from the release_year column or the title)."""
+        if 'release_year' in self.movies_catalog.columns:
+            return pd.to_numeric(self.movies_catalog['release_year'], errors='coerce').to_numpy()
+        years = self.movies_catalog['title'].astype(str).str.extract(r"\((\d{4})\)", expand=False)
+        return pd.to_numeric(years, errors='coerce').to_numpy()
+    
+    def _get_movie_row(self, movie_id):
+        """Returns the catalog row of a movie, or -1 if unknown."""
+        if 0 <= movie_id < len(self._movie_row):
+            return int(self._movie_row[movie_id])
+        return -1
+    
+    def _get_movie_rows(self, movie_ids):
+        """Vectorized version of _get_movie_row for an array of movie ids."""
+        movie_ids = np.asarray(movie_ids, dtype=np.int64)
+        rows = np.full(movie_ids.shape, -1, dtype=np.int64)
+        in_range = (movie_ids >= 0) & (movie_ids < len(self._movie_row))
+        rows[in_range] = self._movie_row[movie_ids[in_range]]
+        return rows
     
     def _build_user_profile_hybrid(self, user_ratings=None, preferred_genres=None, 
                                    genre_weight=0.3, rating_weight=0.7):
@@ -35,60 +226,209 @@ class HybridRecommender:
         :param rating_weight: Weight of historical ratings (0-1)
         :return: Combined preference vector
         """
-        profile_from_ratings = np.zeros(len(self.genre_cols))
-        profile_from_genres = np.zeros(len(self.genre_cols))
-        
         # 1. Component: Historical ratings (observed behavior)
         if user_ratings and len(user_ratings) > 0:
-            total_weight = 0
-            for movie_id, rating in user_ratings:
-                if movie_id in self.movie_features.index:
-                    movie_vector = self.movie_features.loc[movie_id].values
-                    # Weight more the movies with better ratings
-                    profile_from_ratings += movie_vector * rating
-                    total_weight += rating
-            
-            if total_weight > 0:
-                profile_from_ratings /= total_weight
+            movie_ids, ratings = zip(*user_ratings)
+            profile_from_ratings = self._ratings_profile(movie_ids, ratings)
+        else:
+            profile_from_ratings = np.zeros(len(self.genre_cols), dtype=np.float32)
         
         # 2. Component: Explicit genres (declared preferences)
-        if preferred_genres and len(preferred_genres) > 0:
-            for i, genre in enumerate(self.genre_cols):
-                if genre in preferred_genres:
-                    profile_from_genres[i] = 1.0
+        profile_from_genres = self._genre_preference_vector(preferred_genres)
         
         # 3. Combine both profiles with configurable weights
         has_ratings = np.any(profile_from_ratings > 0)
         has_genres = np.any(profile_from_genres > 0)
         
         if has_ratings and has_genres:
-            # We have both signals → combine them
-            combined_profile = (rating_weight * profile_from_ratings + 
-                               genre_weight * profile_from_genres)
-            # Normalize to sum to 1
-            combined_profile /= (rating_weight + genre_weight)
             print(f"Using hybrid profile (ratings + genres)")
-            
         elif has_ratings:
-            # Only ratings
-            combined_profile = profile_from_ratings
             print(f"Using ratings-based profile only")
-            
         elif has_genres:
-            # Only genres
-            combined_profile = profile_from_genres
             print(f"Using genre-based profile only")
-            
         else:
-            # No information
-            combined_profile = np.zeros(len(self.genre_cols))
             print(f"No profile information available")
         
-        return combined_profile
+        return self._combine_profiles(profile_from_ratings, profile_from_genres,
+                                      genre_weight, rating_weight)
+    
+    def _ratings_profile(self, movie_ids, ratings):
+        """
+        Rating-weighted average of the genre vectors of the rated movies:
+        one gather from the genre matrix and one weighted sum.
+        Movies missing from the catalog are ignored.
+        """
+        rows = self._get_movie_rows(movie_ids)
+        weights = np.asarray(ratings, dtype=np.float32)
+        known = rows >= 0
+        rows, weights = rows[known], weights[known]
+        
+        total_weight = weights.sum()
+        if total_weight <= 0:
+            return np.zeros(len(self.genre_cols), dtype=np.float32)
+        # Weight more the movies with better ratings
+        return (weights @ self.genre_matrix_f[rows]) / total_weight
+    
+    def _genre_preference_vector(self, preferred_genres):
+        """Binary vector of the explicitly preferred genres."""
+        if isinstance(preferred_genres, str):
+            preferred_genres = preferred_genres.split('|')
+        if not preferred_genres:
+            return np.zeros(len(self.genre_cols), dtype=np.float32)
+        return np.isin(self.genre_cols, list(preferred_genres)).astype(np.float32)
+    
+    @staticmethod
+    def _combine_profiles(profile_from_ratings, profile_from_genres,
+                          genre_weight, rating_weight):
+        """
+        Combines rating and genre profiles. Works row-wise on (n_genres,) vectors
+        or (n_users, n_genres) matrices; weights may be scalars or (n_users, 1) arrays.
+        
+        - both signals → weighted average of both
+        - only one signal → that profile as-is
+        - no signal → zeros
+        """
+        has_ratings = np.any(profile_from_ratings > 0, axis=-1, keepdims=True)
+        has_genres = np.any(profile_from_genres > 0, axis=-1, keepdims=True)
+        
+        combined = ((rating_weight * profile_from_ratings + genre_weight * profile_from_genres)
+                    / (rating_weight + genre_weight))
+        combined = np.where(has_ratings & has_genres, combined,
+                            np.where(has_ratings, profile_from_ratings, profile_from_genres))
+        return combined.astype(np.float32)
+    
+    @staticmethod
+    def _profile_weights(num_ratings, genre_weight=0.3, rating_weight=0.7):
+        """
+        With fewer than 5 ratings the declared genres are trusted more than
+        the ratings. Accepts a scalar count or an array of counts.
+        """
+        few_ratings = np.asarray(num_ratings) < 5
+        return (np.where(few_ratings, 0.7, genre_weight),
+                np.where(few_ratings, 0.3, rating_weight))
+    
+    def _build_content_profile(self, user_ratings=None, preferred_genres=None,
+                               genre_weight=0.3, rating_weight=0.7):
+        """
+        Same hybrid profile as _build_user_profile_hybrid, but in the sparse
+        TF-IDF term space (genres, decades, tags) of self.content_features.
+        """
+        rows, ratings = None, None
+        if user_ratings:
+            movie_ids, ratings = zip(*user_ratings)
+            rows = self._get_movie_rows(movie_ids)
+            ratings = np.asarray(ratings, dtype=np.float32)[rows >= 0]
+            rows = rows[rows >= 0]
+        
+        return self.content_features.profile(
+            rows, ratings,
+            preferred_genres_vector=self._genre_preference_vector(preferred_genres),
+            genre_weight=genre_weight,
+            rating_weight=rating_weight,
+            combine=self._combine_profiles
+        )
+    
+    # ------------------------------------------------------------------
+    # Batch profiles (offline precompute / evaluation)
+    # ------------------------------------------------------------------
+    
+    def build_ratings_matrix(self, user_ids, movie_ids, ratings):
+        """
+        Builds a CSR ratings matrix (n_users, n_catalog_movies) aligned with the
+        catalog rows. Movies missing from the catalog are dropped.
+        
+        :param user_ids: Array of user ids (one per rating)
+        :param movie_ids: Array of movie ids (one per rating)
+        :param ratings: Array of rating values
+        :return: Tuple (csr_matrix, unique_user_ids) where row i belongs to unique_user_ids[i]
+        """
+        rows = self._get_movie_rows(movie_ids)
+        known = rows >= 0
+        unique_users, user_rows = np.unique(np.asarray(user_ids)[known], return_inverse=True)
+        
+        matrix = sparse.csr_matrix(
+            (np.asarray(ratings, dtype=np.float32)[known], (user_rows, rows[known])),
+            shape=(len(unique_users), len(self.movie_ids))
+        )
+        return matrix, unique_users
+    
+    def build_user_profiles_batch(self, ratings_matrix, preferred_genres=None,
+                                  genre_weight=0.3, rating_weight=0.7,
+                                  adaptive_weights=True):
+        """
+        Builds the hybrid profiles of many users at once.
+        
+        :param ratings_matrix: CSR matrix (n_users, n_catalog_movies) from build_ratings_matrix
+        :param preferred_genres: Optional list (one entry per user) of genre lists / pipe strings
+        :param adaptive_weights: If True, applies the same few-ratings reweighting
+                                 as recommend_for_new_user
+        :return: Array (n_users, n_genres) of profiles
+        """
+        ratings_matrix = sparse.csr_matrix(ratings_matrix)
+        
+        # Weighted sum of genre vectors and total weight per user (one sparse product each)
+        weighted = np.asarray(ratings_matrix @ self.genre_matrix_f, dtype=np.float32)
+        totals = np.asarray(ratings_matrix.sum(axis=1), dtype=np.float32)
+        from_ratings = np.divide(weighted, totals, out=np.zeros_like(weighted), where=totals > 0)
+        
+        if preferred_genres is not None:
+            from_genres = np.vstack([self._genre_preference_vector(g) for g in preferred_genres])
+        else:
+            from_genres = np.zeros_like(from_ratings)
+        
+        if adaptive_weights:
+            num_ratings = np.diff(ratings_matrix.indptr).reshape(-1, 1)
+            genre_weight, rating_weight = self._profile_weights(num_ratings, genre_weight, rating_weight)
+        
+        return self._combine_profiles(from_ratings, from_genres, genre_weight, rating_weight)
+    
+    def score_profiles_batch(self, profiles):
+        """
+        Cosine similarity of every profile against every catalog movie
+        in one matrix product.
+        
+        :param profiles: Array (n_users, n_genres)
+        :return: Array (n_users, n_catalog_movies) of similarities
+        """
+        profiles = np.asarray(profiles, dtype=np.float32)
+        norms = np.linalg.norm(profiles, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (profiles / norms) @ self.genre_unit.T
+    
+    def score_new_users_batch(self, ratings_df, preferences=None, min_user_id=10000,
+                              exclude_rated=True):
+        """
+        Scores every new user (id >= min_user_id) against the whole catalog.
+        
+        :param ratings_df: DataFrame with columns ['user_id', 'movie_id', 'rating']
+        :param preferences: Optional dict {user_id: preferred_genres}
+        :param exclude_rated: If True, already rated movies get a score of -inf
+        :return: Tuple (user_ids, scores) with scores shaped (n_users, n_catalog_movies)
+        """
+        new_ratings = ratings_df[ratings_df['user_id'] >= min_user_id]
+        ratings_matrix, user_ids = self.build_ratings_matrix(
+            new_ratings['user_id'].to_numpy(),
+            new_ratings['movie_id'].to_numpy(),
+            new_ratings['rating'].to_numpy()
+        )
+        
+        preferred_genres = None
+        if preferences:
+            preferred_genres = [preferences.get(int(uid)) for uid in user_ids]
+        
+        profiles = self.build_user_profiles_batch(ratings_matrix, preferred_genres)
+        scores = self.score_profiles_batch(profiles)
+        
+        if exclude_rated:
+            rated_users, rated_rows = ratings_matrix.nonzero()
+            scores[rated_users, rated_rows] = -np.inf
+        
+        return user_ids, scores
     
     def recommend_for_new_user(self, user_ratings=None, preferred_genres=None, 
                                n=10, genre_weight=0.3, rating_weight=0.7,
-                               exclude_rated=True, diversity_boost=False):
+                               exclude_rated=True, diversity_boost=False,
+                               mmr_lambda=None, user_profile=None, genres=None, decade=None):
         """
         Recommends movies for a NEW user combining ratings and genres.
         
@@ -99,64 +439,85 @@ class HybridRecommender:
         :param rating_weight: Importance of historical ratings (default 0.7)
         :param exclude_rated: If True, excludes already rated movies
         :param diversity_boost: If True, penalizes over-represented genres
-        :return: List of movie_ids
+        :param mmr_lambda: If set, re-ranks the top candidates with MMR over genre
+                           embeddings (1.0 = pure relevance, 0.0 = pure diversity)
+        :param user_profile: Precomputed hybrid profile (e.g. from the profile cache);
+                             built from the ratings and genres when None
+        :param genres: Only recommend movies of any of these genres (filter, not preference)
+        :param decade: Only recommend movies released in this decade (e.g. 1990)
+        :return: Columnar dict {'movie_id': [...], 'similarity_score': [...], 'genres': [...]}
+                 (popular movies with NaN scores when there is no profile information)
         """
         
         print("User ratings:",len(user_ratings) if user_ratings else 0)
         print("User preferences:",len(preferred_genres) if preferred_genres else 0)
         
         if(len(user_ratings or []) < 5):
-            genre_weight = 0.7
-            rating_weight = 0.3
+            genre_weight, rating_weight = self._profile_weights(len(user_ratings or []))
             print("Few ratings provided - increasing weight of genre preferences")
             
         # 1. Build hybrid profile
-        user_profile = self._build_user_profile_hybrid(
-            user_ratings=user_ratings,
-            preferred_genres=preferred_genres,
-            genre_weight=genre_weight,
-            rating_weight=rating_weight
-        )
+        if user_profile is None:
+            user_profile = self._build_user_profile_hybrid(
+                user_ratings=user_ratings,
+                preferred_genres=preferred_genres,
+                genre_weight=genre_weight,
+                rating_weight=rating_weight
+            )
         
         # If no information, use fallback
         if not np.any(user_profile > 0):
             print("No profile info - recommending popular items")
-            return self._recommend_popular(n)
-        
-        # 2. Calculate similarity with ALL movies
-        movie_features_matrix = self.movie_features.values
-        user_profile_reshaped = user_profile.reshape(1, -1)
+            movie_ids = self._recommend_popular(n, genres=genres, decade=decade)
+            return {
+                'movie_id': movie_ids,
+                'similarity_score': [float('nan')] * len(movie_ids),
+                'genres': [self._get_movie_genres(movie_id) for movie_id in movie_ids]
+            }
         
-        similarities = cosine_similarity(user_profile_reshaped, movie_features_matrix).flatten()
+        # 2. Calculate cosine similarity with ALL movies (rows are pre-normalized)
+        similarities = self.genre_unit @ self._unit_vector(user_profile)
         
         # 3. (Optional) Diversity boost: penalize already recommended genres
         if diversity_boost:
             print("Applying diversity boost to recommendations")
             similarities = self._apply_diversity_penalty(similarities, user_profile)
         
-        # 4. Sort by similarity
-        movie_indices = similarities.argsort()[::-1]
+        # 4. Mask already rated movies
+        if exclude_rated and user_ratings:
+            rated_rows = self._get_movie_rows([mid for mid, _ in user_ratings])
+            similarities[rated_rows[rated_rows >= 0]] = -np.inf
         
-        # 5. Filter already rated movies
-        rated_movie_ids = set([mid for mid, _ in (user_ratings or [])])
+        # 5. Genre / decade filter, applied before the top-N selection
+        row_mask, _ = self._filter_masks(genres, decade)
+        if row_mask is not None:
+            similarities[~row_mask] = -np.inf
         
-        recommendations = []
-        for idx in movie_indices:
-            movie_id = self.movie_features.index[idx]
-            
-            if exclude_rated and movie_id in rated_movie_ids:
-                continue
-                
-            recommendations.append({
-                'movie_id': movie_id,
-                'similarity_score': similarities[idx],
-                'genres': self._get_movie_genres(movie_id)
-            })
-            
-            if len(recommendations) >= n:
-                break
+        # 6. Partial sort: only the top n are ordered
+        if mmr_lambda is None:
+            top_rows = self._top_n_indices(similarities, n)
+        else:
+            pool = self._top_n_indices(similarities, n * self.mmr_pool_factor)
+            top_rows = pool[mmr_rerank(similarities[pool], self.genre_unit[pool], n, mmr_lambda)]
         
-        return recommendations
+        return {
+            'movie_id': self.movie_ids[top_rows].tolist(),
+            'similarity_score': similarities[top_rows].tolist(),
+            'genres': self._decode_genres(top_rows)
+        }
+    
+    @staticmethod
+    def _top_n_indices(scores, n):
+        """
+        Indices of the n highest finite scores, sorted descending.
+        Uses argpartition so only the selected n are fully sorted.
+        """
+        n = min(n, len(scores))
+        if n <= 0:
+            return np.empty(0, dtype=np.int64)
+        top = np.argpartition(-scores, n - 1)[:n]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return top[np.isfinite(scores[top])]
     
     def _apply_diversity_penalty(self, similarities, user_profile, penalty_factor=0.2):
         """
@@ -165,52 +526,97 @@ class HybridRecommender:
         genre_dominance = user_profile / (user_profile.sum() + 1e-10)
         
         # For each movie, calculate how much overlap it has with dominant genres
-        movie_features_matrix = self.movie_features.values
-        overlap = movie_features_matrix @ genre_dominance
+        overlap = self.genre_matrix_f @ genre_dominance.astype(np.float32)
         
         # Penalize similarities of highly overlapped movies
         penalized_similarities = similarities * (1 - penalty_factor * overlap)
         
         return penalized_similarities
     
+    @staticmethod
+    def _unit_vector(vector):
+        """Returns the L2-normalized float32 copy of a profile vector."""
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+    
+    def _decode_genres(self, rows):
+        """Decodes the genre bitmasks of many catalog rows at once."""
+        names = self._genre_names_by_bits
+        return [list(names[bits]) for bits in self.genre_bits[rows].tolist()]
+    
     def _get_movie_genres(self, movie_id):
         """Returns list of genres for a movie"""
-        if movie_id in self.movie_features.index:
-            genres = self.movie_features.loc[movie_id]
-            return [self.genre_cols[i] for i, val in enumerate(genres) if val == 1]
+        row = self._get_movie_row(movie_id)
+        if row >= 0:
+            return list(self._genre_names_by_bits[int(self.genre_bits[row])])
         return []
     
-    def recommend_for_existing_user(self, user_id, n=10):
+    def recommend_for_existing_user(self, user_id, n=10, mmr_lambda=None, genres=None, decade=None):
         """
         Recommends for an EXISTING user in the SVD model.
+        
+        :param mmr_lambda: If set, re-ranks the top candidates with MMR over the
+                           latent item factors (1.0 = pure relevance, 0.0 = pure diversity)
+        :param genres: Only recommend movies of any of these genres
+        :param decade: Only recommend movies released in this decade (e.g. 1990)
         """
-        return self.svd_model.recommend_top_n(user_id, n=n)
+        _, svd_mask = self._filter_masks(genres, decade)
+        if mmr_lambda is None:
+            if svd_mask is None:
+                return self.svd_model.recommend_top_n(user_id, n=n)
+            return self.svd_model.recommend_top_n(user_id, n=n, movie_mask=svd_mask)
+        
+        scores = self._collaborative_scores(user_id)
+        if svd_mask is not None:
+            scores[~svd_mask] = -np.inf
+        pool = self._top_n_indices(scores, n * self.mmr_pool_factor)
+        movie_ids = self.svd_movie_ids[pool]
+        selected = mmr_rerank(scores[pool], self._item_embeddings(movie_ids, 'latent'), n, mmr_lambda)
+        return movie_ids[selected].tolist()
     
-    def _recommend_popular(self, n=10):
-        """Fallback: most popular/best rated movies."""
-        train_df = self.svd_model.train
-        movie_stats = train_df.groupby('movie_id').agg({
-            'rating': ['mean', 'count']
-        }).reset_index()
-        
-        movie_stats.columns = ['movie_id', 'rating_mean', 'rating_count']
-        
-        # Filter movies with at least 50 ratings
-        popular = movie_stats[movie_stats['rating_count'] >= 50]
-        
-        # Calculate combined score (Bayesian average)
-        C = popular['rating_count'].mean()
-        m = popular['rating_mean'].mean()
-        
-        popular['bayesian_avg'] = (
-            (popular['rating_count'] / (popular['rating_count'] + C)) * popular['rating_mean'] +
-            (C / (popular['rating_count'] + C)) * m
-        )
+    def _collaborative_scores(self, user_id):
+        """
+        SVD predictions of a trained user over every SVD column, with the
+        movies they already rated set to -inf.
+        """
+        user_idx = self.svd_model.users_id2index[user_id]
+        scores = np.array(self.svd_model.Y_hat[user_idx], dtype=np.float32)
+        seen_cols = self._get_svd_cols(self._get_seen_movie_ids(user_id))
+        scores[seen_cols[seen_cols >= 0]] = -np.inf
+        return scores
+    
+    def _item_embeddings(self, movie_ids, space='latent'):
+        """
+        L2-normalized embeddings of the given movies, used for diversity.
         
-        popular = popular.sort_values('bayesian_avg', ascending=False)
-        return popular['movie_id'].head(n).tolist()
+        :param space: 'latent' (SVD item factors) or 'genre' (genre vectors).
+                      Movies missing from the chosen space get a zero vector.
+        """
+        if space == 'latent':
+            cols = self._get_svd_cols(movie_ids)
+            table = self.item_neighbours.item_unit
+        else:
+            cols = self._get_movie_rows(movie_ids)
+            table = self.genre_unit
+        embeddings = np.zeros((len(cols), table.shape[1]), dtype=np.float32)
+        embeddings[cols >= 0] = table[cols[cols >= 0]]
+        return embeddings
+    
+    def _recommend_popular(self, n=10, genres=None, decade=None):
+        """Fallback: most popular/best rated movies (Bayesian average, precomputed)."""
+        row_mask, _ = self._filter_masks(genres, decade)
+        if row_mask is None:
+            return self.rating_stats.top_popular(n)
+        
+        popular = self.rating_stats.popular_movie_ids
+        rows = self._get_movie_rows(popular)
+        keep = rows >= 0
+        keep[keep] = row_mask[rows[keep]]
+        return popular[keep][:n].tolist()
     
-    def predict_rating(self, user_id, movie_id, user_ratings=None, preferred_genres=None):
+    def predict_rating(self, user_id, movie_id, user_ratings=None, preferred_genres=None,
+                       user_profile=None):
         """
         Predicts the rating a user would give to a specific movie.
         
@@ -218,6 +624,7 @@ class HybridRecommender:
         :param movie_id: Movie ID
         :param user_ratings: List of tuples [(movie_id, rating), ...] (for new users)
         :param preferred_genres: List of strings (for new users)
+        :param user_profile: Precomputed hybrid profile (for new users, optional)
         :return: Dict with rating prediction (1-5) and confidence level
         """
         
@@ -226,9 +633,7 @@ class HybridRecommender:
             predicted_rating = self.svd_model.predict_score(user_id, movie_id)
             
             # Calculate confidence based on how many ratings the user has
-            user_rating_count = len(self.svd_model.train[
-                self.svd_model.train.user_id == user_id
-            ])
+            user_rating_count = self.rating_stats.user_rating_count(user_id)
             
             # Normalize confidence (max 100 ratings = confidence 1.0)
             confidence = min(user_rating_count / 100.0, 1.0)
@@ -244,15 +649,18 @@ class HybridRecommender:
             return self._predict_rating_content_based(
                 movie_id, 
                 user_ratings, 
-                preferred_genres
+                preferred_genres,
+                user_profile
             )
     
-    def _predict_rating_content_based(self, movie_id, user_ratings=None, preferred_genres=None):
+    def _predict_rating_content_based(self, movie_id, user_ratings=None, preferred_genres=None,
+                                      user_profile=None):
         """
         Predicts rating using content similarity (for new users).
         """
         
-        if movie_id not in self.movie_features.index:
+        row = self._get_movie_row(movie_id)
+        if row < 0:
             # Movie not found → return average rating
             return {
                 'predicted_rating': 3.0,
@@ -261,10 +669,11 @@ class HybridRecommender:
             }
         
         # 1. Build user profile
-        user_profile = self._build_user_profile_hybrid(
-            user_ratings=user_ratings,
-            preferred_genres=preferred_genres
-        )
+        if user_profile is None:
+            user_profile = self._build_user_profile_hybrid(
+                user_ratings=user_ratings,
+                preferred_genres=preferred_genres
+            )
         
         # 2. If no profile, use global average rating of the movie
         if not np.any(user_profile > 0):
@@ -275,11 +684,8 @@ class HybridRecommender:
                 'method': 'movie_average'
             }
         
-        # 3. Calculate similarity between user profile and movie
-        movie_vector = self.movie_features.loc[movie_id].values.reshape(1, -1)
-        user_profile_reshaped = user_profile.reshape(1, -1)
-        
-        similarity = cosine_similarity(user_profile_reshaped, movie_vector)[0][0]
+        # 3. Calculate cosine similarity between user profile and movie
+        similarity = float(self.genre_unit[row] @ self._unit_vector(user_profile))
         
         # 4. Convert similarity (0-1) to rating (1-5)
         # Mapping: similarity 0 = rating 1, similarity 1 = rating 5
@@ -303,15 +709,7 @@ class HybridRecommender:
     
     def _get_movie_average_rating(self, movie_id):
         """Gets the average rating of a movie from the training dataset."""
-        train_df = self.svd_model.train
-        
-        movie_ratings = train_df[train_df.movie_id == movie_id]['rating']
-        
-        if len(movie_ratings) > 0:
-            return float(movie_ratings.mean())
-        else:
-            # Fallback: global average rating
-            return float(train_df['rating'].mean())
+        return self.rating_stats.movie_average(movie_id)
     
     def will_user_like(self, user_id, movie_id, user_ratings=None, 
                       preferred_genres=None, threshold=3.5):
@@ -381,31 +779,85 @@ class HybridRecommender:
         return explanation
     
     def batch_predict_ratings(self, user_id, movie_ids, user_ratings=None, 
-                             preferred_genres=None):
+                             preferred_genres=None, user_profile=None):
         """
-        Predicts ratings for multiple movies (efficient).
+        Predicts ratings for multiple movies at once. The user profile is built
+        a single time and all movies are scored with vector operations.
         
+        :param user_id: User ID
         :param movie_ids: List of movie IDs
-        :return: DataFrame with predictions
+        :param user_ratings: List of tuples [(movie_id, rating), ...] (for new users)
+        :param preferred_genres: List of strings (for new users)
+        :param user_profile: Precomputed hybrid profile (for new users, optional)
+        :return: Columnar dict {'movie_id', 'predicted_rating', 'confidence', 'method'}
+                 sorted by predicted_rating (descending)
         """
-        predictions = []
+        movie_ids = np.asarray(movie_ids, dtype=np.int64)
         
-        for movie_id in movie_ids:
-            pred = self.predict_rating(
-                user_id, 
-                movie_id, 
-                user_ratings, 
-                preferred_genres
+        if user_id in self.svd_model.users_id2index:
+            predicted, confidence, method = self._batch_predict_collaborative(user_id, movie_ids)
+        else:
+            predicted, confidence, method = self._batch_predict_content_based(
+                movie_ids, user_ratings, preferred_genres, user_profile
             )
-            
-            predictions.append({
-                'movie_id': movie_id,
-                'predicted_rating': pred['predicted_rating'],
-                'confidence': pred['confidence'],
-                'method': pred['method']
-            })
         
-        return pd.DataFrame(predictions).sort_values('predicted_rating', ascending=False)
+        order = np.argsort(-predicted, kind='stable')
+        return {
+            'movie_id': movie_ids[order].tolist(),
+            'predicted_rating': predicted[order].tolist(),
+            'confidence': confidence[order].tolist(),
+            'method': method[order].tolist()
+        }
+    
+    def _batch_predict_collaborative(self, user_id, movie_ids):
+        """Vectorized collaborative predictions: one gather from the user's Y_hat row."""
+        cols = self._get_svd_cols(movie_ids)
+        trained = cols >= 0
+        
+        # Unknown movies score 0 (same as SVDCF.predict_score) and are clipped to 1
+        predicted = np.zeros(len(movie_ids))
+        user_idx = self.svd_model.users_id2index[user_id]
+        predicted[trained] = self.svd_model.Y_hat[user_idx, cols[trained]]
+        
+        confidence = min(self.rating_stats.user_rating_count(user_id) / 100.0, 1.0)
+        return (np.clip(predicted, 1, 5),
+                np.full(len(movie_ids), confidence),
+                np.full(len(movie_ids), 'collaborative_filtering', dtype=object))
+    
+    def _batch_predict_content_based(self, movie_ids, user_ratings=None, preferred_genres=None,
+                                     user_profile=None):
+        """Vectorized version of _predict_rating_content_based over many movies."""
+        rows = self._get_movie_rows(movie_ids)
+        known = rows >= 0
+        
+        # Movies not in the catalog → fallback mean
+        predicted = np.full(len(movie_ids), 3.0)
+        confidence = np.zeros(len(movie_ids))
+        method = np.full(len(movie_ids), 'fallback_mean', dtype=object)
+        if not np.any(known):
+            return predicted, confidence, method
+        
+        if user_profile is None:
+            user_profile = self._build_user_profile_hybrid(
+                user_ratings=user_ratings,
+                preferred_genres=preferred_genres
+            )
+        movie_avg = self.rating_stats.movie_averages(movie_ids[known])
+        
+        if not np.any(user_profile > 0):
+            predicted[known] = movie_avg
+            confidence[known] = 0.1
+            method[known] = 'movie_average'
+            return predicted, confidence, method
+        
+        similarity = self.genre_unit[rows[known]] @ self._unit_vector(user_profile)
+        
+        # Same mapping and regularization as the single-movie prediction
+        alpha = 0.3
+        predicted[known] = np.clip((1 - alpha) * (1 + similarity * 4) + alpha * movie_avg, 1, 5)
+        confidence[known] = min(len(user_ratings or []) / 20.0, 0.8) if user_ratings else 0.2
+        method[known] = 'content_based'
+        return predicted, confidence, method
     
     def explain_recommendation(self, movie_id, user_profile):
         """
@@ -415,10 +867,11 @@ class HybridRecommender:
         :param user_profile: User profile vector
         :return: String with explanation
         """
-        if movie_id not in self.movie_features.index:
+        row = self._get_movie_row(movie_id)
+        if row < 0:
             return "Movie not found"
         
-        movie_vector = self.movie_features.loc[movie_id].values
+        movie_vector = self.genre_matrix_f[row]
         movie_genres = self._get_movie_genres(movie_id)
         
         # Calculate contribution of each genre
@@ -0,0 +1,72 @@
+import numpy as np
+
+
+class CatalogIndex:
+    """
+    Inverted indexes over the catalog rows, built once at model load:
+
+    - genre -> sorted array of the rows having that genre
+    - release decade (1990, 2000, ...) -> sorted array of rows
+
+    Filters are turned into a boolean row mask with a few scatter writes,
+    so constrained recommendations can mask the scores before top-N
+    selection instead of over-fetching and filtering afterwards.
+    """
+
+    def __init__(self, genre_matrix, genre_cols, release_years):
+        """
+        :param genre_matrix: (n_movies, n_genres) one-hot genre matrix
+        :param genre_cols: Genre names (columns of genre_matrix)
+        :param release_years: Array of release years (NaN if unknown), one per row
+        """
+        self.n_rows = genre_matrix.shape[0]
+        self.genre_cols = list(genre_cols)
+
+        self.rows_by_genre = {
+            genre: np.flatnonzero(genre_matrix[:, g]) for g, genre in enumerate(self.genre_cols)
+        }
+
+        years = np.asarray(release_years, dtype=np.float64)
+        has_year = ~np.isnan(years)
+        decades = np.full(self.n_rows, -1, dtype=np.int64)
+        decades[has_year] = (years[has_year] // 10 * 10).astype(np.int64)
+        self.rows_by_decade = {
+            int(decade): np.flatnonzero(decades == decade) for decade in np.unique(decades[has_year])
+        }
+
+    @property
+    def decades(self):
+        return sorted(self.rows_by_decade)
+
+    def validate(self, genres):
+        """Raises ValueError for unknown genres."""
+        invalid = [g for g in (genres or []) if g not in self.rows_by_genre]
+        if invalid:
+            raise ValueError(f"Invalid genres: {invalid}. Allowed genres: {self.genre_cols}")
+
+    def mask(self, genres=None, decade=None):
+        """
+        Boolean mask over catalog rows. A row matches if it has ANY of the
+        genres and was released in the decade (any year of it, e.g. 1995 -> 1990s).
+
+        :param genres: List of genre names (or a single name); None = no genre filter
+        :param decade: Year or decade; None = no decade filter
+        :return: Array (n_rows,) of bool, or None if no filter was requested
+        """
+        if isinstance(genres, str):
+            genres = [genres]
+        if not genres and decade is None:
+            return None
+        self.validate(genres)
+
+        mask = np.ones(self.n_rows, dtype=bool)
+        if genres:
+            mask[:] = False
+            for genre in genres:
+                mask[self.rows_by_genre[genre]] = True
+
+        if decade is not None:
+            decade_mask = np.zeros(self.n_rows, dtype=bool)
+            decade_mask[self.rows_by_decade.get(int(decade) // 10 * 10, [])] = True
+            mask &= decade_mask
+        return mask
@@ -0,0 +1,157 @@
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from app.services.recommenders.item_neighbours import ItemNeighbourTable, normalize_rows
+
+
+def load_tags(tags_path):
+    """
+    Loads and cleans a tags file (same cleaning as the 10M notebook).
+
+    Accepts the MovieLens `tags.dat` format (user_id::movie_id::tag::timestamp)
+    or a CSV with at least the columns ['movie_id', 'tag'].
+
+    :return: DataFrame with columns ['movie_id', 'tag'], or None if the file does not exist
+    """
+    if not tags_path or not os.path.exists(tags_path):
+        return None
+
+    if tags_path.endswith('.dat'):
+        tags_df = pd.read_csv(
+            tags_path, sep="::", engine="python", header=None, encoding="latin-1",
+            names=["user_id", "movie_id", "tag", "timestamp"]
+        )
+    else:
+        tags_df = pd.read_csv(tags_path)
+
+    # 1) drop rows with missing essentials
+    tags_df = tags_df.dropna(subset=["movie_id", "tag"])
+    # 2) normalize tag text
+    tags_df["tag"] = tags_df["tag"].astype(str).str.strip().str.lower()
+    # 3) drop empty tags after cleaning
+    tags_df = tags_df[tags_df["tag"] != ""]
+    # 4) remove exact duplicate tag events
+    tags_df = tags_df.drop_duplicates()
+
+    return tags_df[["movie_id", "tag"]]
+
+
+class ContentFeatures:
+    """
+    Sparse TF-IDF content representation of the catalog.
+
+    Terms are genres ("genre:Action"), release-decade buckets ("decade:1990")
+    and, when a tags file is available, user tags ("tag:dystopia"). The matrix
+    is built in one vectorized pass and its rows are L2-normalized, so the
+    cosine similarity against a profile is a single sparse dot product.
+    """
+
+    def __init__(self, movie_ids, genre_matrix, genre_cols, release_years,
+                 tags_df=None, min_tag_count=20, neighbours_k=50):
+        """
+        :param movie_ids: Array of movie ids, one per catalog row
+        :param genre_matrix: (n_movies, n_genres) one-hot genre matrix aligned with movie_ids
+        :param genre_cols: Genre names (columns of genre_matrix)
+        :param release_years: Array of release years (NaN if unknown)
+        :param tags_df: Optional DataFrame ['movie_id', 'tag'] (see load_tags)
+        :param min_tag_count: Tags used fewer times than this are dropped as noise
+        :param neighbours_k: Number of content neighbours precomputed per movie
+        """
+        n_movies = len(movie_ids)
+        rows, cols, counts, terms = [], [], [], []
+
+        # 1) Genres
+        genre_rows, genre_idx = np.nonzero(genre_matrix)
+        rows.append(genre_rows)
+        cols.append(genre_idx)
+        counts.append(np.ones(len(genre_rows)))
+        terms.extend(f"genre:{g}" for g in genre_cols)
+        self.genre_term_idx = np.arange(len(genre_cols))
+
+        # 2) Release decade buckets
+        years = pd.to_numeric(pd.Series(release_years), errors='coerce').to_numpy()
+        has_year = ~np.isnan(years)
+        decades = (years[has_year] // 10 * 10).astype(np.int64)
+        unique_decades, decade_idx = np.unique(decades, return_inverse=True)
+        rows.append(np.flatnonzero(has_year))
+        cols.append(decade_idx + len(terms))
+        counts.append(np.ones(len(decade_idx)))
+        self.decades = unique_decades
+        terms.extend(f"decade:{d}" for d in unique_decades)
+
+        # 3) Tags (term frequency = number of times the movie was tagged)
+        if tags_df is not None and len(tags_df) > 0:
+            movie_rows = pd.Series(np.arange(n_movies), index=movie_ids)
+            tag_rows = tags_df["movie_id"].map(movie_rows)
+            tags_df = tags_df[tag_rows.notna()]
+            tag_rows = tag_rows.dropna().to_numpy(dtype=np.int64)
+
+            tag_counts = tags_df["tag"].value_counts()
+            kept_tags = tag_counts[tag_counts >= min_tag_count].index
+            kept = tags_df["tag"].isin(kept_tags).to_numpy()
+            tag_codes, tag_names = pd.factorize(tags_df["tag"][kept])
+
+            pairs = pd.DataFrame({"row": tag_rows[kept], "tag": tag_codes}).value_counts()
+            rows.append(pairs.index.get_level_values("row").to_numpy())
+            cols.append(pairs.index.get_level_values("tag").to_numpy() + len(terms))
+            counts.append(np.log1p(pairs.to_numpy(dtype=np.float64)))
+            terms.extend(f"tag:{t}" for t in tag_names)
+
+        self.terms = terms
+        counts_matrix = sparse.csr_matrix(
+            (np.concatenate(counts), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(n_movies, len(terms)), dtype=np.float32
+        )
+
+        # Smoothed inverse document frequency
+        document_freq = np.bincount(counts_matrix.indices, minlength=len(terms))
+        self.idf = (np.log((1 + n_movies) / (1 + document_freq)) + 1).astype(np.float32)
+
+        self.matrix = normalize_rows(counts_matrix @ sparse.diags(self.idf))
+        self.neighbours = ItemNeighbourTable(self.matrix, k=neighbours_k)
+
+    def profile(self, rows, ratings=None, preferred_genres_vector=None,
+                genre_weight=0.3, rating_weight=0.7, combine=None):
+        """
+        Dense term-space profile: rating-weighted average of the rated movies'
+        TF-IDF rows, optionally combined with the declared genres.
+
+        :param rows: Catalog rows of the rated movies (unknown rows already removed)
+        :param ratings: Rating of each row
+        :param preferred_genres_vector: Binary (n_genres,) vector of declared genres
+        :param combine: Function combining (from_ratings, from_genres, genre_weight, rating_weight)
+        :return: Array (n_terms,)
+        """
+        n_terms = len(self.terms)
+        from_ratings = np.zeros(n_terms, dtype=np.float32)
+        if rows is not None and len(rows) > 0:
+            weights = np.asarray(ratings, dtype=np.float32)
+            if weights.sum() > 0:
+                from_ratings = np.asarray(self.matrix[rows].T @ weights).ravel() / weights.sum()
+
+        from_genres = np.zeros(n_terms, dtype=np.float32)
+        if preferred_genres_vector is not None:
+            from_genres[self.genre_term_idx] = preferred_genres_vector * self.idf[self.genre_term_idx]
+            norm = np.linalg.norm(from_genres)
+            if norm > 0:
+                from_genres /= norm
+
+        if combine is None:
+            return from_ratings + from_genres
+        return combine(from_ratings, from_genres, genre_weight, rating_weight)
+
+    def score(self, profile, rows=None):
+        """
+        Cosine similarity between a profile and the catalog (or a subset of rows):
+        one sparse matrix-vector product.
+        """
+        profile = np.asarray(profile, dtype=np.float32)
+        norm = np.linalg.norm(profile)
+        if norm == 0:
+            n = self.matrix.shape[0] if rows is None else len(rows)
+            return np.zeros(n, dtype=np.float32)
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        return np.asarray(matrix @ (profile / norm)).ravel()
@@ -0,0 +1,49 @@
+import numpy as np
+
+
+def mmr_rerank(relevance, embeddings, n, lambda_=0.7):
+    """
+    Maximal Marginal Relevance selection over a candidate list.
+
+    At every step picks the candidate maximizing
+        lambda * relevance - (1 - lambda) * max_similarity_to_selected
+    The max-similarity vector is updated incrementally with the similarities
+    of the item just selected, so the total cost is O(n * candidates * k)
+    instead of re-scoring every pair at every step.
+
+    :param relevance: Array (m,) of candidate scores (higher is better)
+    :param embeddings: Array (m, k) of L2-normalized candidate embeddings
+    :param n: Number of items to select
+    :param lambda_: Trade-off between relevance (1.0) and diversity (0.0)
+    :return: Array of selected candidate positions, in selection order
+    """
+    relevance = np.asarray(relevance, dtype=np.float32)
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    m = len(relevance)
+    n = min(n, m)
+    if n <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    # Min-max scale relevance so lambda_ weighs terms of comparable range
+    spread = relevance.max() - relevance.min()
+    relevance = (relevance - relevance.min()) / spread if spread > 0 else np.zeros(m, dtype=np.float32)
+
+    # No penalty before the first pick; then the max over the selected items,
+    # which may be negative (items opposite to every pick are favoured)
+    max_similarity = np.zeros(m, dtype=np.float32)
+    available = np.ones(m, dtype=bool)
+    selected = np.empty(n, dtype=np.int64)
+
+    for step in range(n):
+        mmr = lambda_ * relevance - (1 - lambda_) * max_similarity
+        mmr[~available] = -np.inf
+        best = int(np.argmax(mmr))
+        selected[step] = best
+        available[best] = False
+        similarity = embeddings @ embeddings[best]
+        if step == 0:
+            max_similarity = similarity
+        else:
+            np.maximum(max_similarity, similarity, out=max_similarity)
+
+    return selected
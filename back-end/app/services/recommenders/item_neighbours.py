@@ -0,0 +1,174 @@
+import hashlib
+
+import numpy as np
+from scipy import sparse
+
+
+def normalize_rows(matrix):
+    """
+    Returns a float32 copy of matrix with L2-normalized rows (zero rows stay zero).
+    Sparse input gives a CSR matrix, dense input a contiguous array.
+    """
+    if sparse.issparse(matrix):
+        matrix = sparse.csr_matrix(matrix, dtype=np.float32)
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sparse.csr_matrix(sparse.diags(1.0 / norms) @ matrix, dtype=np.float32)
+
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(matrix / norms)
+
+
+def dedupe_keep_best(ids, scores):
+    """
+    Removes duplicated ids keeping the highest score of each one.
+
+    :return: Tuple (ids, scores) sorted by score (descending)
+    """
+    ids = np.asarray(ids, dtype=np.int64)
+    scores = np.asarray(scores, dtype=np.float32)
+    order = np.argsort(-scores, kind='stable')
+    ids, scores = ids[order], scores[order]
+    _, first = np.unique(ids, return_index=True)
+    first.sort()
+    return ids[first], scores[first]
+
+
+class ItemNeighbourTable:
+    """
+    Precomputed top-K cosine neighbours of every item, built once from an
+    item embedding matrix (e.g. SVD item factors or genre vectors).
+
+    Lookups at request time are O(K) per query item instead of a full scan
+    of the catalog.
+    """
+
+    def __init__(self, item_vectors, k=50, block_size=1024):
+        """
+        :param item_vectors: Array or sparse matrix (n_items, n_dims), one embedding per item
+        :param k: Number of neighbours kept per item (the item itself is excluded)
+        :param block_size: Rows of the similarity matrix materialized at once
+        """
+        self.item_unit = normalize_rows(item_vectors)
+        n_items = self.item_unit.shape[0]
+        self.k = max(0, min(k, n_items - 1))
+
+        self.indices = np.zeros((n_items, self.k), dtype=np.int32)
+        self.scores = np.zeros((n_items, self.k), dtype=np.float32)
+
+        if self.k == 0:
+            return
+
+        # Blocked similarity so memory stays O(block_size * n_items)
+        for start in range(0, n_items, block_size):
+            stop = min(start + block_size, n_items)
+            sims = self.item_unit[start:stop] @ self.item_unit.T
+            if sparse.issparse(sims):
+                sims = sims.toarray()
+            sims[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+
+            top = np.argpartition(-sims, self.k - 1, axis=1)[:, :self.k]
+            top_scores = np.take_along_axis(sims, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind='stable')
+
+            self.indices[start:stop] = np.take_along_axis(top, order, axis=1)
+            self.scores[start:stop] = np.take_along_axis(top_scores, order, axis=1)
+
+    def neighbours(self, item_index, n=None):
+        """
+        Nearest neighbours of one item.
+
+        :param item_index: Row of the item in the embedding matrix
+        :param n: Number of neighbours (defaults to all K)
+        :return: Tuple (indices, scores) sorted by similarity (descending)
+        """
+        n = self.k if n is None else min(n, self.k)
+        return self.indices[item_index, :n], self.scores[item_index, :n]
+
+    def neighbours_of_many(self, item_indices, weights=None):
+        """
+        Union of the neighbours of several items. Each neighbour keeps its best
+        (weighted) similarity.
+
+        :param item_indices: Rows of the query items
+        :param weights: Optional weight per query item (e.g. its rating)
+        :return: Tuple (indices, scores) sorted by score (descending)
+        """
+        item_indices = np.asarray(item_indices, dtype=np.int64)
+        if len(item_indices) == 0 or self.k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        indices = self.indices[item_indices].ravel()
+        scores = self.scores[item_indices]
+        if weights is not None:
+            scores = scores * np.asarray(weights, dtype=np.float32).reshape(-1, 1)
+        scores = scores.ravel()
+
+        return dedupe_keep_best(indices, scores)
+
+
+class ItemSimilarityIndex:
+    """
+    Similar-items lookups served from item factors only.
+
+    Holds the movie ids, their latent factors and a top-K ItemNeighbourTable,
+    nothing else of the model they come from (no reconstructed rating matrix
+    or training data). Indexes are identified by a content hash of ids and
+    factors, so two registry entries trained to the same factors share one
+    neighbour table.
+    """
+
+    def __init__(self, movie_ids, item_factors, neighbours=None, k=50):
+        """
+        :param movie_ids: Movie id of every row of item_factors
+        :param item_factors: Array (n_items, n_factors)
+        :param neighbours: Already built ItemNeighbourTable over these factors (optional)
+        :param k: Neighbours kept per item when the table is built here
+        """
+        self.movie_ids = np.asarray(movie_ids, dtype=np.int64)
+        self.item_factors = np.ascontiguousarray(np.ma.getdata(item_factors), dtype=np.float32)
+        self.k = k
+        self.neighbours = neighbours
+        self._rows = {int(movie_id): row for row, movie_id in enumerate(self.movie_ids)}
+
+        digest = hashlib.sha256()
+        digest.update(self.movie_ids.tobytes())
+        digest.update(f"{self.item_factors.shape}".encode())
+        digest.update(self.item_factors.tobytes())
+        self.content_key = digest.hexdigest()
+
+    @classmethod
+    def from_svd(cls, svd_model, k=50):
+        """Keeps only the item factors (Vt.T) and movie ids of an SVDCF"""
+        movie_ids = [svd_model.movies_index2id[i] for i in range(svd_model.Vt.shape[1])]
+        return cls(movie_ids, np.asarray(svd_model.Vt).T, k=k)
+
+    def build_neighbours(self):
+        """Builds the neighbour table unless it was given or already built"""
+        if self.neighbours is None:
+            self.neighbours = ItemNeighbourTable(self.item_factors, k=self.k)
+        return self
+
+    def recommend_similar_items(self, movie_id, n=5):
+        """
+        Top N most similar movies by cosine similarity of their factors
+        (same contract as SVDCF.recommend_similar_items).
+
+        :return: List of tuples (similar_movie_id, similarity_score)
+        """
+        row = self._rows.get(movie_id)
+        if row is None:
+            return []
+        self.build_neighbours()
+
+        if n <= self.neighbours.k:
+            indices, scores = self.neighbours.neighbours(row, n)
+        else:
+            # Beyond the precomputed K: exact scan of the catalog
+            sims = self.neighbours.item_unit @ self.neighbours.item_unit[row]
+            sims[row] = -np.inf
+            indices = np.argsort(-sims, kind='stable')[:min(n, len(sims) - 1)]
+            scores = sims[indices]
+        return [(int(self.movie_ids[i]), float(score)) for i, score in zip(indices, scores)]
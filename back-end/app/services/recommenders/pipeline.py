@@ -0,0 +1,433 @@
+"""
+Two-stage recommendation pipeline:
+
+1. Candidate generation - cheap sources (CF top-K, latent and content
+   neighbours of recent ratings, genre popularity, trending) each return a few
+   hundred movie ids.
+   Their ranked lists are merged with a k-way heap merge.
+2. Re-ranking - hybrid scoring, filters and diversity are applied only to the
+   merged candidate set.
+
+Per-request work is bounded by the number of candidates instead of the catalog
+size, and every stage is timed.
+"""
+import heapq
+import logging
+import time
+from abc import ABC, abstractmethod
+
+import numpy as np
+import pandas as pd
+
+from app.services.recommenders.diversity import mmr_rerank
+from app.services.recommenders.item_neighbours import dedupe_keep_best
+from app.services.recommenders.profile_cache import CachedUserProfile
+
+logger = logging.getLogger(__name__)
+
+
+class RecommendationContext:
+    """Request-level inputs shared by every stage of the pipeline."""
+
+    def __init__(self, user_id, user_ratings=None, preferred_genres=None,
+                 diversity_boost=True, mmr_lambda=None, cached_profile=None):
+        """
+        :param user_id: User ID
+        :param user_ratings: List of tuples [(movie_id, rating), ...]
+        :param preferred_genres: List of strings (or pipe-separated string)
+        :param diversity_boost: If True, the re-ranker diversifies the results
+        :param mmr_lambda: If set, diversity uses MMR with this relevance weight
+                           instead of the genre-overlap penalty
+        :param cached_profile: CachedUserProfile from the profile cache; when given,
+                               its ratings, genres and vectors are used as-is
+        """
+        if cached_profile is None:
+            cached_profile = CachedUserProfile(user_id, user_ratings, preferred_genres)
+        self.user_id = user_id
+        self.cached_profile = cached_profile
+        self.user_ratings = cached_profile.user_ratings
+        self.preferred_genres = cached_profile.preferred_genres
+        self.diversity_boost = diversity_boost
+        self.mmr_lambda = mmr_lambda
+
+    def profile(self, recommender):
+        """Hybrid user profile, built once and shared by the stages."""
+        return self.cached_profile.genre_profile(recommender)
+
+    def content_profile(self, recommender):
+        """Profile in the sparse TF-IDF content space, built once."""
+        return self.cached_profile.content_profile(recommender)
+
+    def latent(self, recommender):
+        """Fold-in latent vector of the user's ratings (None if no trained movie was rated)."""
+        return self.cached_profile.latent(recommender)
+
+
+class PipelineStage:
+    """Base class of every pipeline stage. `name` is used as the timing key."""
+
+    name = "stage"
+
+    def __init__(self, recommender):
+        self.recommender = recommender
+
+
+# ============================================================================
+# Stage 1 - Candidate sources
+# ============================================================================
+
+class CandidateSource(PipelineStage, ABC):
+    """A cheap generator of candidate movie ids."""
+
+    def __init__(self, recommender, k=200):
+        super().__init__(recommender)
+        self.k = k
+
+    @abstractmethod
+    def generate(self, context):
+        """
+        :param context: RecommendationContext
+        :return: Tuple (movie_ids, scores) sorted by score (descending), at most k items
+        """
+
+
+class CollaborativeSource(CandidateSource):
+    """
+    Top-K unseen movies of the user's SVD prediction row. New users are
+    folded into the latent space from their ratings. Trained users with an
+    offline top-N (scored by the same model) are served from it instead of
+    scoring the catalog; the re-ranker drops their newer ratings.
+    """
+
+    name = "collaborative"
+
+    def generate(self, context):
+        rec = self.recommender
+        precomputed = context.cached_profile.precomputed
+        if precomputed is not None and len(precomputed[0]) > 0:
+            movie_ids, scores = precomputed
+            return movie_ids[:self.k], scores[:self.k]
+        if context.user_id in rec.svd_model.users_id2index:
+            scores = rec._collaborative_scores(context.user_id)
+        else:
+            latent = context.latent(rec)
+            if latent is None:
+                return _empty()
+            scores = rec._fold_in_scores(latent)
+        top = rec._top_n_indices(scores, self.k)
+        return rec.svd_movie_ids[top], scores[top]
+
+
+class ItemNeighbourSource(CandidateSource):
+    """Latent neighbours of the user's most recent well-rated movies."""
+
+    name = "item_neighbours"
+
+    def __init__(self, recommender, k=200, recent=10, min_rating=4):
+        super().__init__(recommender, k)
+        self.recent = recent
+        self.min_rating = min_rating
+
+    def generate(self, context):
+        rec = self.recommender
+        liked = [(mid, r) for mid, r in context.user_ratings if r >= self.min_rating]
+        liked = liked[-self.recent:]
+        if not liked:
+            return _empty()
+
+        movie_ids, ratings = zip(*liked)
+        cols = rec._get_svd_cols(movie_ids)
+        trained = cols >= 0
+        neighbour_cols, scores = rec.item_neighbours.neighbours_of_many(
+            cols[trained], weights=np.asarray(ratings)[trained] / 5.0
+        )
+        return rec.svd_movie_ids[neighbour_cols][:self.k], scores[:self.k]
+
+
+class ContentNeighbourSource(ItemNeighbourSource):
+    """
+    Content (TF-IDF) neighbours of the user's most recent well-rated movies.
+    Also works for movies unknown to the SVD model.
+    """
+
+    name = "content_neighbours"
+
+    def generate(self, context):
+        rec = self.recommender
+        liked = [(mid, r) for mid, r in context.user_ratings if r >= self.min_rating]
+        liked = liked[-self.recent:]
+        if not liked:
+            return _empty()
+
+        movie_ids, ratings = zip(*liked)
+        rows = rec._get_movie_rows(movie_ids)
+        known = rows >= 0
+        neighbour_rows, scores = rec.content_features.neighbours.neighbours_of_many(
+            rows[known], weights=np.asarray(ratings)[known] / 5.0
+        )
+        return rec.movie_ids[neighbour_rows][:self.k], scores[:self.k]
+
+
+class GenrePopularitySource(CandidateSource):
+    """
+    Most popular movies of the user's preferred (or dominant profile) genres.
+    Users with no genre signal get the global popularity ranking.
+    """
+
+    name = "genre_popularity"
+
+    def __init__(self, recommender, k=200, top_genres=3):
+        super().__init__(recommender, k)
+        self.top_genres = top_genres
+
+        # Popularity ranking split per genre, computed once
+        popular = recommender.rating_stats.popular_movie_ids
+        rows = recommender._get_movie_rows(popular)
+        popular, rows = popular[rows >= 0], rows[rows >= 0]
+        self._popular_by_genre = [
+            popular[recommender.genre_matrix[rows, g] > 0]
+            for g in range(len(recommender.genre_cols))
+        ]
+
+    def generate(self, context):
+        rec = self.recommender
+        genre_idx = np.flatnonzero(rec._genre_preference_vector(context.preferred_genres))
+        if len(genre_idx) == 0:
+            profile = context.profile(rec)
+            genre_idx = np.argsort(-profile, kind='stable')[:self.top_genres]
+            genre_idx = genre_idx[profile[genre_idx] > 0]
+        if len(genre_idx) == 0:
+            popular = rec.rating_stats.popular_movie_ids[:self.k]
+            return popular, 1.0 - np.arange(len(popular), dtype=np.float32) / max(len(popular), 1)
+
+        ids, scores = [], []
+        for g in genre_idx:
+            ranked = self._popular_by_genre[g][:self.k]
+            ids.append(ranked)
+            scores.append(1.0 - np.arange(len(ranked)) / max(len(ranked), 1))
+        ids, scores = dedupe_keep_best(np.concatenate(ids), np.concatenate(scores))
+        return ids[:self.k], scores[:self.k]
+
+
+class TrendingSource(CandidateSource):
+    """Most rated movies in the last `window_days` of the training data."""
+
+    name = "trending"
+
+    def __init__(self, recommender, k=200, window_days=30):
+        super().__init__(recommender, k)
+        train = recommender.svd_model.train
+        movie_ids = train['movie_id'].to_numpy(dtype=np.int64)
+
+        if 'timestamp' in train.columns:
+            timestamps = pd.to_datetime(train['timestamp'], errors='coerce')
+            recent = (timestamps >= timestamps.max() - pd.Timedelta(days=window_days)).to_numpy()
+            movie_ids = movie_ids[recent]
+
+        # Ranking computed once; requests only slice it
+        counts = np.bincount(movie_ids) if len(movie_ids) else np.zeros(0, dtype=np.int64)
+        ranked = np.argsort(-counts, kind='stable')
+        ranked = ranked[counts[ranked] > 0][:k]
+        self._ids = ranked.astype(np.int64)
+        self._scores = (counts[ranked] / max(counts[ranked].max(), 1)).astype(np.float32) \
+            if len(ranked) else np.zeros(0, dtype=np.float32)
+
+    def generate(self, context):
+        return self._ids, self._scores
+
+
+def _empty():
+    return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+
+def merge_candidates(ranked_lists, max_candidates=500):
+    """
+    k-way merge of several ranked id lists using a heap. Items are ordered by
+    their relative rank inside their own list, so sources with different score
+    scales are interleaved fairly. Duplicates keep their best position.
+
+    :param ranked_lists: List of movie id arrays, each sorted best-first
+    :param max_candidates: Maximum number of merged candidates
+    :return: Array of unique movie ids, best-first
+    """
+    def ranked(source_idx, ids):
+        size = len(ids)
+        for position, movie_id in enumerate(ids.tolist()):
+            yield position / size, source_idx, movie_id
+
+    merged = []
+    seen = set()
+    streams = [ranked(i, ids) for i, ids in enumerate(ranked_lists) if len(ids) > 0]
+    for _, _, movie_id in heapq.merge(*streams):
+        if movie_id in seen:
+            continue
+        seen.add(movie_id)
+        merged.append(movie_id)
+        if len(merged) >= max_candidates:
+            break
+    return np.asarray(merged, dtype=np.int64)
+
+
+# ============================================================================
+# Stage 2 - Re-ranking
+# ============================================================================
+
+class HybridReRanker(PipelineStage):
+    """
+    Scores the candidate set with the hybrid model, removes already rated
+    movies and (optionally) diversifies the final list.
+    """
+
+    name = "rerank"
+
+    def __init__(self, recommender, cf_weight=0.7, penalty_factor=0.2, prior_weight=0.01):
+        """
+        :param cf_weight: Weight of the collaborative score for trained users (0-1)
+        :param penalty_factor: Strength of the genre-overlap diversity penalty
+        :param prior_weight: Weight of the candidate-merge order, used to break ties
+        """
+        super().__init__(recommender)
+        self.cf_weight = cf_weight
+        self.penalty_factor = penalty_factor
+        self.prior_weight = prior_weight
+
+    def filter(self, context, candidate_ids):
+        """Drops movies outside the catalog and movies the user already rated."""
+        rec = self.recommender
+        rows = rec._get_movie_rows(candidate_ids)
+        keep = rows >= 0
+
+        rated = [mid for mid, _ in context.user_ratings]
+        excluded = np.concatenate((np.asarray(rated, dtype=np.int64),
+                                   rec._get_seen_movie_ids(context.user_id)))
+        if len(excluded) > 0:
+            keep &= ~np.isin(candidate_ids, excluded)
+        return candidate_ids[keep], rows[keep], np.flatnonzero(keep)
+
+    def score(self, context, movie_ids, rows):
+        """
+        Hybrid score of each candidate: TF-IDF content similarity (one sparse
+        dot product over the candidates), blended with CF for trained users.
+        """
+        rec = self.recommender
+        profile = context.content_profile(rec)
+        has_profile = np.any(profile > 0)
+
+        content = rec.content_features.score(profile, rows)
+
+        user_idx = rec.svd_model.users_id2index.get(context.user_id)
+        if user_idx is None:
+            return content
+
+        cols = rec._get_svd_cols(movie_ids)
+        cf = np.zeros(len(movie_ids), dtype=np.float32)
+        trained = cols >= 0
+        # Map the 1-5 rating scale to 0-1 so it is comparable with cosine similarity
+        cf[trained] = np.clip((rec.svd_model.Y_hat[user_idx, cols[trained]] - 1) / 4.0, 0, 1)
+
+        if not has_profile:
+            return cf
+        return self.cf_weight * cf + (1 - self.cf_weight) * content
+
+    def diversify(self, context, scores, rows):
+        """Penalizes candidates that overlap the user's dominant genres."""
+        profile = context.profile(self.recommender)
+        if not context.diversity_boost or context.mmr_lambda is not None or not np.any(profile > 0):
+            return scores
+        genre_dominance = (profile / (profile.sum() + 1e-10)).astype(np.float32)
+        overlap = self.recommender.genre_matrix_f[rows] @ genre_dominance
+        return scores * (1 - self.penalty_factor * overlap)
+
+    def select_mmr(self, context, movie_ids, scores, n):
+        """
+        MMR selection over the candidates: latent item factors for trained
+        users, genre vectors for new users.
+        """
+        rec = self.recommender
+        space = 'latent' if context.user_id in rec.svd_model.users_id2index else 'genre'
+        return mmr_rerank(scores, rec._item_embeddings(movie_ids, space), n, context.mmr_lambda)
+
+    def rerank(self, context, candidate_ids, n):
+        """
+        :return: Columnar dict {'movie_id': [...], 'score': [...]}
+        """
+        movie_ids, rows, positions = self.filter(context, candidate_ids)
+        if len(movie_ids) == 0:
+            return {'movie_id': [], 'score': []}
+
+        scores = self.score(context, movie_ids, rows)
+        scores = self.diversify(context, scores, rows)
+
+        # Candidate-merge order as a small prior (also ranks cold users with no signal)
+        scores = scores + self.prior_weight * (1 - positions / max(len(candidate_ids), 1))
+
+        scores = np.asarray(scores, dtype=np.float32)
+        if context.mmr_lambda is None:
+            top = self.recommender._top_n_indices(scores, n)
+        else:
+            top = self.select_mmr(context, movie_ids, scores, n)
+        return {
+            'movie_id': movie_ids[top].tolist(),
+            'score': np.asarray(scores)[top].tolist()
+        }
+
+
+# ============================================================================
+# Pipeline
+# ============================================================================
+
+class RecommendationPipeline:
+    """Runs the candidate sources, merges them and re-ranks the merged set."""
+
+    def __init__(self, sources, reranker, max_candidates=500):
+        self.sources = sources
+        self.reranker = reranker
+        self.max_candidates = max_candidates
+
+    def run(self, context, n=10, deadline=None):
+        """
+        :param context: RecommendationContext
+        :param n: Number of recommendations
+        :param deadline: Optional Deadline, checked before every stage
+                         (raises DeadlineExceeded when the budget is exhausted)
+        :return: Columnar dict {'movie_id', 'score', 'timings'} (timings in ms per stage)
+        """
+        timings = {}
+
+        ranked_lists = []
+        for source in self.sources:
+            if deadline is not None:
+                deadline.check(source.name)
+            start = time.perf_counter()
+            ids, _ = source.generate(context)
+            timings[source.name] = (time.perf_counter() - start) * 1000
+            ranked_lists.append(ids)
+
+        start = time.perf_counter()
+        candidates = merge_candidates(ranked_lists, self.max_candidates)
+        timings["merge"] = (time.perf_counter() - start) * 1000
+
+        if deadline is not None:
+            deadline.check(self.reranker.name)
+        start = time.perf_counter()
+        result = self.reranker.rerank(context, candidates, n)
+        timings[self.reranker.name] = (time.perf_counter() - start) * 1000
+
+        result['timings'] = timings
+        logger.info(
+            f"Pipeline for user {context.user_id}: {len(candidates)} candidates, "
+            + ", ".join(f"{name}={ms:.2f}ms" for name, ms in timings.items())
+        )
+        return result
+
+
+def build_default_pipeline(recommender, candidates_per_source=200, max_candidates=500):
+    """Pipeline with the standard candidate sources and the hybrid re-ranker."""
+    sources = [
+        CollaborativeSource(recommender, k=candidates_per_source),
+        ItemNeighbourSource(recommender, k=candidates_per_source),
+        ContentNeighbourSource(recommender, k=candidates_per_source),
+        GenrePopularitySource(recommender, k=candidates_per_source),
+        TrendingSource(recommender, k=candidates_per_source),
+    ]
+    return RecommendationPipeline(sources, HybridReRanker(recommender), max_candidates)
@@ -0,0 +1,110 @@
+import threading
+
+from cachetools import LRUCache
+
+
+class CachedUserProfile:
+    """
+    Everything derived from one version of a user's ratings and preferences:
+    the raw inputs loaded from the DB plus the profile vectors built from them.
+
+    Vectors are built lazily, the first time a request needs them, and then
+    reused by every later request until the user's rating version changes.
+    """
+
+    def __init__(self, user_id, user_ratings=None, preferred_genres=None, version=None, precomputed=None):
+        """
+        :param user_id: User ID
+        :param user_ratings: List of tuples [(movie_id, rating), ...]
+        :param preferred_genres: List of strings (or pipe-separated string)
+        :param version: User rating version the inputs were read at (None = not cacheable)
+        :param precomputed: Optional offline top-N (movie_ids, scores) of the user,
+                            scored by the model serving them (see UserTopN)
+        """
+        self.user_id = user_id
+        self.user_ratings = list(user_ratings or [])
+        self.preferred_genres = preferred_genres
+        self.version = version
+        self.precomputed = precomputed
+        self._genre_profiles = {}
+        self._content_profile = None
+        self._latent = None
+
+    def genre_profile(self, recommender, genre_weight=None, rating_weight=None):
+        """
+        Hybrid genre-space profile. Without explicit weights the recommender's
+        default weighting for this number of ratings is used.
+        """
+        if genre_weight is None or rating_weight is None:
+            genre_weight, rating_weight = recommender._profile_weights(len(self.user_ratings))
+        key = (float(genre_weight), float(rating_weight))
+        if key not in self._genre_profiles:
+            self._genre_profiles[key] = recommender._build_user_profile_hybrid(
+                user_ratings=self.user_ratings,
+                preferred_genres=self.preferred_genres,
+                genre_weight=key[0],
+                rating_weight=key[1]
+            )
+        return self._genre_profiles[key]
+
+    def content_profile(self, recommender):
+        """Profile in the sparse TF-IDF content space."""
+        if self._content_profile is None:
+            genre_weight, rating_weight = recommender._profile_weights(len(self.user_ratings))
+            self._content_profile = recommender._build_content_profile(
+                user_ratings=self.user_ratings,
+                preferred_genres=self.preferred_genres,
+                genre_weight=genre_weight,
+                rating_weight=rating_weight
+            )
+        return self._content_profile
+
+    def latent(self, recommender):
+        """Fold-in SVD latent vector of the user's ratings."""
+        if self._latent is None:
+            self._latent = recommender.fold_in_user(self.user_ratings)
+        return self._latent
+
+
+class UserProfileCache:
+    """
+    Bounded LRU of CachedUserProfile objects, one slot per user.
+
+    Entries are stamped with the user's rating version (incremented on every
+    rating or preference write), so a stale entry is never served: a lookup
+    with a newer version is a miss and the new entry replaces the old one.
+    """
+
+    def __init__(self, maxsize=10000):
+        self._cache = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id, version):
+        """Returns the cached profile of the user at this version, or None."""
+        with self._lock:
+            entry = self._cache.get(user_id)
+            if entry is not None and entry.version == version:
+                self.hits += 1
+                return entry
+            self.misses += 1
+            return None
+
+    def put(self, profile):
+        """Stores a profile (replacing any older version of the same user) and returns it."""
+        with self._lock:
+            self._cache[profile.user_id] = profile
+        return profile
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._cache.pop(user_id, None)
+
+    def clear(self):
+        """Drops every entry (e.g. after a model swap, since vectors depend on the model)."""
+        with self._lock:
+            self._cache.clear()
+
+    def __len__(self):
+        return len(self._cache)
@@ -0,0 +1,79 @@
+import numpy as np
+
+
+class RatingStats:
+    """
+    Snapshot of the rating aggregates of a training set, computed once at
+    model load so request-time lookups never scan the ratings DataFrame.
+    
+    Arrays are dense and indexed directly by movie_id / user_id.
+    """
+    
+    def __init__(self, train_df, min_ratings=50):
+        """
+        :param train_df: DataFrame with columns ['user_id', 'movie_id', 'rating']
+        :param min_ratings: Minimum number of ratings for a movie to enter the popularity ranking
+        """
+        movie_ids = train_df['movie_id'].to_numpy(dtype=np.int64)
+        user_ids = train_df['user_id'].to_numpy(dtype=np.int64)
+        ratings = train_df['rating'].to_numpy(dtype=np.float64)
+        
+        self.global_mean = float(ratings.mean()) if len(ratings) > 0 else 3.0
+        
+        # Per-movie count / sum / mean
+        self.movie_count = np.bincount(movie_ids)
+        self.movie_sum = np.bincount(movie_ids, weights=ratings)
+        self.movie_mean = np.divide(
+            self.movie_sum, self.movie_count,
+            out=np.full(len(self.movie_count), np.nan), where=self.movie_count > 0
+        )
+        
+        # Per-user count
+        self.user_count = np.bincount(user_ids)
+        
+        self.min_ratings = min_ratings
+        self.popular_movie_ids = self._bayesian_ranking(min_ratings)
+    
+    def _bayesian_ranking(self, min_ratings):
+        """
+        Movie ids with at least min_ratings ratings, sorted by Bayesian average.
+        If no movie reaches min_ratings, every rated movie by rating count.
+        """
+        candidates = np.flatnonzero(self.movie_count >= min_ratings)
+        if len(candidates) == 0:
+            rated = np.flatnonzero(self.movie_count > 0)
+            return rated[np.argsort(-self.movie_count[rated], kind='stable')]
+        
+        counts = self.movie_count[candidates].astype(np.float64)
+        means = self.movie_mean[candidates]
+        
+        C = counts.mean()
+        m = means.mean()
+        bayesian_avg = (counts / (counts + C)) * means + (C / (counts + C)) * m
+        
+        return candidates[np.argsort(-bayesian_avg, kind='stable')]
+    
+    def top_popular(self, n=10):
+        """Returns the n most popular movie ids."""
+        return self.popular_movie_ids[:n].tolist()
+    
+    def movie_average(self, movie_id):
+        """Average rating of a movie, or the global average if it has no ratings."""
+        if 0 <= movie_id < len(self.movie_count) and self.movie_count[movie_id] > 0:
+            return float(self.movie_mean[movie_id])
+        return self.global_mean
+    
+    def movie_averages(self, movie_ids):
+        """Vectorized movie_average for an array of movie ids."""
+        movie_ids = np.asarray(movie_ids, dtype=np.int64)
+        averages = np.full(movie_ids.shape, self.global_mean)
+        in_range = (movie_ids >= 0) & (movie_ids < len(self.movie_count))
+        in_range[in_range] = self.movie_count[movie_ids[in_range]] > 0
+        averages[in_range] = self.movie_mean[movie_ids[in_range]]
+        return averages
+    
+    def user_rating_count(self, user_id):
+        """Number of training ratings of a user (0 if unknown)."""
+        if 0 <= user_id < len(self.user_count):
+            return int(self.user_count[user_id])
+        return 0
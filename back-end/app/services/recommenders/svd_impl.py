@@ -1,7 +1,5 @@
 import numpy as np
 import pandas as pd
-from scipy.linalg import sqrtm
-from sklearn.metrics.pairwise import cosine_similarity
 
 class SVDCF:
     """
@@ -76,6 +74,7 @@ class SVDCF:
         self.Vt = Vt
         
         # Reconstruct the matrix (prediction)
+        from scipy.linalg import sqrtm  # Deferred: only needed to fit, not to serve
         S_root = sqrtm(S)
         USk = np.dot(U, S_root)
         SkV = np.dot(S_root, Vt)
@@ -93,39 +92,39 @@ class SVDCF:
         else:
             return 0 # Cold start or unknown item
 
-    def recommend_top_n(self, user_id, n=5):
+    def recommend_top_n(self, user_id, n=5, movie_mask=None):
         """
         Returns top N movie recommendations for a user.
         Excludes movies the user has already seen (in training set).
+        :param movie_mask: Optional boolean array over the columns of Y_hat.
+                           Movies whose entry is False are never recommended.
         """
         if user_id not in self.users_id2index:
             return []
             
-        # 1. Get all movie IDs the user has already rated
-        seen_items = self.train[self.train.user_id == user_id].movie_id.values
-        
-        # 2. Identify indices of ALL movies
-        all_movie_indices = np.arange(self.Y_hat.shape[1])
-        
-        # 3. Get the user's row from the predicted matrix
+        # 1. Get the user's row from the predicted matrix (a copy, masked below)
         user_idx = self.users_id2index[user_id]
-        user_predictions = self.Y_hat[user_idx, :]
-        
-        # 4. Filter predictions
-        recommendations = []
-        for movie_idx in all_movie_indices:
-            movie_id = self.movies_index2id[movie_idx]
-            
-            # Only recommend if not seen
-            if movie_id not in seen_items:
-                score = user_predictions[movie_idx]
-                recommendations.append((movie_id, score))
-        
-        # 5. Sort by score descending and take top N
-        recommendations.sort(key=lambda x: x[1], reverse=True)
+        scores = np.array(np.ma.getdata(self.Y_hat[user_idx, :]), dtype=np.float64)
+        
+        # 2. Exclude the movies the user has already rated
+        seen_items = self.train.movie_id.values[self.train.user_id.values == user_id]
+        seen_cols = [self.movies_id2index[m] for m in seen_items if m in self.movies_id2index]
+        allowed = np.ones(len(scores), dtype=bool)
+        allowed[seen_cols] = False
+        if movie_mask is not None:
+            allowed &= movie_mask
+        scores[~allowed] = -np.inf
+        
+        # 3. Top N by score with argpartition, only those N are sorted
+        n = min(n, len(scores))
+        if n <= 0:
+            return []
+        top = np.argpartition(-scores, n - 1)[:n]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        top = top[np.isfinite(scores[top])]
         
         # Return only the movie_ids
-        return [rec[0] for rec in recommendations[:n]]
+        return [self.movies_index2id[idx] for idx in top]
     
     def recommend_similar_items(self, movie_id, n=5):
         """
@@ -151,6 +150,7 @@ class SVDCF:
         
         # 3. Compute Cosine Similarity between this movie and ALL other movies
         # Result shape: (1, n_movies)
+        from sklearn.metrics.pairwise import cosine_similarity  # Deferred: slow to import
         sim_scores = cosine_similarity(query_vector, item_matrix).flatten()
         
         # 4. Get indices of top N scores
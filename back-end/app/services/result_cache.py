@@ -0,0 +1,61 @@
+"""
+Cache of the final recommendation pages served to each user
+"""
+import threading
+
+from cachetools import TTLCache
+
+
+class UserResultCache:
+    """
+    Bounded TTL + LRU cache of ranked recommendation pages, one slot per user.
+    Pages hold movie ids, not movie details, so a hit still serves the
+    current rating statistics.
+
+    A slot holds every page of the user (keyed by n and filters) and is
+    stamped with the user's rating version and the model bundle generation:
+    a lookup with a newer stamp is a miss and the new page replaces the whole
+    slot. Writes in this process also invalidate the slot directly, and
+    slots expire after `ttl_seconds` regardless.
+    """
+
+    def __init__(self, maxsize=10000, ttl_seconds=300, pages_per_user=8):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl_seconds)
+        self._lock = threading.Lock()
+        self.pages_per_user = pages_per_user
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id, version, page_key):
+        """Returns the cached page of the user at this version, or None."""
+        with self._lock:
+            slot = self._cache.get(user_id)
+            if slot is not None and slot[0] == version and page_key in slot[1]:
+                self.hits += 1
+                return slot[1][page_key]
+            self.misses += 1
+            return None
+
+    def put(self, user_id, version, page_key, page):
+        """Stores a page, dropping the user's pages of any other version."""
+        with self._lock:
+            slot = self._cache.get(user_id)
+            if slot is None or slot[0] != version:
+                slot = (version, {})
+                self._cache[user_id] = slot
+            elif len(slot[1]) >= self.pages_per_user and page_key not in slot[1]:
+                slot[1].pop(next(iter(slot[1])))
+            slot[1][page_key] = page
+        return page
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._cache.pop(user_id, None)
+
+    def clear(self):
+        """Drops every entry (e.g. after a model swap)."""
+        with self._lock:
+            self._cache.clear()
+
+    def __len__(self):
+        return len(self._cache)
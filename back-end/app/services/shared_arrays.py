@@ -0,0 +1,326 @@
+"""
+Model objects shared between the worker processes of a host
+"""
+import hashlib
+import io
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no host-wide lock, sharing is disabled
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Pickled object (without its large arrays) stored in every segment
+OBJECT_BLOB = "object"
+# Smaller arrays stay in the pickle
+MIN_SHARED_BYTES = 4096
+
+
+class SharedArrayStore:
+    """
+    Host-wide store of read-only model arrays, backed by memory-mapped .npy
+    files (under /dev/shm by default, i.e. RAM). Every worker process that
+    loads the same model maps the same pages instead of keeping its own copy.
+
+    Layout:
+        <root>/<key>/<name>.npy     one file per array
+        <root>/<key>/<name>.blob    small pickled parts (the object without its arrays)
+        <root>/<key>/refs/<pid>     one lease file per process using the segment,
+                                    holding the start time of that process
+        <root>/.lock                host-wide lock (flock) guarding publish/release
+        <root>/.build-<key>         lock (flock) held while a worker builds a segment
+
+    Segments are keyed by what they are built from (e.g. the artifact digest),
+    so a worker looks the key up before loading or building anything: the
+    first worker of the host builds and publishes the segment, the others
+    wait on its build lock and attach. A process holds a lease per model
+    bundle that uses the segment; when the last lease on the host is released
+    (hot swap, shutdown) the segment is removed. Leases of dead processes,
+    or of a reused pid (different start time), are ignored. Removing the
+    files never invalidates mappings already open, so requests in flight on
+    a previous bundle finish normally.
+    """
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+        self._leases: Dict[str, int] = {}  # key -> leases held by this process
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def available() -> bool:
+        return fcntl is not None
+
+    @staticmethod
+    def content_key(arrays: Dict[str, np.ndarray], blobs: Optional[Dict[str, bytes]] = None) -> str:
+        """sha256 over the names, dtypes, shapes and contents of the arrays (and blobs)"""
+        digest = hashlib.sha256()
+        for name in sorted(arrays):
+            array = np.ascontiguousarray(arrays[name])
+            digest.update(f"{name}:{array.dtype.str}:{array.shape}".encode())
+            digest.update(memoryview(array).cast("B"))
+        for name in sorted(blobs or {}):
+            digest.update(f"{name}:blob".encode())
+            digest.update(blobs[name])
+        return digest.hexdigest()
+
+    @contextmanager
+    def _flock(self, file_name: str):
+        os.makedirs(self.root_dir, exist_ok=True)
+        with open(os.path.join(self.root_dir, file_name), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _host_lock(self):
+        return self._flock(".lock")
+
+    def build_lock(self, key: str):
+        """Serializes the workers of the host building the same segment"""
+        return self._flock(f".build-{key}")
+
+    def publish(self, key: str, arrays: Dict[str, np.ndarray],
+                blobs: Optional[Dict[str, bytes]] = None) -> Tuple[Dict[str, np.ndarray], Dict[str, bytes]]:
+        """
+        Publishes a segment (unless another worker already did) and takes a lease on it.
+
+        Returns:
+            Tuple ({name: read-only memory-mapped array}, {name: blob})
+        """
+        segment = os.path.join(self.root_dir, key)
+        with self._lock, self._host_lock():
+            if not os.path.isdir(segment):
+                self._write_segment(segment, arrays, blobs or {})
+                logger.info(f"Shared model segment published: {key[:12]} ({len(arrays)} arrays)")
+            self._acquire(key)
+            return self._map(segment)
+
+    def open(self, key: str) -> Optional[Tuple[Dict[str, np.ndarray], Dict[str, bytes]]]:
+        """
+        Takes a lease on a segment published by any worker of the host.
+
+        Returns:
+            Tuple ({name: read-only memory-mapped array}, {name: blob}),
+            None if no segment is published under this key
+        """
+        segment = os.path.join(self.root_dir, key)
+        with self._lock, self._host_lock():
+            if not os.path.isdir(segment):
+                return None
+            self._acquire(key)
+            return self._map(segment)
+
+    @staticmethod
+    def _map(segment: str) -> Tuple[Dict[str, np.ndarray], Dict[str, bytes]]:
+        arrays, blobs = {}, {}
+        for file_name in os.listdir(segment):
+            name, extension = os.path.splitext(file_name)
+            path = os.path.join(segment, file_name)
+            if extension == ".npy":
+                arrays[name] = np.load(path, mmap_mode="r")
+            elif extension == ".blob":
+                with open(path, "rb") as f:
+                    blobs[name] = f.read()
+        return arrays, blobs
+
+    def _write_segment(self, segment: str, arrays: Dict[str, np.ndarray], blobs: Dict[str, bytes]):
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=self.root_dir)
+        try:
+            for name, array in arrays.items():
+                # np.save keeps Fortran order, so the mapped array has the layout of the original
+                np.save(os.path.join(staging, f"{name}.npy"), array)
+            for name, blob in blobs.items():
+                with open(os.path.join(staging, f"{name}.blob"), "wb") as f:
+                    f.write(blob)
+            os.makedirs(os.path.join(staging, "refs"))
+            os.replace(staging, segment)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    def acquire(self, key: str):
+        """Takes one more lease on a segment this process already attached"""
+        with self._lock, self._host_lock():
+            self._acquire(key)
+
+    def _acquire(self, key: str):
+        if self._leases.get(key, 0) == 0:
+            with open(os.path.join(self.root_dir, key, "refs", str(os.getpid())), "w") as f:
+                f.write(_process_start_time(os.getpid()) or "")
+        self._leases[key] = self._leases.get(key, 0) + 1
+
+    def release(self, key: str):
+        """Drops one lease; the segment is removed once no live process holds one"""
+        with self._lock, self._host_lock():
+            count = self._leases.get(key, 0) - 1
+            if count > 0:
+                self._leases[key] = count
+                return
+            self._leases.pop(key, None)
+            try:
+                os.remove(os.path.join(self.root_dir, key, "refs", str(os.getpid())))
+            except OSError:
+                pass
+            self._collect()
+
+    def _collect(self):
+        """Removes the segments no live process holds a lease on (caller holds the host lock)"""
+        for key in os.listdir(self.root_dir):
+            refs_dir = os.path.join(self.root_dir, key, "refs")
+            if key.startswith(".") or not os.path.isdir(refs_dir):
+                continue
+            live = 0
+            for pid in os.listdir(refs_dir):
+                lease = os.path.join(refs_dir, pid)
+                with open(lease) as f:
+                    start_time = f.read().strip()
+                if _lease_alive(int(pid), start_time):
+                    live += 1
+                else:
+                    os.remove(lease)
+            if live == 0:
+                shutil.rmtree(os.path.join(self.root_dir, key), ignore_errors=True)
+                try:
+                    os.remove(os.path.join(self.root_dir, f".build-{key}"))
+                except OSError:
+                    pass
+                logger.info(f"Shared model segment released: {key[:12]}")
+
+
+def _process_start_time(pid: int) -> Optional[str]:
+    """Start time of a process in clock ticks since boot (Linux), None if unknown"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # Field 22; the command name (field 2) may contain spaces, so split after it
+    return stat.rsplit(")", 1)[1].split()[19]
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _lease_alive(pid: int, start_time: str) -> bool:
+    """Whether the process that took a lease still runs (not just some process with its pid)"""
+    if not _pid_alive(pid):
+        return False
+    current = _process_start_time(pid)
+    return not start_time or current is None or current == start_time
+
+
+def _shareable(value) -> Optional[np.ndarray]:
+    """The array to store in the segment for a pickled value, None to pickle it as usual"""
+    if isinstance(value, np.ma.MaskedArray):
+        if np.ma.is_masked(value):
+            return None
+        # Nothing masked: served as the plain array
+        value = np.ma.getdata(value)
+    if type(value) not in (np.ndarray, np.memmap):
+        return None
+    if value.dtype.kind not in "biufcmM" or value.nbytes < MIN_SHARED_BYTES:
+        return None
+    return value
+
+
+def dump_shared(obj, externals: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, np.ndarray], bytes]:
+    """
+    Pickles an object with its large numeric arrays taken out, wherever they
+    are in the object graph (attributes, DataFrame blocks, sparse matrices...)
+
+    Args:
+        externals: {name: object} pickled by reference only (e.g. the SVD model
+            a HybridRecommender points to), to be passed again to load_shared
+
+    Returns:
+        Tuple ({name: array}, pickle)
+    """
+    external_names = {id(value): name for name, value in (externals or {}).items()}
+    arrays: Dict[str, np.ndarray] = {}
+    names: Dict[int, str] = {}
+    # Arrays created while pickling must stay alive, or their id could be reused
+    seen = []
+
+    def persistent_id(value):
+        if id(value) in external_names:
+            return ("external", external_names[id(value)])
+        array = _shareable(value)
+        if array is None:
+            return None
+        name = names.get(id(value))
+        if name is None:
+            seen.append(value)
+            name = names[id(value)] = f"a{len(arrays)}"
+            arrays[name] = array
+        return ("array", name)
+
+    buffer = io.BytesIO()
+    pickler = pickle.Pickler(buffer, protocol=pickle.HIGHEST_PROTOCOL)
+    pickler.persistent_id = persistent_id
+    pickler.dump(obj)
+    return arrays, buffer.getvalue()
+
+
+def load_shared(blob: bytes, arrays: Dict[str, np.ndarray], externals: Optional[Dict[str, Any]] = None):
+    """Inverse of dump_shared: the object, with its arrays taken from `arrays` (no copies)"""
+    unpickler = pickle.Unpickler(io.BytesIO(blob))
+    unpickler.persistent_load = lambda pid: arrays[pid[1]] if pid[0] == "array" else externals[pid[1]]
+    return unpickler.load()
+
+
+def share_object(store: SharedArrayStore, build: Callable[[], Any], key: Optional[str] = None,
+                 externals: Optional[Dict[str, Any]] = None) -> Tuple[Any, str]:
+    """
+    An equivalent of build() whose large arrays are read-only views on the
+    shared store, with a lease on its segment.
+
+    With a key, a segment another worker already published is opened without
+    calling build(); otherwise this worker builds the object (the other
+    workers of the host wait for it) and publishes it. Without a key, the
+    object is built and published under the content hash of its parts.
+
+    Args:
+        build: Callable returning the object (e.g. loading the model)
+        key: Segment key, derived from what the object is built from
+        externals: Objects referenced but not stored (see dump_shared)
+
+    Returns:
+        Tuple (object, segment key) - the key is to be released with the object
+    """
+    if key is None:
+        arrays, blob = dump_shared(build(), externals)
+        blobs = {OBJECT_BLOB: blob}
+        key = store.content_key(arrays, blobs)
+        shared = store.publish(key, arrays, blobs)
+    else:
+        shared = store.open(key)
+        if shared is None:
+            with store.build_lock(key):
+                shared = store.open(key)
+                if shared is None:
+                    arrays, blob = dump_shared(build(), externals)
+                    shared = store.publish(key, arrays, {OBJECT_BLOB: blob})
+    try:
+        return load_shared(shared[1][OBJECT_BLOB], shared[0], externals), key
+    except Exception:
+        store.release(key)
+        raise
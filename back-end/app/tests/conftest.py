@@ -0,0 +1,160 @@
+"""
+Shared fixtures: an in-memory SQLite database and a small SVD model.
+Nothing here reaches Postgres or the MLflow server.
+"""
+import importlib.util
+import os
+
+# Required settings, read when app.core.config is first imported
+os.environ.setdefault("FIRST_SUPERUSER", "admin@example.com")
+os.environ.setdefault("FIRST_SUPERUSER_PASSWORD", "changethis-test")
+os.environ.setdefault("MLFLOW_TRACKING_URI", "http://127.0.0.1:9")
+os.environ.setdefault("MLFLOW_TRACKING_USERNAME", "test")
+os.environ.setdefault("MLFLOW_TRACKING_PASSWORD", "test")
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.core.config import settings
+from app.models import Movie, User
+
+MIGRATIONS_DIR = os.path.join(settings.BASE_DIR, "alembic", "versions")
+MOVIES_CATALOG_PATH = os.path.join(settings.BASE_DIR, "app", "data", "movies.csv")
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def movies(session):
+    """A few catalog movies"""
+    rows = [
+        Movie(id=1, title="Toy Story (1995)", genres="Animation|Children|Comedy", release_year=1995),
+        Movie(id=2, title="Jumanji (1995)", genres="Adventure|Children|Fantasy", release_year=1995),
+        Movie(id=50, title="Star Wars (1977)", genres="Action|Adventure|Sci-Fi", release_year=1977),
+        Movie(id=260, title="Star Trek (1979)", genres="Sci-Fi", release_year=1979),
+    ]
+    session.add_all(rows)
+    session.commit()
+    return rows
+
+
+@pytest.fixture
+def queries(engine):
+    """SQL statements sent to the test database from now on"""
+    from sqlalchemy import event
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+@pytest.fixture
+def catalog_movies(session):
+    """The catalog movies svd_model was trained on"""
+    catalog = pd.read_csv(MOVIES_CATALOG_PATH).head(30)
+    rows = [
+        Movie(id=int(row.movie_id), title=row.title, genres=row.genres, release_year=int(row.release_year))
+        for row in catalog.itertuples()
+    ]
+    session.add_all(rows)
+    session.commit()
+    return rows
+
+
+@pytest.fixture
+def users(session):
+    rows = [User(id=user_id, email=f"user{user_id}@example.com", hashed_password="x") for user_id in (1, 2, 3)]
+    session.add_all(rows)
+    session.commit()
+    return rows
+
+
+def run_migration(engine, file_name: str):
+    """Runs the upgrade() of one alembic revision against `engine`"""
+    alembic = pytest.importorskip("alembic")
+    from alembic.migration import MigrationContext
+    from alembic.operations import Operations
+
+    spec = importlib.util.spec_from_file_location(file_name[:-3], os.path.join(MIGRATIONS_DIR, file_name))
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    with engine.begin() as connection:
+        with Operations.context(MigrationContext.configure(connection)):
+            migration.upgrade()
+
+
+@pytest.fixture(scope="session")
+def svd_model():
+    """
+    SVDCF trained on random ratings of the first catalog movies (enough of
+    them per movie to enter the popularity ranking)
+    """
+    from app.services.recommenders.svd_impl import SVDCF
+
+    movie_ids = pd.read_csv(MOVIES_CATALOG_PATH)["movie_id"].to_numpy()[:30]
+    rng = np.random.default_rng(0)
+    ratings = [
+        {"user_id": user_id, "movie_id": int(movie_id), "rating": int(rng.integers(1, 6))}
+        for user_id in range(1, 121)
+        for movie_id in rng.choice(movie_ids, size=20, replace=False)
+    ]
+    model = SVDCF(num_components=5)
+    model.fit(pd.DataFrame(ratings))
+    return model
+
+
+@pytest.fixture
+def ml_service(svd_model):
+    """MLModelService serving svd_model (shared memory off, like the default settings)"""
+    from app.services.ml_model import MLModelService
+
+    service = MLModelService()
+    service.install_models({"svd_model": svd_model}, {"svd_model": "1"})
+    return service
+
+
+@pytest.fixture
+def client(engine, users, ml_service, monkeypatch):
+    """
+    TestClient of the API on the test database, serving ml_service and
+    authenticated as user 1 (with admin rights). Startup events do not run.
+    """
+    from fastapi.testclient import TestClient
+
+    from app.api import deps
+    from app.api.routes import recommendations
+    from app.main import app
+
+    def get_db():
+        with Session(engine) as session:
+            yield session
+
+    def current_user():
+        with Session(engine) as session:
+            return session.get(User, 1)
+
+    monkeypatch.setattr(recommendations, "ml_service", ml_service)
+    app.dependency_overrides.update({
+        deps.get_db: get_db,
+        deps.get_current_user: current_user,
+        deps.get_current_active_superuser: current_user,
+    })
+    yield TestClient(app)
+    app.dependency_overrides.clear()
@@ -0,0 +1,68 @@
+import os
+import threading
+
+import pytest
+
+from app.services.artifact_cache import ModelArtifactCache
+
+
+@pytest.fixture
+def downloads(monkeypatch):
+    """Replaces the MLflow download: the artifact of model_uri "<content>" is a file holding <content>"""
+    import mlflow.artifacts
+
+    calls = []
+
+    def download_artifacts(artifact_uri, dst_path):
+        calls.append(artifact_uri)
+        path = os.path.join(dst_path, "model")
+        os.makedirs(path)
+        with open(os.path.join(path, "model.pkl"), "w") as f:
+            f.write(artifact_uri)
+        return path
+
+    monkeypatch.setattr(mlflow.artifacts, "download_artifacts", download_artifacts)
+    return calls
+
+
+def test_fetch_downloads_once_and_dedupes_objects(tmp_path, downloads):
+    cache = ModelArtifactCache(str(tmp_path), keep_versions=3)
+    path = cache.fetch("model", "1", "same")
+    assert cache.fetch("model", "1", "same") == path
+    assert downloads == ["same"]
+
+    # Same content under another version: one object, two refs
+    assert cache.fetch("model", "2", "same") == path
+    assert os.listdir(cache.objects_dir) == [os.path.basename(path)]
+    assert cache.latest("model") == ("2", path)
+
+
+def test_prune_keeps_the_newest_versions(tmp_path, downloads):
+    cache = ModelArtifactCache(str(tmp_path), keep_versions=2)
+    paths = [cache.fetch("model", str(version), f"content-{version}") for version in range(1, 5)]
+
+    assert [version for version, _ in cache.versions("model")] == ["4", "3"]
+    assert cache.get("model", "1") is None
+    assert sorted(os.listdir(cache.objects_dir)) == sorted(os.path.basename(p) for p in paths[2:])
+
+
+def test_concurrent_fetches_never_prune_a_published_object(tmp_path, downloads):
+    threads_count = 8
+    cache = ModelArtifactCache(str(tmp_path), keep_versions=threads_count)
+    paths = {}
+    barrier = threading.Barrier(threads_count)
+
+    def fetch(version):
+        barrier.wait()
+        paths[version] = cache.fetch("model", version, f"content-{version}")
+
+    threads = [threading.Thread(target=fetch, args=(str(v),)) for v in range(threads_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(paths) == threads_count
+    for version, path in paths.items():
+        assert os.path.isdir(path)
+        assert cache.get("model", version) == path
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+TRAINED_USER = 1
+NEW_USER = 10000
+UNKNOWN_MOVIE = 999_999
+
+
+@pytest.fixture
+def recommender(ml_service):
+    return ml_service.hybrid_recommender
+
+
+def _loop_predictions(rec, user_id, movie_ids, user_ratings=None, preferred_genres=None):
+    """One predict_rating call per movie, like the original batch_predict_ratings"""
+    return {
+        movie_id: rec.predict_rating(user_id, movie_id, user_ratings, preferred_genres)
+        for movie_id in movie_ids
+    }
+
+
+def _assert_same_predictions(batch, expected):
+    assert sorted(batch["movie_id"]) == sorted(expected)
+    assert batch["predicted_rating"] == sorted(batch["predicted_rating"], reverse=True)
+    for movie_id, rating, confidence, method in zip(
+        batch["movie_id"], batch["predicted_rating"], batch["confidence"], batch["method"]
+    ):
+        assert rating == pytest.approx(expected[movie_id]["predicted_rating"], abs=1e-5)
+        assert confidence == pytest.approx(expected[movie_id]["confidence"])
+        assert method == expected[movie_id]["method"]
+
+
+def _movie_ids(rec):
+    # Trained movies, catalog movies the SVD model never saw, and an unknown id
+    return rec.movie_ids[:40].tolist() + [UNKNOWN_MOVIE]
+
+
+def test_trained_user_matches_the_per_movie_loop(recommender):
+    movie_ids = _movie_ids(recommender)
+    batch = recommender.batch_predict_ratings(TRAINED_USER, movie_ids)
+    _assert_same_predictions(batch, _loop_predictions(recommender, TRAINED_USER, movie_ids))
+
+
+@pytest.mark.parametrize("ratings, genres", [
+    ([(1, 5), (2, 3), (50, 4)], ["Comedy"]),
+    ([(1, 5), (2, 3), (50, 4), (260, 2), (10, 5), (11, 1)], None),
+    (None, ["Horror", "Sci-Fi"]),
+    (None, None),
+])
+def test_new_user_matches_the_per_movie_loop(recommender, ratings, genres):
+    movie_ids = _movie_ids(recommender)
+    batch = recommender.batch_predict_ratings(NEW_USER, movie_ids, ratings, genres)
+    _assert_same_predictions(batch, _loop_predictions(recommender, NEW_USER, movie_ids, ratings, genres))
+
+
+def test_unknown_movies_only(recommender):
+    batch = recommender.batch_predict_ratings(NEW_USER, [UNKNOWN_MOVIE], [(1, 5)], ["Drama"])
+    assert batch == {"movie_id": [UNKNOWN_MOVIE], "predicted_rating": [3.0],
+                     "confidence": [0.0], "method": ["fallback_mean"]}
+
+
+def test_predict_endpoint(client, ml_service):
+    recommender = ml_service.hybrid_recommender
+    movie_ids = _movie_ids(recommender)[:10]
+
+    response = client.post("/recommendations/predict", json=movie_ids)
+    assert response.status_code == 200
+    expected = _loop_predictions(recommender, TRAINED_USER, movie_ids)
+    predictions = response.json()
+    assert [p["movie_id"] for p in predictions] == \
+        sorted(movie_ids, key=lambda mid: -expected[mid]["predicted_rating"])
+    np.testing.assert_allclose([p["predicted_rating"] for p in predictions],
+                               [expected[p["movie_id"]]["predicted_rating"] for p in predictions], atol=1e-5)
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.recommenders.content_features import ContentFeatures
+from app.services.recommenders.item_neighbours import ItemNeighbourTable
+
+GENRES = ["Action", "Comedy", "Drama"]
+MOVIE_IDS = np.array([10, 20, 30, 40, 50, 60])
+GENRE_MATRIX = np.array([[1, 0, 0], [1, 1, 0], [0, 0, 1], [0, 1, 1], [1, 0, 1], [0, 0, 0]], dtype=np.uint8)
+YEARS = np.array([1995, 1991, np.nan, 1984, 2001, 1999])
+TAGS = pd.DataFrame(
+    [(10, "space"), (10, "space"), (20, "space"), (30, "noir"), (40, "noir"), (50, "noir"),
+     (30, "rare"), (99, "space")],  # "rare" is below min_tag_count; movie 99 is not in the catalog
+    columns=["movie_id", "tag"],
+)
+
+
+@pytest.fixture
+def features():
+    return ContentFeatures(MOVIE_IDS, GENRE_MATRIX, GENRES, YEARS, tags_df=TAGS, min_tag_count=2, neighbours_k=3)
+
+
+def _dense_tfidf(terms):
+    """Term-by-term dense TF-IDF of the fixture catalog, columns in the order of `terms`"""
+    counts = np.zeros((len(MOVIE_IDS), len(terms)))
+    catalog_tags = TAGS[TAGS["movie_id"].isin(MOVIE_IDS)]
+    tag_totals = catalog_tags["tag"].value_counts()
+    for row, movie_id in enumerate(MOVIE_IDS):
+        for col, term in enumerate(terms):
+            kind, value = term.split(":", 1)
+            if kind == "genre":
+                counts[row, col] = GENRE_MATRIX[row, GENRES.index(value)]
+            elif kind == "decade":
+                counts[row, col] = float(not np.isnan(YEARS[row]) and YEARS[row] // 10 * 10 == int(value))
+            elif tag_totals.get(value, 0) >= 2:
+                tagged = ((catalog_tags["movie_id"] == movie_id) & (catalog_tags["tag"] == value)).sum()
+                counts[row, col] = np.log1p(tagged)
+
+    idf = np.log((1 + len(MOVIE_IDS)) / (1 + (counts > 0).sum(axis=0))) + 1
+    tfidf = counts * idf
+    norms = np.linalg.norm(tfidf, axis=1, keepdims=True)
+    return tfidf / np.where(norms > 0, norms, 1)
+
+
+def test_tfidf_matches_the_dense_computation(features):
+    assert sorted(features.terms) == sorted(
+        [f"genre:{g}" for g in GENRES] + ["decade:1980", "decade:1990", "decade:2000", "tag:space", "tag:noir"]
+    )
+    np.testing.assert_allclose(features.matrix.toarray(), _dense_tfidf(features.terms), atol=1e-6)
+
+
+def test_profile_scores_match_dense_cosine_similarity(features):
+    dense = _dense_tfidf(features.terms)
+    rows, ratings = np.array([0, 3]), np.array([5.0, 2.0])
+
+    profile = features.profile(rows, ratings)
+    expected = (dense[rows] * ratings[:, None]).sum(axis=0) / ratings.sum()
+    np.testing.assert_allclose(profile, expected, atol=1e-6)
+
+    cosine = dense @ expected / np.linalg.norm(expected)
+    np.testing.assert_allclose(features.score(profile), cosine, atol=1e-6)
+    np.testing.assert_allclose(features.score(profile, rows=[4, 1]), cosine[[4, 1]], atol=1e-6)
+
+
+def _brute_force_neighbours(vectors, k):
+    """Every pairwise cosine similarity, sorted per item"""
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    table = []
+    for i in range(len(unit)):
+        similarities = [(float(unit[i] @ unit[j]), j) for j in range(len(unit)) if j != i]
+        table.append(sorted(similarities, reverse=True)[:k])
+    return table
+
+
+@pytest.mark.parametrize("block_size", [7, 1024])
+def test_neighbour_table_matches_brute_force(block_size):
+    vectors = np.random.default_rng(2).normal(size=(40, 6))
+    table = ItemNeighbourTable(vectors, k=5, block_size=block_size)
+
+    for i, expected in enumerate(_brute_force_neighbours(vectors, 5)):
+        indices, scores = table.neighbours(i)
+        assert indices.tolist() == [j for _, j in expected]
+        np.testing.assert_allclose(scores, [s for s, _ in expected], atol=1e-5)
+
+
+def test_neighbours_of_many_keep_the_best_weighted_score():
+    vectors = np.random.default_rng(3).normal(size=(30, 4))
+    table = ItemNeighbourTable(vectors, k=4)
+    queries, weights = [0, 7, 12], [1.0, 0.5, 0.8]
+
+    best = {}
+    for query, weight in zip(queries, weights):
+        for index, score in zip(*table.neighbours(query)):
+            best[int(index)] = max(best.get(int(index), -np.inf), float(score) * weight)
+
+    indices, scores = table.neighbours_of_many(queries, weights)
+    assert sorted(indices.tolist()) == sorted(best)
+    assert scores.tolist() == sorted(scores.tolist(), reverse=True)
+    np.testing.assert_allclose(scores, [best[i] for i in indices.tolist()], atol=1e-6)
+
+
+def test_content_neighbours_match_brute_force(features):
+    dense = _dense_tfidf(features.terms)
+    for i, expected in enumerate(_brute_force_neighbours(dense, 3)):
+        _, scores = features.neighbours.neighbours(i)
+        np.testing.assert_allclose(scores, [s for s, _ in expected], atol=1e-6)
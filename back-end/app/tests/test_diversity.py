@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from app.services.recommenders.diversity import mmr_rerank
+from app.services.recommenders.item_neighbours import normalize_rows
+
+
+def _naive_mmr(relevance, embeddings, n, lambda_):
+    """Re-scores every candidate against every selected item at each step"""
+    relevance = (relevance - relevance.min()) / (relevance.max() - relevance.min())
+    selected = []
+    for _ in range(min(n, len(relevance))):
+        best, best_score = None, -np.inf
+        for i in range(len(relevance)):
+            if i in selected:
+                continue
+            max_similarity = max((float(embeddings[i] @ embeddings[j]) for j in selected), default=0.0)
+            score = lambda_ * relevance[i] - (1 - lambda_) * max_similarity
+            if score > best_score:
+                best, best_score = i, score
+        selected.append(best)
+    return selected
+
+
+def _candidates(seed, m=60, k=8):
+    rng = np.random.default_rng(seed)
+    return rng.random(m), normalize_rows(rng.normal(size=(m, k)))
+
+
+def _intra_list_similarity(embeddings, selected):
+    similarities = embeddings[selected] @ embeddings[selected].T
+    return similarities[np.triu_indices(len(selected), 1)].mean()
+
+
+@pytest.mark.parametrize("lambda_", [0.0, 0.3, 0.7, 1.0])
+def test_matches_the_naive_quadratic_mmr(lambda_):
+    relevance, embeddings = _candidates(4)
+    assert mmr_rerank(relevance, embeddings, 15, lambda_).tolist() == _naive_mmr(relevance, embeddings, 15, lambda_)
+
+
+def test_lambda_one_is_the_plain_ranking():
+    relevance, embeddings = _candidates(5)
+    assert mmr_rerank(relevance, embeddings, 10, 1.0).tolist() == np.argsort(-relevance)[:10].tolist()
+
+
+def test_lower_lambda_reduces_intra_list_similarity():
+    rng = np.random.default_rng(6)
+    # The 10 most relevant candidates are near-duplicates of each other
+    embeddings = np.vstack([np.ones((10, 8)) + rng.normal(scale=0.05, size=(10, 8)), rng.normal(size=(30, 8))])
+    embeddings = normalize_rows(embeddings)
+    relevance = np.concatenate([1.0 - rng.random(10) * 0.1, rng.random(30) * 0.8])
+
+    similarities = [
+        _intra_list_similarity(embeddings, mmr_rerank(relevance, embeddings, 8, lambda_))
+        for lambda_ in (1.0, 0.7, 0.3)
+    ]
+    assert similarities[0] > 0.9
+    assert similarities[1] < similarities[0] and similarities[2] < similarities[0]
+
+
+def test_n_larger_than_the_candidates():
+    relevance, embeddings = _candidates(7, m=5)
+    assert sorted(mmr_rerank(relevance, embeddings, 20, 0.5).tolist()) == [0, 1, 2, 3, 4]
+    assert mmr_rerank([], np.empty((0, 8)), 5).tolist() == []
+
+
+def test_existing_user_with_lambda_one_gets_the_svd_ranking(ml_service):
+    recommender = ml_service.hybrid_recommender
+    assert recommender.recommend_for_existing_user(1, n=5, mmr_lambda=1.0) == \
+        recommender.recommend_for_existing_user(1, n=5)
@@ -0,0 +1,65 @@
+import pytest
+
+from app.services.experiments import CONTROL_VARIANT, Experiment
+
+URL = "/recommendations/experiments"
+SPLIT = {CONTROL_VARIANT: 0.9, "v2": 0.1}
+
+
+def test_assignment_is_deterministic_per_user():
+    first, second = Experiment("ranking", SPLIT), Experiment("ranking", SPLIT)
+    assert [first.assign(u) for u in range(1000)] == [second.assign(u) for u in range(1000)]
+    # Another experiment name reshuffles the buckets
+    other = Experiment("diversity", SPLIT)
+    assert [first.assign(u) for u in range(1000)] != [other.assign(u) for u in range(1000)]
+
+
+def test_split_proportions_over_many_users():
+    experiment = Experiment("ranking", {CONTROL_VARIANT: 0.7, "v2": 0.2, "v3": 0.1})
+    assignments = [experiment.assign(u) for u in range(100_000)]
+    for variant, weight in experiment.weights.items():
+        assert assignments.count(variant) / len(assignments) == pytest.approx(weight, abs=0.01)
+
+
+@pytest.mark.parametrize("weights", [{CONTROL_VARIANT: 0.9, "v2": 0.2}, {CONTROL_VARIANT: 90, "v2": 10},
+                                     {CONTROL_VARIANT: 1.0, "v2": 0}])
+def test_invalid_splits_are_rejected(weights):
+    with pytest.raises(ValueError):
+        Experiment("ranking", weights)
+
+
+@pytest.fixture
+def variant_models(ml_service, svd_model, monkeypatch):
+    """Variant versions are served by svd_model instead of being fetched from MLflow"""
+    monkeypatch.setattr(ml_service, "_fetch_model", lambda model_type, name, version: (svd_model, version))
+
+
+def test_start_experiment_routes_users_by_variant(client, ml_service, variant_models):
+    response = client.post(URL, json={"name": "ranking", "variants": {
+        CONTROL_VARIANT: {"weight": 0.5}, "v2": {"version": "2", "weight": 0.5}
+    }})
+    assert response.status_code == 200
+    assert response.json()["variants"]["v2"] == {"svd_model": "2"}
+
+    variants = {user_id: ml_service.bundle_for(user_id) for user_id in range(1, 200)}
+    assert {variant for variant, _ in variants.values()} == {CONTROL_VARIANT, "v2"}
+    for variant, bundle in variants.values():
+        assert (bundle is ml_service.bundle) == (variant == CONTROL_VARIANT)
+
+
+def test_start_experiment_rejects_a_split_not_summing_to_one(client, ml_service, variant_models):
+    response = client.post(URL, json={"name": "ranking", "variants": {
+        CONTROL_VARIANT: {"weight": 0.9}, "v2": {"version": "2", "weight": 0.3}
+    }})
+    assert response.status_code == 400
+    assert client.get(URL).json()["experiment"] is None
+
+
+def test_delete_falls_back_to_the_default_bundle(client, ml_service, variant_models):
+    client.post(URL, json={"name": "ranking", "variants": {"v2": {"version": "2", "weight": 1}}})
+    assert ml_service.bundle_for(1)[0] == "v2"
+
+    response = client.delete(URL)
+    assert response.status_code == 200
+    assert response.json()["experiment"] is None
+    assert all(ml_service.bundle_for(user_id) == (CONTROL_VARIANT, ml_service.bundle) for user_id in range(1, 200))
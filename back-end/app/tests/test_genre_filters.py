@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+TRAINED_USER = 1
+
+
+@pytest.fixture
+def recommender(ml_service):
+    return ml_service.hybrid_recommender
+
+
+def _loop_top_n(svd_model, user_id, n, allowed_movie_ids=None):
+    """Python loop of the original SVDCF.recommend_top_n, plus an optional allow-list"""
+    seen_items = svd_model.train[svd_model.train.user_id == user_id].movie_id.values
+    user_predictions = svd_model.Y_hat[svd_model.users_id2index[user_id], :]
+    recommendations = []
+    for movie_idx in range(svd_model.Y_hat.shape[1]):
+        movie_id = svd_model.movies_index2id[movie_idx]
+        if movie_id not in seen_items and (allowed_movie_ids is None or movie_id in allowed_movie_ids):
+            recommendations.append((movie_id, user_predictions[movie_idx]))
+    recommendations.sort(key=lambda x: x[1], reverse=True)
+    return [movie_id for movie_id, _ in recommendations[:n]]
+
+
+def _loop_matching(rec, genres=None, decade=None):
+    """Movie ids of the catalog matching the filters, one row at a time"""
+    matching = set()
+    for row in rec.movies_catalog.itertuples():
+        if genres and not set(genres) & set(str(row.genres).split("|")):
+            continue
+        if decade is not None and not (decade <= row.release_year < decade + 10):
+            continue
+        matching.add(row.movie_id)
+    return matching
+
+
+@pytest.mark.parametrize("n", [1, 5, 100])
+def test_svd_top_n_matches_the_loop(svd_model, n):
+    for user_id in (1, 2, 77):
+        assert svd_model.recommend_top_n(user_id, n=n) == _loop_top_n(svd_model, user_id, n)
+
+
+def test_svd_top_n_never_returns_seen_or_masked_movies(svd_model):
+    seen = set(svd_model.train[svd_model.train.user_id == TRAINED_USER].movie_id)
+    mask = np.zeros(svd_model.Y_hat.shape[1], dtype=bool)
+    mask[::2] = True
+    allowed = {svd_model.movies_index2id[i] for i in np.flatnonzero(mask)}
+
+    result = svd_model.recommend_top_n(TRAINED_USER, n=100, movie_mask=mask)
+    assert result == _loop_top_n(svd_model, TRAINED_USER, 100, allowed)
+    assert set(result) == allowed - seen
+
+
+@pytest.mark.parametrize("genres, decade", [
+    (["Comedy"], None),
+    (["Horror", "Sci-Fi"], None),
+    (None, 1990),
+    (["Drama"], 1980),
+    ("Western", 1950),
+])
+def test_catalog_mask_matches_the_loop_filter(recommender, genres, decade):
+    mask = recommender.catalog_index.mask(genres, decade)
+    expected = _loop_matching(recommender, [genres] if isinstance(genres, str) else genres, decade)
+    assert set(recommender.movie_ids[mask].tolist()) == expected
+
+
+def test_catalog_mask_rejects_unknown_genres(recommender):
+    assert recommender.catalog_index.mask() is None
+    with pytest.raises(ValueError):
+        recommender.catalog_index.mask(["Space Opera"])
+
+
+def test_existing_user_filter_matches_the_loop(recommender, svd_model):
+    allowed = _loop_matching(recommender, ["Comedy", "Drama"])
+    result = recommender.recommend_for_existing_user(TRAINED_USER, n=100, genres=["Comedy", "Drama"])
+    assert result == _loop_top_n(svd_model, TRAINED_USER, 100, allowed)
+
+
+@pytest.mark.parametrize("genres, decade", [(["Sci-Fi"], None), (["Comedy"], 1990), (None, 1970)])
+def test_new_user_filter_returns_a_full_page_of_matching_movies(recommender, genres, decade):
+    allowed = _loop_matching(recommender, genres, decade)
+    ratings = [(int(movie_id), 4) for movie_id in recommender.movie_ids[:3]]
+
+    result = recommender.recommend_for_new_user(ratings, ["Action"], n=20, genres=genres, decade=decade)
+    assert len(result["movie_id"]) == min(20, len(allowed - {mid for mid, _ in ratings}))
+    assert set(result["movie_id"]) <= allowed
+    assert result["similarity_score"] == sorted(result["similarity_score"], reverse=True)
+
+    # Same scores as the first rows of the unfiltered ranking that match the filter
+    unfiltered = recommender.recommend_for_new_user(ratings, ["Action"], n=len(recommender.movie_ids))
+    matching_scores = [s for mid, s in zip(unfiltered["movie_id"], unfiltered["similarity_score"]) if mid in allowed]
+    np.testing.assert_allclose(result["similarity_score"], matching_scores[:20], atol=1e-6)
@@ -0,0 +1,32 @@
+import os
+import socket
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services.ml_model import MLModelService
+
+
+@pytest.fixture
+def unresponsive_registry(monkeypatch):
+    """A tracking server that accepts connections and never answers"""
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(8)
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", f"http://127.0.0.1:{server.getsockname()[1]}")
+    yield
+    server.close()
+
+
+def test_registry_lookup_gives_up_within_the_registry_timeout(unresponsive_registry, monkeypatch):
+    pytest.importorskip("mlflow")
+    monkeypatch.setattr(settings, "MLFLOW_REGISTRY_TIMEOUT_SECONDS", 1)
+    monkeypatch.setattr(settings, "MLFLOW_REGISTRY_MAX_RETRIES", 0)
+    monkeypatch.delenv("MLFLOW_HTTP_REQUEST_TIMEOUT", raising=False)
+
+    start = time.monotonic()
+    assert MLModelService().latest_registry_version("svd_model") is None
+    assert time.monotonic() - start < 10
+    # The limits only apply to the lookup itself
+    assert "MLFLOW_HTTP_REQUEST_TIMEOUT" not in os.environ
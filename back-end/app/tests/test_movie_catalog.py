@@ -0,0 +1,47 @@
+import json
+
+from app.crud.movie import movie_crud
+from app.crud.rating import rating_crud
+from app.models import Movie
+from app.services.movie_catalog import MovieCatalogCache
+
+
+def test_reads_are_served_without_the_database(session, movies, queries):
+    cache = MovieCatalogCache(refresh_seconds=3600)
+    cache.get(session)
+    queries.clear()
+
+    snapshot = cache.get(session)
+    page = json.loads(snapshot.list(genre="Sci-Fi"))
+    movie = json.loads(snapshot.get(260))
+    json.loads(snapshot.search("star"))
+
+    assert queries == []
+    assert [m["id"] for m in page] == [50, 260]
+    assert movie["title"] == "Star Trek (1979)" and movie["rating_count"] == 0
+    assert snapshot.get(999) is None
+
+
+def test_refresh_reloads_the_rating_statistics(engine, session, movies, users):
+    cache = MovieCatalogCache(refresh_seconds=3600)
+    snapshot = cache.get(session)
+    rating_crud.create(session, user_id=1, movie_id=50, rating_value=4)
+    rating_crud.create(session, user_id=2, movie_id=50, rating_value=5)
+
+    assert json.loads(snapshot.get(50))["rating_count"] == 0
+    cache.refresh(engine)
+    assert cache.get(session) is snapshot
+    movie = json.loads(snapshot.get(50))
+    assert (movie["average_rating"], movie["rating_count"]) == (4.5, 2)
+
+
+def test_refresh_rebuilds_the_snapshot_on_a_new_catalog_version(engine, session, movies):
+    cache = MovieCatalogCache(refresh_seconds=3600)
+    snapshot = cache.get(session)
+    session.add(Movie(id=300, title="Quiz Show (1994)", genres="Drama", release_year=1994))
+    movie_crud.bump_catalog_version(session)
+    session.commit()
+
+    cache.refresh(engine)
+    assert cache.get(session).version == snapshot.version + 1
+    assert json.loads(cache.get(session).get(300))["title"] == "Quiz Show (1994)"
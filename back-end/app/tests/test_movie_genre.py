@@ -0,0 +1,46 @@
+from sqlmodel import select
+
+from app.crud.movie import movie_crud
+from app.models import Movie, MovieGenre
+from conftest import run_migration
+
+
+def _genres(session, movie_id):
+    statement = select(MovieGenre.genre).where(MovieGenre.movie_id == movie_id).order_by(MovieGenre.genre)
+    return list(session.exec(statement).all())
+
+
+def test_set_genres_rewrites_the_rows_of_a_movie(session, movies):
+    movie = session.get(Movie, 50)
+    movie_crud.set_genres(session, movie)
+    session.commit()
+    assert _genres(session, 50) == ["Action", "Adventure", "Sci-Fi"]
+
+    movie.genres = "Sci-Fi|Drama|Sci-Fi|"
+    movie_crud.set_genres(session, movie)
+    session.commit()
+    assert _genres(session, 50) == ["Drama", "Sci-Fi"]
+
+
+def test_genre_filter_and_list_read_movie_genre(session, movies):
+    for movie in movies:
+        movie_crud.set_genres(session, movie)
+    session.commit()
+
+    assert [m["id"] for m in movie_crud.list(session, genre="Sci-Fi")] == [50, 260]
+    # Exact genre match, not a substring of the pipe string
+    assert movie_crud.list(session, genre="Sci") == []
+    assert [m["id"] for m in movie_crud.list(session, genre="Children", limit=1, offset=1)] == [2]
+    assert movie_crud.list_genres(session) == [
+        "Action", "Adventure", "Animation", "Children", "Comedy", "Fantasy", "Sci-Fi"
+    ]
+
+
+def test_migration_backfills_movie_genre(engine, session, movies):
+    MovieGenre.__table__.drop(engine)
+
+    run_migration(engine, "f1b6d3e8a9c4_added_movie_genre_table.py")
+
+    assert _genres(session, 1) == ["Animation", "Children", "Comedy"]
+    assert _genres(session, 260) == ["Sci-Fi"]
+    assert len(session.exec(select(MovieGenre)).all()) == 10
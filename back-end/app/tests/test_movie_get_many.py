@@ -0,0 +1,34 @@
+from app.crud.movie import movie_crud
+from app.crud.rating import rating_crud
+
+
+def test_movies_follow_the_requested_order(session, movies):
+    assert [m["id"] for m in movie_crud.get_many(session, [260, 1, 50, 2])] == [260, 1, 50, 2]
+
+
+def test_duplicates_are_returned_at_each_position(session, movies):
+    assert [m["id"] for m in movie_crud.get_many(session, [50, 1, 50])] == [50, 1, 50]
+
+
+def test_unknown_ids_are_skipped(session, movies):
+    assert [m["id"] for m in movie_crud.get_many(session, [999, 1, 12345, 2])] == [1, 2]
+    assert movie_crud.get_many(session, [999]) == []
+
+
+def test_movies_without_stats_have_no_ratings(session, movies, users):
+    rating_crud.create(session, user_id=1, movie_id=1, rating_value=4)
+
+    rated, unrated = movie_crud.get_many(session, [1, 2])
+    assert (rated["average_rating"], rated["rating_count"]) == (4.0, 1)
+    assert (unrated["average_rating"], unrated["rating_count"]) == (None, 0)
+    assert unrated["title"] == "Jumanji (1995)"
+
+
+def test_a_single_query_per_page(session, movies, users, queries):
+    rating_crud.create(session, user_id=1, movie_id=50, rating_value=5)
+    session.expire_all()
+    queries.clear()
+
+    assert len(movie_crud.get_many(session, [1, 2, 50, 260])) == 4
+    assert len(queries) == 1
+    assert movie_crud.get_many(session, []) == [] and len(queries) == 1
@@ -0,0 +1,57 @@
+from sqlmodel import select
+
+from app.crud.movie_stats import get_movie_stats, rebuild_movie_stats
+from app.crud.rating import rating_crud
+from app.models import MovieStats, Rating
+from conftest import run_migration
+
+
+def _summary(stats: MovieStats):
+    return stats.rating_count, stats.rating_sum, stats.average_rating, stats.histogram
+
+
+def test_rating_writes_upsert_movie_stats(session, movies, users):
+    rating_crud.create(session, user_id=1, movie_id=50, rating_value=5)
+    rating_crud.create(session, user_id=2, movie_id=50, rating_value=3)
+    stats = get_movie_stats(session=session, movie_id=50)
+    assert _summary(stats) == (2, 8, 4.0, {1: 0, 2: 0, 3: 1, 4: 0, 5: 1})
+
+    rating = rating_crud.get_user_rating(session, 2, 50)
+    rating_crud.update(session, rating, new_rating_value=4)
+    session.refresh(stats)
+    assert _summary(stats) == (2, 9, 4.5, {1: 0, 2: 0, 3: 0, 4: 1, 5: 1})
+
+
+def test_rebuild_matches_incremental_stats(session, movies, users):
+    for user_id, movie_id, value in [(1, 1, 4), (2, 1, 2), (3, 1, 4), (1, 50, 5)]:
+        rating_crud.create(session, user_id=user_id, movie_id=movie_id, rating_value=value)
+    incremental = {row.movie_id: _summary(row) for row in session.exec(select(MovieStats)).all()}
+
+    assert rebuild_movie_stats(session=session) == 2
+    session.expire_all()
+    rebuilt = {row.movie_id: _summary(row) for row in session.exec(select(MovieStats)).all()}
+    assert rebuilt == incremental
+
+
+def test_rebuild_picks_up_ratings_written_around_the_crud(session, movies, users):
+    session.add(Rating(user_id=1, movie_id=2, rating=3))
+    session.commit()
+    assert get_movie_stats(session=session, movie_id=2) is None
+
+    rebuild_movie_stats(session=session)
+    assert _summary(get_movie_stats(session=session, movie_id=2)) == (1, 3, 3.0, {1: 0, 2: 0, 3: 1, 4: 0, 5: 0})
+
+
+def test_migration_backfills_existing_ratings(engine, session, movies, users):
+    for user_id, movie_id, value in [(1, 1, 5), (2, 1, 1), (1, 260, 2)]:
+        session.add(Rating(user_id=user_id, movie_id=movie_id, rating=value))
+    session.commit()
+    MovieStats.__table__.drop(engine)
+
+    run_migration(engine, "e3f9a1c5b2d8_added_movie_stats_table.py")
+
+    stats = {row.movie_id: _summary(row) for row in session.exec(select(MovieStats)).all()}
+    assert stats == {
+        1: (2, 6, 3.0, {1: 1, 2: 0, 3: 0, 4: 0, 5: 1}),
+        260: (1, 2, 2.0, {1: 0, 2: 1, 3: 0, 4: 0, 5: 0}),
+    }
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+from sklearn.metrics.pairwise import cosine_similarity
+
+
+@pytest.fixture
+def recommender(ml_service):
+    return ml_service.hybrid_recommender
+
+
+def _loop_recommend(rec, user_ratings=None, preferred_genres=None, n=10, diversity_boost=False):
+    """Full argsort and Python filtering loop of the original recommend_for_new_user"""
+    genre_weight, rating_weight = (0.7, 0.3) if len(user_ratings or []) < 5 else (0.3, 0.7)
+    profile = rec._build_user_profile_hybrid(user_ratings, preferred_genres, genre_weight, rating_weight)
+    genre_matrix = rec.genre_matrix.astype(np.float64)
+
+    similarities = cosine_similarity(profile.reshape(1, -1), genre_matrix).flatten()
+    if diversity_boost:
+        genre_dominance = profile / (profile.sum() + 1e-10)
+        similarities = similarities * (1 - 0.2 * (genre_matrix @ genre_dominance))
+
+    rated = {mid for mid, _ in user_ratings or []}
+    recommendations = []
+    for idx in similarities.argsort()[::-1]:
+        movie_id = int(rec.movie_ids[idx])
+        if movie_id in rated:
+            continue
+        recommendations.append((movie_id, similarities[idx]))
+        if len(recommendations) >= n:
+            break
+    return recommendations
+
+
+def _assert_same_ranking(result, expected, n):
+    """
+    Same scores in the same order as the first n of the complete `expected`
+    ranking; movies tied on a score may come in any order
+    """
+    scores_by_id = dict(expected)
+    assert len(result["movie_id"]) == len(set(result["movie_id"])) == min(n, len(expected))
+    np.testing.assert_allclose(result["similarity_score"], [score for _, score in expected[:n]], atol=1e-5)
+    np.testing.assert_allclose(
+        [scores_by_id.get(mid, np.nan) for mid in result["movie_id"]], result["similarity_score"], atol=1e-5
+    )
+
+
+def _ratings(rec, positions):
+    return [(int(rec.movie_ids[p]), 1 + p % 5) for p in positions]
+
+
+@pytest.mark.parametrize("positions, genres, diversity_boost", [
+    ([0, 5, 9], None, False),
+    ([], ["Horror", "Sci-Fi"], False),
+    ([1, 2, 3, 4, 6, 7], ["Comedy"], False),
+    ([1, 2, 3, 4, 6, 7], ["Comedy"], True),
+])
+def test_top_n_matches_the_full_sort(recommender, positions, genres, diversity_boost):
+    ratings = _ratings(recommender, positions)
+    result = recommender.recommend_for_new_user(ratings, genres, n=25, diversity_boost=diversity_boost)
+    expected = _loop_recommend(recommender, ratings, genres, len(recommender.movie_ids), diversity_boost)
+    _assert_same_ranking(result, expected, 25)
+
+
+def test_rated_movies_are_excluded(recommender):
+    # Rated movies that would otherwise fill the top of the list
+    profile_movies = recommender.recommend_for_new_user(None, ["Film-Noir"], n=5)["movie_id"]
+    ratings = [(movie_id, 5) for movie_id in profile_movies]
+
+    result = recommender.recommend_for_new_user(ratings, ["Film-Noir"], n=20)
+    assert not set(profile_movies) & set(result["movie_id"])
+    assert len(result["movie_id"]) == 20
+    kept = recommender.recommend_for_new_user(ratings, ["Film-Noir"], n=20, exclude_rated=False)
+    assert set(profile_movies) <= set(kept["movie_id"])
+
+
+def test_n_larger_than_the_catalog_returns_every_unrated_movie(recommender):
+    ratings = _ratings(recommender, [0, 1, 2])
+    n = len(recommender.movie_ids) + 10
+
+    result = recommender.recommend_for_new_user(ratings, ["Drama"], n=n)
+    assert len(result["movie_id"]) == len(recommender.movie_ids) - 3
+    _assert_same_ranking(result, _loop_recommend(recommender, ratings, ["Drama"], n), n)
+
+
+def test_genres_are_decoded_from_the_bitmask(recommender):
+    result = recommender.recommend_for_new_user(_ratings(recommender, [0, 4]), ["Western"], n=15)
+    assert result["genres"] == [recommender._get_movie_genres(mid) for mid in result["movie_id"]]
+    catalog = recommender.movies_catalog.set_index("movie_id")["genres"]
+    for movie_id, genres in zip(result["movie_id"], result["genres"]):
+        assert set(genres) == set(catalog[movie_id].split("|")) & set(recommender.genre_cols)
+
+
+@pytest.mark.parametrize("n", [1, 10])
+def test_new_user_without_profile_gets_popular_movies_as_columns(recommender, n):
+    recommendations = recommender.recommend_for_new_user(n=n)
+    assert set(recommendations) == {"movie_id", "similarity_score", "genres"}
+    assert len(recommendations["movie_id"]) == len(recommendations["genres"]) == n
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from app.services.recommenders.pipeline import RecommendationContext, merge_candidates
+
+TRAINED_USER = 1
+NEW_USER = 10000
+
+
+def _sorted_merge(ranked_lists, max_candidates):
+    """Sorts every (relative rank, source, id) entry and keeps the first occurrence of each id"""
+    entries = sorted(
+        (position / len(ids), source, movie_id)
+        for source, ids in enumerate(ranked_lists)
+        for position, movie_id in enumerate(ids)
+    )
+    merged = []
+    for _, _, movie_id in entries:
+        if movie_id not in merged:
+            merged.append(movie_id)
+    return merged[:max_candidates]
+
+
+def test_merge_interleaves_by_relative_rank_and_dedupes():
+    merged = merge_candidates([np.array([10, 11, 12, 13]), np.array([20, 10]), np.array([], dtype=np.int64)])
+    assert merged.tolist() == [10, 20, 11, 12, 13]
+
+
+@pytest.mark.parametrize("max_candidates", [5, 40, 500])
+def test_merge_matches_a_full_sort(max_candidates):
+    rng = np.random.default_rng(1)
+    ranked_lists = [rng.choice(60, size=size, replace=False) for size in (30, 7, 45, 1)]
+
+    merged = merge_candidates(ranked_lists, max_candidates)
+    assert merged.tolist() == _sorted_merge(ranked_lists, max_candidates)
+    assert len(merged) == len(set(merged.tolist()))
+
+
+def test_merge_of_no_candidates():
+    assert merge_candidates([np.array([], dtype=np.int64)]).tolist() == []
+
+
+@pytest.mark.parametrize("user_id, ratings, genres", [
+    (NEW_USER, [(1, 5), (2, 4), (50, 5)], ["Sci-Fi"]),
+    (NEW_USER, [], None),
+    (TRAINED_USER, [], None),
+])
+def test_pipeline_excludes_rated_movies_and_times_every_stage(ml_service, user_id, ratings, genres):
+    recommender, pipeline = ml_service.hybrid_recommender, ml_service.pipeline
+
+    result = pipeline.run(RecommendationContext(user_id, ratings, genres), n=8)
+
+    rated = {movie_id for movie_id, _ in ratings} | set(recommender._get_seen_movie_ids(user_id).tolist())
+    assert len(result["movie_id"]) == 8
+    assert not rated & set(result["movie_id"])
+    assert result["score"] == sorted(result["score"], reverse=True)
+    assert set(result["timings"]) == {source.name for source in pipeline.sources} | {"merge", "rerank"}
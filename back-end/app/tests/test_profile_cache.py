@@ -0,0 +1,36 @@
+from app.crud.rating import rating_crud
+from app.models import User
+
+
+def test_rating_writes_bump_the_rating_version(session, movies, users):
+    rating_crud.create(session, user_id=1, movie_id=1, rating_value=4)
+    rating = rating_crud.get_user_rating(session, 1, 1)
+    rating_crud.update(session, rating, new_rating_value=5)
+
+    session.expire_all()
+    assert session.get(User, 1).rating_version == 2
+    assert session.get(User, 2).rating_version == 0
+
+
+def test_profile_cache_is_keyed_by_rating_version(ml_service):
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return [(1, 5)], ["Comedy"]
+
+    profile = ml_service.get_user_profile(10000, 3, loader)
+    assert ml_service.get_user_profile(10000, 3, loader) is profile
+    assert len(loads) == 1
+
+    # A newer rating version is a miss and replaces the entry
+    assert ml_service.get_user_profile(10000, 4, loader) is not profile
+    assert len(loads) == 2
+
+
+def test_profile_cache_is_dropped_on_model_swap(ml_service, svd_model):
+    loader = lambda: ([(1, 5)], ["Comedy"])
+    profile = ml_service.get_user_profile(10000, 1, loader)
+
+    ml_service.install_models({"svd_model": svd_model}, {"svd_model": "2"})
+    assert ml_service.get_user_profile(10000, 1, loader) is not profile
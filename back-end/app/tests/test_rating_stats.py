@@ -0,0 +1,22 @@
+import pandas as pd
+
+from app.services.recommenders.rating_stats import RatingStats
+
+
+def _ratings(counts):
+    rows = [(user_id, movie_id, 4.0) for movie_id, count in counts.items() for user_id in range(count)]
+    return pd.DataFrame(rows, columns=["user_id", "movie_id", "rating"])
+
+
+def test_popular_ranking_keeps_the_min_ratings_threshold():
+    stats = RatingStats(_ratings({1: 3, 2: 60, 3: 55}), min_ratings=50)
+    assert set(stats.top_popular(10)) == {2, 3}
+
+
+def test_popular_ranking_falls_back_to_rating_count_below_the_threshold():
+    stats = RatingStats(_ratings({1: 3, 2: 7, 3: 5}), min_ratings=50)
+    assert stats.top_popular(10) == [2, 3, 1]
+
+
+def test_get_popular_movies_is_never_empty(ml_service):
+    assert len(ml_service.get_popular_movies(n=5)) == 5
@@ -0,0 +1,65 @@
+from app.core.constants import FALLBACK_MOVIE_IDS
+from app.services.deadline import Deadline
+from app.services.ml_model import MLModelService
+from app.services.recommenders.profile_cache import CachedUserProfile
+
+NEW_USER = 10000
+
+
+def _profile_loader(user_id=NEW_USER):
+    return lambda: CachedUserProfile(user_id, [(1, 5), (2, 4)], ["Comedy"])
+
+
+def _failing_loader():
+    raise RuntimeError("database unavailable")
+
+
+def test_personalized_tier(ml_service):
+    movie_ids, tier = ml_service.recommend_within_budget(
+        NEW_USER, 5, Deadline(10_000), _profile_loader(), rating_version=1
+    )
+    assert tier == "personalized"
+    assert len(movie_ids) == 5
+    assert not {1, 2} & set(movie_ids)
+
+
+def test_cached_tier_serves_the_last_page_of_the_same_rating_version(ml_service):
+    page, _ = ml_service.recommend_within_budget(
+        NEW_USER, 5, Deadline(10_000), _profile_loader(), rating_version=1
+    )
+
+    assert ml_service.recommend_within_budget(
+        NEW_USER, 5, Deadline(10_000), _failing_loader, rating_version=1
+    ) == (page, "cached")
+    # After a new rating the old page may contain the rated movie: not served
+    _, tier = ml_service.recommend_within_budget(
+        NEW_USER, 5, Deadline(10_000), _failing_loader, rating_version=2
+    )
+    assert tier == "popular"
+
+
+def test_popular_tier_when_the_budget_is_exhausted(ml_service):
+    movie_ids, tier = ml_service.recommend_within_budget(
+        NEW_USER, 5, Deadline(0), _profile_loader(), genres=["Comedy"], rating_version=1
+    )
+    assert tier == "popular"
+    genres = ml_service.hybrid_recommender._get_movie_genres
+    assert movie_ids and all("Comedy" in genres(movie_id) for movie_id in movie_ids)
+
+
+def test_unexpected_errors_are_logged_with_traceback(ml_service, caplog):
+    with caplog.at_level("WARNING"):
+        ml_service.recommend_within_budget(NEW_USER, 5, Deadline(10_000), _failing_loader)
+        ml_service.recommend_within_budget(NEW_USER, 5, Deadline(0), _profile_loader())
+
+    failure, overrun = [r for r in caplog.records if r.getMessage().startswith("Degrading")]
+    assert failure.levelname == "ERROR" and failure.exc_info is not None
+    assert overrun.levelname == "WARNING" and overrun.exc_info is None
+
+
+def test_static_tier_without_models():
+    service = MLModelService()
+    movie_ids, tier = service.recommend_within_budget(
+        NEW_USER, 5, Deadline(10_000), _profile_loader(), rating_version=1
+    )
+    assert (movie_ids, tier) == (FALLBACK_MOVIE_IDS[:5], "static")
@@ -0,0 +1,36 @@
+URL = "/recommendations/user"
+
+
+def test_value_errors_are_bad_requests(client, ml_service, monkeypatch):
+    def invalid(**kwargs):
+        raise ValueError("invalid decade")
+
+    monkeypatch.setattr(ml_service, "recommend_within_budget", invalid)
+    response = client.get(URL, params={"decade": 1990})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "invalid decade"
+
+
+def test_result_cache_hits_are_counted_for_the_variant(client, ml_service, catalog_movies):
+    first = client.get(URL, params={"n": 5})
+    second = client.get(URL, params={"n": 5})
+
+    assert len(first.json()) == 5
+    assert first.headers["X-Recommendation-Cache"] == "miss"
+    assert second.headers["X-Recommendation-Cache"] == "hit"
+    assert second.json() == first.json()
+    stats = ml_service.variant_stats.snapshot()["control"]["recommendations"]
+    assert stats["requests"] == 2
+    assert stats["tiers"] == {"personalized": 2}
+
+
+def test_result_cache_hits_serve_current_movie_statistics(client, session, catalog_movies):
+    from app.crud.rating import rating_crud
+
+    first = client.get(URL, params={"n": 5}).json()
+    movie_id = first[0]["id"]
+    rating_crud.create(session, user_id=2, movie_id=movie_id, rating_value=5)
+
+    second = client.get(URL, params={"n": 5})
+    assert second.headers["X-Recommendation-Cache"] == "hit"
+    assert second.json()[0]["rating_count"] == first[0]["rating_count"] + 1
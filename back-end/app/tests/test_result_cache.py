@@ -0,0 +1,29 @@
+def test_result_cache_is_keyed_by_rating_version(ml_service, svd_model):
+    page_key = (10, None, None)
+    ml_service.cache_page(1, 5, page_key, "page")
+    assert ml_service.get_cached_page(1, 5, page_key) == "page"
+    assert ml_service.get_cached_page(1, 5, (20, None, None)) is None
+    assert ml_service.get_cached_page(1, 6, page_key) is None
+
+    ml_service.cache_page(1, 6, page_key, "newer page")
+    assert ml_service.get_cached_page(1, 5, page_key) is None
+
+    ml_service.install_models({"svd_model": svd_model}, {"svd_model": "2"})
+    assert ml_service.get_cached_page(1, 6, page_key) is None
+
+
+def test_invalidate_user_drops_profile_and_pages(ml_service):
+    profile = ml_service.get_user_profile(10000, 1, lambda: ([(1, 5)], []))
+    ml_service.cache_page(10000, 1, (10, None, None), "page")
+
+    ml_service.invalidate_user(10000)
+    assert ml_service.get_cached_page(10000, 1, (10, None, None)) is None
+    assert ml_service.get_user_profile(10000, 1, lambda: ([(1, 5)], [])) is not profile
+
+
+def test_page_computed_across_a_model_swap_is_not_served(ml_service, svd_model):
+    generation = ml_service.bundle.generation
+    ml_service.install_models({"svd_model": svd_model}, {"svd_model": "2"})
+
+    ml_service.cache_page(1, 5, (10, None, None), "stale page", generation=generation)
+    assert ml_service.get_cached_page(1, 5, (10, None, None)) is None
@@ -0,0 +1,139 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from app.services import shared_arrays
+from app.services.ml_model import MLModelService
+from app.services.shared_arrays import SharedArrayStore, share_object
+
+pytestmark = pytest.mark.skipif(not SharedArrayStore.available(), reason="needs flock")
+
+NEW_USER = 10000
+
+
+def _segments(root):
+    return sorted(name for name in os.listdir(root) if not name.startswith("."))
+
+
+@pytest.fixture(autouse=True)
+def share_small_arrays(monkeypatch):
+    # The test models are tiny: share every array
+    monkeypatch.setattr(shared_arrays, "MIN_SHARED_BYTES", 0)
+
+
+@pytest.fixture
+def shared_service(svd_model, tmp_path):
+    """MLModelService serving svd_model from a shared store (as if the artifact cache gave its key)"""
+    service = MLModelService()
+    service.shared_arrays = SharedArrayStore(str(tmp_path))
+    model, _ = share_object(service.shared_arrays, lambda: svd_model, key="svd-digest")
+    model._shared_lease = "svd-digest"
+    service.install_models({"svd_model": model}, {"svd_model": "1"})
+    return service
+
+
+def test_second_worker_attaches_without_building(svd_model, tmp_path):
+    built = []
+
+    def build():
+        built.append(1)
+        return svd_model
+
+    first, key = share_object(SharedArrayStore(str(tmp_path)), build, key="svd-digest")
+    second, _ = share_object(SharedArrayStore(str(tmp_path)), build, key="svd-digest")
+
+    assert built == [1]
+    assert isinstance(second.Y_hat, np.memmap) and second.Y_hat.filename == first.Y_hat.filename
+    np.testing.assert_array_equal(second.Y_hat, svd_model.Y_hat)
+    assert second.recommend_top_n(1, n=10) == svd_model.recommend_top_n(1, n=10)
+
+
+def test_shared_bundle_serves_the_same_recommendations(shared_service, ml_service):
+    recommender = shared_service.hybrid_recommender
+    derived = (recommender._svd_vt, recommender.item_neighbours.indices,
+               recommender.rating_stats.movie_count, recommender._seen_movie_ids)
+    assert all(isinstance(array, np.memmap) for array in derived)
+    assert recommender.svd_model is shared_service.bundle.models["svd_model"]
+    assert set(shared_service.bundle.shared_keys) == {"svd_model", "hybrid_recommender"}
+
+    for user_id in (1, 7):
+        assert list(shared_service.recommend_top_n(user_id, n=10)["movie_id"]) == \
+            list(ml_service.recommend_top_n(user_id, n=10)["movie_id"])
+    profile = ([(1, 5), (2, 4)], ["Comedy"])
+    assert list(shared_service.recommend_top_n(NEW_USER, n=10, user_ratings=profile[0],
+                                               preferred_genres=profile[1])["movie_id"]) == \
+        list(ml_service.recommend_top_n(NEW_USER, n=10, user_ratings=profile[0],
+                                        preferred_genres=profile[1])["movie_id"])
+
+
+def test_another_worker_opens_the_recommender_without_building_it(shared_service, monkeypatch):
+    from app.services.recommenders.HybridRecommender import HybridRecommender
+
+    def fail(*args, **kwargs):
+        raise AssertionError("rebuilt the recommender")
+
+    other = MLModelService()
+    other.shared_arrays = SharedArrayStore(shared_service.shared_arrays.root_dir)
+    model, _ = share_object(other.shared_arrays, fail, key="svd-digest")
+    model._shared_lease = "svd-digest"
+    monkeypatch.setattr(HybridRecommender, "__init__", fail)
+    other.install_models({"svd_model": model}, {"svd_model": "1"})
+
+    assert other.bundle.shared_keys == shared_service.bundle.shared_keys
+
+
+def test_segments_are_released_on_shutdown(shared_service):
+    root = shared_service.shared_arrays.root_dir
+    assert len(_segments(root)) == 2
+
+    shared_service.release_shared_arrays()
+    assert _segments(root) == []
+
+
+def test_swap_releases_the_previous_segments(shared_service, svd_model):
+    root = shared_service.shared_arrays.root_dir
+    previous = set(shared_service.bundle.shared_keys.values())
+
+    shared_service.install_models({"svd_model": svd_model}, {"svd_model": "2"})
+    # Same content: republished under its content hash, the recommender under a new key
+    assert previous.isdisjoint(_segments(root))
+    assert len(_segments(root)) == 2
+
+
+def _stale_lease(store, key, pid, start_time):
+    with open(os.path.join(store.root_dir, key, "refs", str(pid)), "w") as f:
+        f.write(start_time)
+
+
+def test_leases_of_dead_processes_are_reclaimed(tmp_path):
+    store = SharedArrayStore(str(tmp_path))
+    _, key = share_object(store, lambda: np.arange(10), key="segment")
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    _stale_lease(store, key, exited.pid, "1")
+
+    store.release(key)
+    assert _segments(tmp_path) == []
+
+
+def test_leases_of_a_reused_pid_are_reclaimed(tmp_path, monkeypatch):
+    store = SharedArrayStore(str(tmp_path))
+    _, key = share_object(store, lambda: np.arange(10), key="segment")
+    # The lease of a process that ended, whose pid now belongs to a live process
+    monkeypatch.setattr(shared_arrays, "_pid_alive", lambda pid: True)
+    _stale_lease(store, key, 1, "0")
+
+    store.release(key)
+    assert _segments(tmp_path) == []
+
+
+def test_live_leases_keep_the_segment(tmp_path):
+    store = SharedArrayStore(str(tmp_path))
+    _, key = share_object(store, lambda: np.arange(10), key="segment")
+    _stale_lease(store, key, os.getppid(), shared_arrays._process_start_time(os.getppid()))
+
+    store.release(key)
+    assert _segments(tmp_path) == ["segment"]
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+from sklearn.metrics.pairwise import cosine_similarity
+
+UNKNOWN_MOVIE = 999_999
+
+
+@pytest.fixture
+def recommender(ml_service):
+    return ml_service.hybrid_recommender
+
+
+def _movie_features(rec):
+    """Genre table of the catalog, built like the original .loc implementation"""
+    catalog = rec.movies_catalog.copy()
+    for genre in rec.genre_cols:
+        catalog[genre] = catalog["genres"].apply(lambda x: 1 if genre in str(x).split("|") else 0)
+    return catalog[["movie_id"] + list(rec.genre_cols)].set_index("movie_id")
+
+
+def _loop_profile(rec, movie_features, user_ratings=None, preferred_genres=None,
+                  genre_weight=0.3, rating_weight=0.7):
+    """Per-rating .loc accumulation of the original _build_user_profile_hybrid"""
+    from_ratings = np.zeros(len(rec.genre_cols))
+    from_genres = np.zeros(len(rec.genre_cols))
+    total_weight = 0
+    for movie_id, rating in user_ratings or []:
+        if movie_id in movie_features.index:
+            from_ratings += movie_features.loc[movie_id].values * rating
+            total_weight += rating
+    if total_weight > 0:
+        from_ratings /= total_weight
+    for i, genre in enumerate(rec.genre_cols):
+        if genre in (preferred_genres or []):
+            from_genres[i] = 1.0
+
+    has_ratings, has_genres = np.any(from_ratings > 0), np.any(from_genres > 0)
+    if has_ratings and has_genres:
+        return (rating_weight * from_ratings + genre_weight * from_genres) / (rating_weight + genre_weight)
+    if has_ratings:
+        return from_ratings
+    return from_genres
+
+
+@pytest.mark.parametrize("ratings, genres", [
+    ([(0, 5), (1, 3), (4, 1)], None),
+    (None, ["Comedy", "Sci-Fi"]),
+    ([(2, 4), (3, 2), (5, 5), (6, 1), (7, 3)], ["Drama"]),
+    ([(UNKNOWN_MOVIE, 5), (0, 2)], ["Action"]),
+    ([(UNKNOWN_MOVIE, 5)], None),
+    (None, None),
+])
+def test_profile_matches_the_loop_implementation(recommender, ratings, genres):
+    movie_features = _movie_features(recommender)
+    if ratings:
+        # Positions in the catalog -> movie ids
+        ratings = [(mid if mid == UNKNOWN_MOVIE else int(recommender.movie_ids[mid]), r) for mid, r in ratings]
+
+    profile = recommender._build_user_profile_hybrid(ratings, genres, genre_weight=0.4, rating_weight=0.6)
+    expected = _loop_profile(recommender, movie_features, ratings, genres, genre_weight=0.4, rating_weight=0.6)
+    np.testing.assert_allclose(profile, expected, atol=1e-6)
+
+
+def test_batch_profiles_match_one_loop_profile_per_user(recommender):
+    movie_features = _movie_features(recommender)
+    movie_ids = recommender.movie_ids
+    users = {
+        10000: [(int(movie_ids[0]), 5), (int(movie_ids[3]), 2)],
+        10001: [(int(movie_ids[i]), 1 + i % 5) for i in range(8)] + [(UNKNOWN_MOVIE, 4)],
+        10002: [(int(movie_ids[10]), 3)],
+    }
+    preferred = {10000: ["Comedy"], 10001: "Drama|Horror", 10002: None}
+    user_col, movie_col, rating_col = zip(*[(u, m, r) for u, ratings in users.items() for m, r in ratings])
+
+    matrix, user_ids = recommender.build_ratings_matrix(user_col, movie_col, rating_col)
+    profiles = recommender.build_user_profiles_batch(matrix, [preferred[int(u)] for u in user_ids])
+
+    assert user_ids.tolist() == [10000, 10001, 10002]
+    for user_id, profile in zip(user_ids.tolist(), profiles):
+        genres = preferred[user_id]
+        known = sum(movie_id != UNKNOWN_MOVIE for movie_id, _ in users[user_id])
+        # Same few-ratings reweighting as recommend_for_new_user
+        weights = (0.7, 0.3) if known < 5 else (0.3, 0.7)
+        expected = _loop_profile(recommender, movie_features, users[user_id],
+                                 genres.split("|") if isinstance(genres, str) else genres, *weights)
+        np.testing.assert_allclose(profile, expected, atol=1e-6)
+
+
+def test_batch_scores_match_cosine_similarity(recommender):
+    movie_features = _movie_features(recommender)
+    profiles = np.array([
+        recommender._build_user_profile_hybrid([(int(recommender.movie_ids[0]), 5)], ["Action"]),
+        recommender._build_user_profile_hybrid(None, ["Comedy", "Romance"]),
+    ])
+
+    scores = recommender.score_profiles_batch(profiles)
+    np.testing.assert_allclose(scores, cosine_similarity(profiles, movie_features.values), atol=1e-5)
@@ -0,0 +1,19 @@
+from sqlmodel import Session
+from app.core.db import engine
+from app.crud.movie_stats import rebuild_movie_stats
+
+
+def main():
+    # Recomputes movie_stats from the rating table. Only needed after ratings
+    # were loaded without RatingCRUD (e.g. bulk SQL imports); the alembic
+    # migration already backfills existing ratings
+    with Session(engine) as session:
+        movies = rebuild_movie_stats(session=session)
+    print(f"movie_stats rebuilt for {movies} movies")
+
+if __name__ == "__main__":
+    main()
+
+    # to run this file_
+    # cd backend
+    # python3 -m scripts.backfill_movie_stats
@@ -0,0 +1,77 @@
+"""
+Import-time report (python -X importtime) of the API and the training CLIs.
+
+Runs each module import in a fresh interpreter and prints the total import
+time and the top-level packages that cost the most (self time summed over
+each package's submodules), e.g.:
+
+    cd back-end && python scripts/import_time_report.py
+    cd back-end && python scripts/import_time_report.py app.main app.initial_data
+    cd back-end && python scripts/import_time_report.py --path ../src train_svd grid_search_svd
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+DEFAULT_MODULES = ["app.main", "app.backend_pre_start", "app.initial_data"]
+
+
+def measure(module, path, runs):
+    """
+    Imports `module` in `runs` fresh interpreters (cwd = path) and keeps the fastest run
+
+    Returns:
+        Tuple (total_us, {top-level package: self_us})
+    """
+    best = None
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=path, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+
+        total = 0
+        packages = defaultdict(int)
+        for line in result.stderr.splitlines():
+            match = LINE.match(line)
+            if match is None:
+                continue
+            self_us, cumulative_us, indent, name = match.groups()
+            packages[name.split(".")[0]] += int(self_us)
+            if name == module:
+                total = int(cumulative_us)
+        if best is None or total < best[0]:
+            best = (total, packages)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--path", default=".", help="Directory the modules are imported from")
+    parser.add_argument("--top", type=int, default=10, help="Packages listed per module")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per module (fastest kept)")
+    args = parser.parse_args()
+
+    path = os.path.abspath(args.path)
+    for module in args.modules:
+        try:
+            total, packages = measure(module, path, args.runs)
+        except RuntimeError as e:
+            print(f"{module}: {e}\n")
+            continue
+        print(f"{module}: {total / 1000:.0f} ms")
+        for package, self_us in sorted(packages.items(), key=lambda p: p[1], reverse=True)[:args.top]:
+            print(f"    {package:<28} {self_us / 1000:8.1f} ms  {100 * self_us / max(total, 1):5.1f}%")
+        print()
+
+
+if __name__ == "__main__":
+    main()
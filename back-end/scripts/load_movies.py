@@ -1,6 +1,7 @@
 import pandas as pd
 from sqlmodel import Session
 from app.core.db import engine
+from app.crud.movie import movie_crud
 from app.models.movie import Movie
 
 CSV_PATH = "../data/processed/movielens/movies.csv"
@@ -17,6 +18,9 @@ def main():
                 release_year=int(row["release_year"]) if not pd.isna(row["release_year"]) else None
             )
             session.merge(movie)  # avoids duplicates
+            movie_crud.set_genres(session, movie)
+        # Running back-ends rebuild their catalog snapshot once this commits
+        movie_crud.bump_catalog_version(session)
         session.commit()
 
 if __name__ == "__main__":
@@ -127,11 +127,16 @@ export const getUserRating = async (movieId, token) => {
 /**
  * Get user-specific movie recommendations
  * @param {string} token - The user's authentication token
+ * @param {Object} filters - Optional filters { genre, decade } (e.g. { genre: 'Sci-Fi', decade: 1990 })
  * @returns {Promise<Array>} - Array of recommended movie objects
  */
-export const getUserRecommendations = async (token) => {
+export const getUserRecommendations = async (token, filters = {}) => {
     try {
         const response = await api.get('/recommendations/user', {
+            params: {
+                genre: filters.genre,
+                decade: filters.decade
+            },
             headers: {
                 Authorization: `Bearer ${token}`
             }
@@ -177,6 +182,26 @@ export const getPredictedRating = async (movieId, token) => {
     }
 }
 
+/**
+ * Get predicted ratings for several movies in a single request
+ * @param {Array<string|number>} movieIds - The movie IDs
+ * @param {string} token - The user's authentication token
+ * @returns {Promise<Array>} - Array of { movie_id, predicted_rating, confidence, method }
+ */
+export const getPredictedRatings = async (movieIds, token) => {
+    try {
+        const response = await api.post('/recommendations/predict', movieIds.map((id) => parseInt(id)), {
+            headers: {
+                Authorization: `Bearer ${token}`
+            }
+        })
+        return response.data
+    } catch (error) {
+        console.error('Error fetching predicted ratings:', error)
+        throw new Error(error.response?.data?.message || 'Failed to fetch predicted ratings')
+    }
+}
+
 export default {
     searchMovies,
     getMovieById,
@@ -187,4 +212,5 @@ export default {
     getUserRecommendations,
     getGlobalRecommendations,
     getPredictedRating,
+    getPredictedRatings,
 }
\ No newline at end of file
@@ -1,4 +1,5 @@
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Column, LargeBinary
 from typing import Optional
 from datetime import datetime
 
@@ -10,6 +11,7 @@ class User(SQLModel, table=True):
     email: str
     full_name: Optional[str] = None
     role: Optional[str] = None
+    rating_version: int = 0
     # Añade otros campos según tu esquema
 
 
@@ -17,8 +19,20 @@ class Rating(SQLModel, table=True):
     __tablename__ = "rating"
     
     id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: int = Field(foreign_key="users.id")
+    user_id: int = Field(foreign_key="user.id")
     movie_id: int
     rating: float
     created_at: Optional[datetime] = None
-    # Añade otros campos según tu esquema
\ No newline at end of file
+    # Añade otros campos según tu esquema
+
+
+class UserTopN(SQLModel, table=True):
+    __tablename__ = "user_top_n"
+    
+    # Schema owned by the back-end (app/models/recommendation.py + alembic)
+    user_id: int = Field(primary_key=True)
+    model_version: str
+    rating_version: int = 0
+    movie_ids: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    scores: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    computed_at: datetime = Field(default_factory=datetime.utcnow)
@@ -1,3 +1,4 @@
+import asyncio
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from sqlmodel import Session, select
@@ -6,11 +7,15 @@ import pandas as pd
 from Models import User, Rating
 from DBConnection import engine
 from train_svd_user import run_svd_user_training
+from precompute_top_n import precompute_user_top_n, load_latest_model
 
 logger = logging.getLogger(__name__)
 
 scheduler = AsyncIOScheduler()
 
+# (model, registered version) of the last retrain, reused by the top-N refreshes
+latest_model = None
+
 
 async def retrain_models_job():
     """Job to retrain ML models nightly"""
@@ -64,7 +69,7 @@ async def retrain_models_job():
             
             # Retrain SVD User model
             logger.info("Retraining SVD User model...")
-            run_svd_user_training(
+            model, model_version = run_svd_user_training(
                 config=config,
                 train=train,
                 test=test,
@@ -73,12 +78,33 @@ async def retrain_models_job():
             )
             
             logger.info("Nightly retraining completed successfully")
+        
+        # Score every user of the new model version (in a worker thread: it
+        # takes minutes and would block the event loop)
+        global latest_model
+        latest_model = (model, model_version)
+        await asyncio.to_thread(precompute_user_top_n, model, model_version)
             
         
     except Exception as e:
         logger.error(f"Error during nightly model retraining: {e}", exc_info=True)
 
 
+async def refresh_top_n_job():
+    """Job to recompute the precomputed top-N of the users with new activity"""
+    global latest_model
+    try:
+        if latest_model is None:
+            model, model_version = await asyncio.to_thread(load_latest_model)
+            if model is None:
+                logger.info("No registered model yet, skipping top-N refresh")
+                return
+            latest_model = (model, model_version)
+        await asyncio.to_thread(precompute_user_top_n, *latest_model)
+    except Exception as e:
+        logger.error(f"Error during top-N refresh: {e}", exc_info=True)
+
+
 def setup_scheduler():
     """Configure scheduled jobs"""
     # Ejecutar cada noche a las 2:00 AM
@@ -89,8 +115,15 @@ def setup_scheduler():
         name="Retrain ML models nightly",
         replace_existing=True
     )
+    scheduler.add_job(
+        refresh_top_n_job,
+        trigger=CronTrigger(minute=30),
+        id="refresh_top_n",
+        name="Refresh precomputed top-N hourly",
+        replace_existing=True
+    )
     
-    logger.info("Scheduler configured: Model retraining at 2:00 AM daily")
+    logger.info("Scheduler configured: Model retraining at 2:00 AM daily, top-N refresh hourly")
 
 
 def start_scheduler():
@@ -51,4 +51,12 @@ async def trigger_retraining():
     """Manually trigger model retraining"""
     from Scheduler import retrain_models_job
     await retrain_models_job()
-    return {"status": "Retraining job triggered"}
\ No newline at end of file
+    return {"status": "Retraining job triggered"}
+
+
+@app.post("/trigger-top-n-refresh")
+async def trigger_top_n_refresh():
+    """Manually recompute the precomputed top-N of users with new activity"""
+    from Scheduler import refresh_top_n_job
+    await refresh_top_n_job()
+    return {"status": "Top-N refresh triggered"}
\ No newline at end of file
@@ -0,0 +1,167 @@
+"""
+Offline top-N of every trained user, written to the user_top_n table.
+
+After a retrain every user of the new model is scored in blocks of rows of
+the SVD prediction matrix and the best TOP_N unseen movies are stored,
+tagged with the registered model version. Later runs with the same model
+only recompute the users with new activity (rating version newer than the
+one their list was computed at), so their list excludes the movies they
+rated since. The back-end serves /recommendations/user candidates from
+the table when it serves that model version, dropping newer ratings and
+re-ranking online.
+"""
+import logging
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+from sqlmodel import Session, select
+
+from DBConnection import engine
+from Models import User, Rating, UserTopN
+from Settings import settings
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "MovieRatingPredictModel"
+TOP_N = 200
+BLOCK_SIZE = 1024
+
+
+def _insert(session):
+    """INSERT construct of the session's dialect (both support ON CONFLICT DO UPDATE)"""
+    if session.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert
+
+
+def find_stale_users(session, model, model_version):
+    """
+    Trained users whose list is missing, was scored by another model version,
+    or predates their latest rating / preference change.
+
+    :return: List of (user_id, current rating_version)
+    """
+    rating_versions = dict(session.exec(select(User.id, User.rating_version)).all())
+    stored = {
+        user_id: (version, rating_version)
+        for user_id, version, rating_version in session.exec(
+            select(UserTopN.user_id, UserTopN.model_version, UserTopN.rating_version)
+        ).all()
+    }
+    stale = []
+    for user_id in model.users_id2index:
+        user_id = int(user_id)
+        current = rating_versions.get(user_id, 0)
+        row = stored.get(user_id)
+        if row is None or row[0] != model_version or row[1] < current:
+            stale.append((user_id, current))
+    return stale
+
+
+def score_block(model, user_ids, rated, new_ratings, top_n):
+    """
+    Top-N unseen movies of a block of users, from their rows of Y_hat.
+
+    :param rated: Boolean matrix (users x movies) of the training ratings
+    :param new_ratings: Dict user_id -> movie ids rated in the DB (may be newer than the model)
+    :return: List of (movie column indices, scores) per user, best first
+    """
+    rows = np.fromiter((model.users_id2index[u] for u in user_ids), dtype=np.int64, count=len(user_ids))
+    scores = np.array(np.ma.getdata(model.Y_hat[rows]), dtype=np.float32)
+    scores[rated[rows]] = -np.inf
+    for i, user_id in enumerate(user_ids):
+        cols = [model.movies_id2index[m] for m in new_ratings.get(user_id, ()) if m in model.movies_id2index]
+        scores[i, cols] = -np.inf
+
+    n = min(top_n, scores.shape[1])
+    top = np.argpartition(-scores, n - 1, axis=1)[:, :n]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind="stable")
+    top = np.take_along_axis(top, order, axis=1)
+    top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+    results = []
+    for cols, row_scores in zip(top, top_scores):
+        finite = np.isfinite(row_scores)
+        results.append((cols[finite], row_scores[finite]))
+    return results
+
+
+def precompute_user_top_n(model, model_version, top_n=TOP_N, block_size=BLOCK_SIZE):
+    """
+    Writes the top-N of every stale user of `model` (see find_stale_users).
+
+    :param model: Trained SVDCF
+    :param model_version: Registry version of the model (tag read by the back-end)
+    :return: Number of users written
+    """
+    start = time.perf_counter()
+    model_version = str(model_version)
+    movie_ids = np.array([model.movies_index2id[i] for i in range(len(model.movies_index2id))], dtype="<i4")
+    rated = model.urm.notna().to_numpy()
+
+    with Session(engine) as session:
+        stale = find_stale_users(session, model, model_version)
+        logger.info(f"Top-{top_n} precompute for model version {model_version}: "
+                    f"{len(stale)} of {len(model.users_id2index)} users to score")
+
+        for offset in range(0, len(stale), block_size):
+            block = stale[offset:offset + block_size]
+            user_ids = [user_id for user_id, _ in block]
+
+            new_ratings = {}
+            for user_id, movie_id in session.exec(
+                select(Rating.user_id, Rating.movie_id).where(Rating.user_id.in_(user_ids))
+            ).all():
+                new_ratings.setdefault(user_id, []).append(movie_id)
+
+            computed_at = datetime.utcnow()
+            records = [
+                {
+                    "user_id": user_id,
+                    "model_version": model_version,
+                    "rating_version": rating_version,
+                    "movie_ids": movie_ids[cols].tobytes(),
+                    "scores": scores.astype("<f4").tobytes(),
+                    "computed_at": computed_at,
+                }
+                for (user_id, rating_version), (cols, scores) in zip(
+                    block, score_block(model, user_ids, rated, new_ratings, top_n)
+                )
+            ]
+            statement = _insert(session)(UserTopN.__table__).values(records)
+            statement = statement.on_conflict_do_update(
+                index_elements=["user_id"],
+                set_={column: statement.excluded[column]
+                      for column in ("model_version", "rating_version", "movie_ids", "scores", "computed_at")}
+            )
+            session.execute(statement)
+            session.commit()
+
+    logger.info(f"Top-{top_n} precompute done: {len(stale)} users in {time.perf_counter() - start:.1f}s")
+    return len(stale)
+
+
+def load_latest_model():
+    """
+    Latest registered version of the SVD model, for refreshes that run
+    without a retrain in this process.
+
+    :return: Tuple (model, version) or (None, None) if nothing is registered
+    """
+    import mlflow
+    from mlflow.tracking import MlflowClient
+
+    os.environ["MLFLOW_TRACKING_USERNAME"] = settings.MLFLOW_TRACKING_USERNAME
+    os.environ["MLFLOW_TRACKING_PASSWORD"] = settings.MLFLOW_TRACKING_PASSWORD
+    mlflow.set_tracking_uri(settings.MLFLOW_TRACKING_URI)
+
+    versions = MlflowClient().search_model_versions(f"name='{MODEL_NAME}'")
+    if not versions:
+        return None, None
+    version = str(max(int(v.version) for v in versions))
+    return mlflow.sklearn.load_model(f"models:/{MODEL_NAME}/{version}"), version
@@ -0,0 +1,53 @@
+"""
+Shared fixtures: an in-memory SQLite database with the tables the service
+reads and writes, and a small SVD model. Nothing here reaches Postgres or
+the MLflow server.
+"""
+import os
+
+# Required settings, read when Settings is first imported
+for name, value in {
+    "POSTGRES_SERVER": "localhost", "POSTGRES_USER": "test", "POSTGRES_PASSWORD": "test",
+    "POSTGRES_DB": "test", "BACKEND_URL": "http://127.0.0.1:9",
+    "MLFLOW_TRACKING_URI": "http://127.0.0.1:9", "MLFLOW_TRACKING_USERNAME": "test",
+    "MLFLOW_TRACKING_PASSWORD": "test",
+}.items():
+    os.environ.setdefault(name, value)
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+from Models import Rating, User, UserTopN
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine, tables=[User.__table__, Rating.__table__, UserTopN.__table__])
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture(scope="session")
+def svd_model():
+    """SVDCF trained on random ratings of 40 users over 60 movies"""
+    from svd.svd_impl import SVDCF
+
+    rng = np.random.default_rng(0)
+    ratings = [
+        {"user_id": user_id, "movie_id": int(movie_id), "rating": int(rng.integers(1, 6))}
+        for user_id in range(1, 41)
+        for movie_id in rng.choice(np.arange(1, 61), size=15, replace=False)
+    ]
+    model = SVDCF(num_components=5)
+    model.fit(pd.DataFrame(ratings))
+    return model
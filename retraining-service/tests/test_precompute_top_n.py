@@ -0,0 +1,71 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+from sqlmodel import select
+
+import precompute_top_n
+from Models import Rating, User, UserTopN
+
+TOP_N = 10
+
+
+@pytest.fixture
+def users(session, svd_model):
+    session.add_all(User(id=int(user_id), email=f"user{user_id}@example.com") for user_id in svd_model.users_id2index)
+    session.commit()
+
+
+@pytest.fixture(autouse=True)
+def test_engine(engine, monkeypatch):
+    monkeypatch.setattr(precompute_top_n, "engine", engine)
+
+
+def _stored(session):
+    session.expire_all()
+    return {
+        row.user_id: (row.rating_version, np.frombuffer(row.movie_ids, dtype="<i4").tolist(), row.computed_at)
+        for row in session.exec(select(UserTopN)).all()
+    }
+
+
+def test_rows_match_recommend_top_n(session, svd_model, users):
+    written = precompute_top_n.precompute_user_top_n(svd_model, 3, top_n=TOP_N, block_size=16)
+
+    stored = _stored(session)
+    assert written == len(stored) == len(svd_model.users_id2index)
+    for user_id, (_, movie_ids, _) in stored.items():
+        assert movie_ids == svd_model.recommend_top_n(user_id, n=TOP_N)
+    assert {row.model_version for row in session.exec(select(UserTopN)).all()} == {"3"}
+
+
+def test_only_stale_users_are_recomputed(session, svd_model, users):
+    precompute_top_n.precompute_user_top_n(svd_model, 3, top_n=TOP_N)
+    before = _stored(session)
+
+    # User 5 rates the first movie of their list
+    rated = before[5][1][0]
+    session.add(Rating(user_id=5, movie_id=rated, rating=4))
+    session.get(User, 5).rating_version = 1
+    session.commit()
+
+    assert precompute_top_n.precompute_user_top_n(svd_model, 3, top_n=TOP_N) == 1
+    after = _stored(session)
+    assert after[5][0] == 1 and rated not in after[5][1]
+    assert {user_id: row for user_id, row in after.items() if user_id != 5} == \
+        {user_id: row for user_id, row in before.items() if user_id != 5}
+
+    # A new model version rescores everyone
+    assert precompute_top_n.precompute_user_top_n(svd_model, 4, top_n=TOP_N) == len(before)
+
+
+def test_scheduler_jobs_precompute_off_the_event_loop(monkeypatch):
+    import Scheduler
+
+    threads = []
+    monkeypatch.setattr(Scheduler, "precompute_user_top_n", lambda *args: threads.append(threading.current_thread()))
+    monkeypatch.setattr(Scheduler, "latest_model", (object(), "3"))
+
+    asyncio.run(Scheduler.refresh_top_n_job())
+    assert threads and threads[0] is not threading.main_thread()
@@ -14,6 +14,7 @@ def run_svd_user_training(config,train,test,n_components, top_n,):
     
     :param n_components: Number of latent factors (overrides config if provided)
     :param top_n: Number of recommendations for evaluation (overrides config if provided)
+    :return: Tuple (trained model, registered model version)
     """
     
     # --- FIX: Explicitly set environment variables for Docker stability ---
@@ -116,6 +117,8 @@ def run_svd_user_training(config,train,test,n_components, top_n,):
                 train_df['rating']
             )
         )
+    
+    return model, str(model_info.registered_model_version)
      
 
 if __name__ == "__main__":